@@ -1,62 +1,277 @@
-# Required library: pip install mysql-connector-python
+# Required library: pip install mysql-connector-python (loaded on first database use)
 import argparse
 import json
-import mysql.connector
 from datetime import datetime, timedelta
 import hashlib
 import re
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
 
-# TODO: Fill this dictionary with your database connection details.
-# It is best practice to load these from a separate config file or environment variables.
-DB_CONFIG = {
-    'host': '10.147.17.110',             
-    'database': 'sqlockdb',             
-    'user': 'VinayNair',                 
-    'password': 'password',              # Your MySQL password
-    'port': 3306,                        # Default MySQL port
-    'autocommit': True,
-    'connect_timeout': 10
+from sqlock import db
+from sqlock.activitylog import ActivityLog
+from sqlock.canonicalize import canonicalize
+from sqlock.eventsink import EventSink
+from sqlock.lexer import tokenize
+from sqlock.matcher import AhoCorasick
+from sqlock.pool import ConnectionPool, PoolTimeout
+from sqlock.ratelimit import RateLimiter
+from sqlock.prefilter import Prefilter
+from sqlock.rulepack import RULE_PACK_ENV, RulePackError, RulePackWatcher
+from sqlock.storage import mysql_config, open_storage
+
+# MySQL connection details. SQLOCK_DB_HOST, SQLOCK_DB_PORT, SQLOCK_DB_NAME,
+# SQLOCK_DB_USER and SQLOCK_DB_PASSWORD override the defaults (see sqlock/storage.py).
+DB_CONFIG = mysql_config(
+    user='VinayNair',
+    autocommit=True,
+    connect_timeout=10,
+)
+
+# Where the helpers keep their data: "mysql" (DB_CONFIG), "sqlite" for an embedded
+# in-memory database or "sqlite:PATH" for a database file.
+STORAGE_ENV = 'SQLOCK_STORAGE'
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Return the storage backend, opening the one named by $SQLOCK_STORAGE on first use."""
+    storage = _storage
+    if storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _set_storage(open_storage(os.environ.get(STORAGE_ENV), DB_CONFIG))
+            storage = _storage
+    return storage
+
+def _set_storage(storage):
+    global _storage
+    _storage = storage
+    db.use_errors(storage.errors)
+
+def use_storage(storage, create_schema=False):
+    """
+    Switch every database helper to `storage` (a backend from sqlock/storage.py or a
+    string accepted by open_storage, e.g. "sqlite"). Pooled connections to the
+    previous backend are closed. With create_schema=True the tables are created too.
+    """
+    if isinstance(storage, str):
+        storage = open_storage(storage, DB_CONFIG)
+    with _storage_lock:
+        _set_storage(storage)
+    reset_db_pool()
+    if create_schema:
+        storage.create_schema()
+    return storage
+
+# Every database helper checks its connection out of one process-wide pool
+# (sqlock/pool.py), so logins stop paying a TCP + auth handshake per statement.
+DB_POOL_SETTINGS = {
+    'size': int(os.environ.get('SQLOCK_DB_POOL_SIZE', 5)),
+    'max_lifetime': 1800.0,      # Seconds before a connection is retired
+    'checkout_timeout': 10.0,    # Seconds to wait when every connection is in use
+    'check_idle_after': 1.0,     # Ping connections idle at least this long before reuse
 }
 
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Return the shared connection pool, creating it on first use."""
+    global _db_pool
+    pool = _db_pool
+    if pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(lambda: get_storage().connect(), **DB_POOL_SETTINGS)
+            pool = _db_pool
+    return pool
+
+def configure_db_pool(**settings):
+    """
+    Update DB_POOL_SETTINGS (size, max_lifetime, checkout_timeout, check_idle_after)
+    and replace the pool; the old one's idle connections are closed.
+    """
+    global _db_pool
+    unknown = set(settings) - set(DB_POOL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown pool settings: {sorted(unknown)}")
+    with _db_pool_lock:
+        DB_POOL_SETTINGS.update(settings)
+        old, _db_pool = _db_pool, None
+    if old is not None:
+        old.close()
+
+def reset_db_pool():
+    """Close the pooled connections; the next helper call opens fresh ones."""
+    configure_db_pool()
+
+def db_pool_stats():
+    """Metrics of the shared pool (None before the first database call)."""
+    pool = _db_pool
+    return pool.stats() if pool is not None else None
+
+@contextmanager
+def _db_connection():
+    """`with _db_connection() as connection:` borrows a pooled connection."""
+    pool = get_db_pool()
+    try:
+        connection = pool.acquire()
+    except PoolTimeout as error:
+        raise db.PoolError(msg=str(error)) from error
+    try:
+        yield connection
+    except BaseException:
+        pool.release(connection, discard=True)
+        raise
+    # A pool replaced in the meantime closes the connection instead of keeping it
+    pool.release(connection)
+
+_SMART_QUOTES = (("‘", "'"), ("’", "'"), ("“", '"'), ("”", '"'))
+
 def normalize_quotes(value):
     """Convert smart quotes to straight quotes for consistent analysis."""
-    if not isinstance(value, str):
+    if not isinstance(value, str) or value.isascii():
         return value
-    return (
-        value.replace("‘", "'")
-        .replace("’", "'")
-        .replace("“", '"')
-        .replace("”", '"')
-    )
+    for quote, replacement in _SMART_QUOTES:
+        if quote in value:
+            value = value.replace(quote, replacement)
+    return value
+
+def _progressive_lockout(failed_attempts):
+    """Lockout duration after `failed_attempts` consecutive failures, or None below 3."""
+    if failed_attempts < 3:
+        return None
+    if failed_attempts == 3:
+        return timedelta(minutes=15)  # 15 minutes for 3rd attempt
+    if failed_attempts == 4:
+        return timedelta(hours=1)     # 1 hour for 4th attempt
+    return timedelta(hours=24)        # 24 hours for 5th+ attempts
+
+def _insert_security_event(cursor, decision, score, query_text):
+    try:
+        get_storage().insert_event(cursor, decision, score, query_text)
+    except db.Error as error:
+        log_suspicious_activity(f"Database error logging event: {error}")
 
 def log_security_event(decision, score, query_text):
     """Log security event to the database."""
+    sink = _event_sink
+    if sink is not None:
+        sink.submit(decision, score, query_text, timeout=_call_time_left())
+        return
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        with _db_connection() as connection:
+            cursor = connection.cursor()
+            _insert_security_event(cursor, decision, score, query_text)
+            connection.commit()
+            cursor.close()
+    except db.Error as error:
+        log_suspicious_activity(f"Database error logging event: {error}")
+
+# --- Background event writer ---
+# Opt-in (enable_event_sink): security events are queued and written by a background
+# thread as multi-row INSERTs, so a login no longer waits on its Logs statement.
+
+_event_sink = None
+_event_sink_lock = threading.Lock()
+
+def _write_event_batch(events):
+    with _db_connection() as connection:
         cursor = connection.cursor()
-        
-        query = """
-            INSERT INTO Logs (decision, suspicion_score, query_template)
-            VALUES (%s, %s, %s)
-        """
-        cursor.execute(query, (decision, score, query_text))
+        get_storage().insert_events(cursor, events)
         connection.commit()
-        
         cursor.close()
-        connection.close()
-    except mysql.connector.Error as error:
-        log_suspicious_activity(f"Database error logging event: {error}")
+
+def enable_event_sink(**settings):
+    """
+    Route log_security_event (and the login's event insert) through an EventSink and
+    return it. `settings` go to EventSink: max_queue, batch_size, flush_interval,
+    policy ("block", "drop_allow" or "spill"), spill_path and block_timeout.
+    """
+    global _event_sink
+    sink = EventSink(_write_event_batch,
+                     on_error=lambda error: log_suspicious_activity(f"Database error logging events: {error}"),
+                     **settings)
+    with _event_sink_lock:
+        old, _event_sink = _event_sink, sink
+    if old is not None:
+        old.close()
+    return sink
+
+def disable_event_sink(timeout=10.0):
+    """Write out the queued events and go back to one INSERT per event."""
+    global _event_sink
+    with _event_sink_lock:
+        old, _event_sink = _event_sink, None
+    if old is not None:
+        old.close(timeout)
+
+def event_sink_stats():
+    """Counters of the event sink (None while it is disabled)."""
+    sink = _event_sink
+    return sink.stats() if sink is not None else None
+
+# --- Activity log ---
+# log_suspicious_activity writes JSON lines to pseudo_log.txt through a buffered,
+# rotating ActivityLog (sqlock/activitylog.py) that several processes can share.
+
+ACTIVITY_LOG_SETTINGS = {
+    'path': os.environ.get('SQLOCK_ACTIVITY_LOG', 'pseudo_log.txt'),
+    'max_bytes': 10 * 1024 * 1024,   # Rotate when the file would grow past this
+    'rotate_interval': None,         # Seconds, e.g. 86400 to also rotate daily
+    'backups': 5,                    # Rotated files kept (pseudo_log.txt.1 ... .5)
+    'compress': False,               # gzip the rotated files
+    'flush_interval': 1.0,           # Seconds records may wait in memory; 0 writes at once
+    'echo': os.environ.get('SQLOCK_LOG_ECHO') == '1',  # Also print each warning to stderr
+}
+
+_activity_log = None
+_activity_log_lock = threading.Lock()
+
+def get_activity_log():
+    """Return the shared activity log, creating it on first use."""
+    global _activity_log
+    log = _activity_log
+    if log is None:
+        with _activity_log_lock:
+            if _activity_log is None:
+                _activity_log = ActivityLog(**ACTIVITY_LOG_SETTINGS)
+            log = _activity_log
+    return log
+
+def configure_activity_log(**settings):
+    """Update ACTIVITY_LOG_SETTINGS and replace the activity log; the old one is flushed first."""
+    global _activity_log
+    unknown = set(settings) - set(ACTIVITY_LOG_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown activity log settings: {sorted(unknown)}")
+    with _activity_log_lock:
+        ACTIVITY_LOG_SETTINGS.update(settings)
+        old, _activity_log = _activity_log, None
+    if old is not None:
+        old.close()
+
+def flush_activity_log():
+    """Write the buffered activity log records now."""
+    log = _activity_log
+    if log is not None:
+        log.flush()
 
 def log_suspicious_activity(bad_input):
     """
-    Writes a warning to a 'pseudo_log.txt' file when called.
+    Records a warning in the activity log (pseudo_log.txt) when called.
     Use this in your code whenever an input validation check fails.
     """
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_message = f"[{current_time}] Suspicious input blocked: {bad_input}\n"
-    with open('pseudo_log.txt', 'a') as log_file:
-        log_file.write(log_message)
-    print("!!! WARNING: Suspicious activity was detected and logged. !!!")
+    get_activity_log().log(f"Suspicious input blocked: {bad_input}", event="suspicious_activity")
 
 def find_user_by_id(user_id):
     """
@@ -70,21 +285,194 @@ def find_user_by_id(user_id):
         log_suspicious_activity(f"Non-integer ID used: {user_id}")
         return None # Stop execution if the input is invalid.
 
-    # The '%s' is a secure placeholder for a parameter.
-    query = "SELECT id, username, email FROM users WHERE id = %s"
-    
+    # The storage backend passes the ID as a parameter, never inside the SQL text.
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        cursor.execute(query, (user_id,))
-        result = cursor.fetchone()
-        cursor.close()
-        connection.close()
+        with _db_connection() as connection:
+            cursor = connection.cursor()
+            result = get_storage().find_user(cursor, user_id)
+            cursor.close()
         return result
-    except mysql.connector.Error as error:
+    except db.Error as error:
         log_suspicious_activity(f"Database error in find_user_by_id: {error}")
         return None
 
+# --- Lockout cache ---
+# Opt-in (enable_lockout_cache): an in-process copy of the user_security rows read by
+# is_account_locked, get_lockout_info and authenticate_user. The helpers that change
+# a row write the change through, so a locked account under attack is rejected from
+# memory. Writes made by other processes are seen once the cached entry expires.
+# enable_shared_lockout_table keeps the same entries in shared memory instead
+# (sqlock/sharedlockout.py), so the worker processes of one host write through to,
+# and answer from, one table.
+
+class LockoutCache:
+    """
+    Size-bounded LRU cache of (failed_attempts, lockout_until, lockout_reason) keyed on
+    username. A user without a user_security row is cached as None (negative entry).
+    Entries expire after `ttl` seconds, negative ones after `negative_ttl` (default: ttl).
+    """
+
+    MISS = object()
+
+    def __init__(self, capacity=10000, ttl=5.0, negative_ttl=None):
+        if capacity < 1:
+            raise ValueError("LockoutCache capacity must be at least 1")
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, username):
+        """The cached state (None for a user without a row), or LockoutCache.MISS."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[1] <= now:
+                self.misses += 1
+                return self.MISS
+            self._entries.move_to_end(username)
+            if entry[0] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[0]
+
+    def is_locked(self, username):
+        """True only if a fresh cached entry says the account is locked right now."""
+        state = self.get(username)
+        return state is not self.MISS and state is not None and bool(state[1]) and datetime.now() < state[1]
+
+    def version(self, username=None):
+        """Take before reading from the database; store() skips results older than a write."""
+        with self._lock:
+            return self._writes
+
+    def store(self, username, state, version):
+        state = tuple(state) if state is not None else None
+        ttl = self.ttl if state is not None else self.negative_ttl
+        with self._lock:
+            if version != self._writes:
+                return  # A helper wrote a newer state while the row was being read
+            self._put(username, state, ttl)
+
+    def _put(self, username, state, ttl):
+        self._entries[username] = (state, time.monotonic() + ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def update(self, username, failed_attempts=None, lockout_until=MISS, lockout_reason=MISS):
+        """
+        Write through a change to the user's row. Only a cached entry is updated (a
+        negative one as the freshly inserted row); otherwise the next read fetches it.
+        """
+        with self._lock:
+            self._writes += 1
+            entry = self._entries.get(username)
+            if entry is None:
+                return
+            attempts, until, reason = entry[0] if entry[0] is not None else (0, None, None)
+            if failed_attempts is not None:
+                attempts = failed_attempts
+            if lockout_until is not self.MISS:
+                until = lockout_until
+            if lockout_reason is not self.MISS:
+                reason = lockout_reason
+            self._put(username, (attempts, until, reason), self.ttl)
+
+    def reset(self, username):
+        """Mirror of the reset statement: SQL injection lockouts are kept."""
+        with self._lock:
+            self._writes += 1
+            entry = self._entries.get(username)
+            if entry is None or entry[0] is None:
+                return
+            reason = entry[0][2]
+            if not (reason and 'SQL injection' in reason):
+                self._put(username, (0, None, reason), self.ttl)
+
+    def invalidate(self, username):
+        with self._lock:
+            self._writes += 1
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters as a dictionary."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+_lockout_cache = None
+
+def _close_lockout_cache():
+    # Closes a replaced SharedLockoutTable: its fcntl locks are released when any fd of
+    # this process to the file is closed, so a leaked one would break a new table's locks
+    global _lockout_cache
+    old, _lockout_cache = _lockout_cache, None
+    if hasattr(old, 'close'):
+        old.close()
+
+def enable_lockout_cache(capacity=10000, ttl=5.0, negative_ttl=None):
+    """Serve lockout state from a LockoutCache and return it."""
+    global _lockout_cache
+    _close_lockout_cache()
+    _lockout_cache = LockoutCache(capacity, ttl, negative_ttl)
+    return _lockout_cache
+
+def enable_shared_lockout_table(path=None, slots=65536, ttl=30.0, negative_ttl=None):
+    """
+    Serve lockout state from a SharedLockoutTable, shared by every local process that
+    opens the same file (default: in a private per-user directory in /dev/shm), and
+    return it. A table enabled before is closed.
+    """
+    global _lockout_cache
+    from sqlock.sharedlockout import SharedLockoutTable
+    _close_lockout_cache()
+    _lockout_cache = SharedLockoutTable(path, slots, ttl=ttl, negative_ttl=negative_ttl)
+    return _lockout_cache
+
+def disable_lockout_cache():
+    """Remove the lockout cache or shared table; every check reads user_security again."""
+    _close_lockout_cache()
+
+def _read_lockout_state(username):
+    """(failed_attempts, lockout_until, lockout_reason), or None for a user without a row."""
+    cache = _lockout_cache
+    if cache is not None:
+        state = cache.get(username)
+        if state is not cache.MISS:
+            return state
+        version = cache.version(username)
+    with _db_connection() as connection:
+        cursor = connection.cursor()
+        state = get_storage().lockout_state(cursor, username)
+        cursor.close()
+    if cache is not None:
+        cache.store(username, state, version)
+    return state
+
 def is_account_locked(username):
     """Check if account is currently locked due to failed attempts or SQL injection."""
     if not username or not isinstance(username, str):
@@ -92,27 +480,14 @@ def is_account_locked(username):
         return False
     
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
-        query = """
-        SELECT failed_attempts, lockout_until, lockout_reason 
-        FROM user_security 
-        WHERE username = %s
-        """
-        cursor.execute(query, (username,))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        result = _read_lockout_state(username)
         if result:
             failed_attempts, lockout_until, lockout_reason = result
             if lockout_until and datetime.now() < lockout_until:
                 return True
         
         return False
-    except mysql.connector.Error as error:
+    except db.Error as error:
         log_suspicious_activity(f"Database error checking lockout status: {error}")
         return False
 
@@ -123,20 +498,7 @@ def get_lockout_info(username):
         return {'locked': False, 'time_remaining': 0, 'failed_attempts': 0}
     
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
-        query = """
-        SELECT failed_attempts, lockout_until, lockout_reason 
-        FROM user_security 
-        WHERE username = %s
-        """
-        cursor.execute(query, (username,))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        result = _read_lockout_state(username)
         if result:
             failed_attempts, lockout_until, lockout_reason = result
             if lockout_until and datetime.now() < lockout_until:
@@ -152,7 +514,7 @@ def get_lockout_info(username):
                 return {'locked': False, 'time_remaining': 0, 'failed_attempts': failed_attempts}
         
         return {'locked': False, 'time_remaining': 0, 'failed_attempts': 0}
-    except mysql.connector.Error as error:
+    except db.Error as error:
         log_suspicious_activity(f"Database error getting lockout info: {error}")
         return {'locked': False, 'time_remaining': 0, 'failed_attempts': 0}
 
@@ -163,50 +525,37 @@ def record_failed_login(username):
         return
     
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
-        # Get current failed attempts
-        query = "SELECT failed_attempts FROM user_security WHERE username = %s"
-        cursor.execute(query, (username,))
-        result = cursor.fetchone()
+        with _db_connection() as connection:
+            cursor = connection.cursor()
+            storage = get_storage()
         
-        if result:
-            failed_attempts = result[0] + 1
-        else:
-            failed_attempts = 1
-            # Insert new record
-            cursor.execute("""
-                INSERT INTO user_security (username, failed_attempts, last_failed_attempt)
-                VALUES (%s, %s, %s)
-            """, (username, 0, datetime.now()))
+            # Get current failed attempts
+            result = storage.failed_attempts(cursor, username)
         
-        # Determine lockout duration based on attempts
-        lockout_until = None
-        if failed_attempts >= 3:
-            if failed_attempts == 3:
-                lockout_duration = timedelta(minutes=15)  # 15 minutes for 3rd attempt
-            elif failed_attempts == 4:
-                lockout_duration = timedelta(hours=1)     # 1 hour for 4th attempt
+            if result is not None:
+                failed_attempts = result + 1
             else:
-                lockout_duration = timedelta(hours=24)    # 24 hours for 5th+ attempts
-            
-            lockout_until = datetime.now() + lockout_duration
-            log_suspicious_activity(f"Account {username} locked for {lockout_duration} after {failed_attempts} failed attempts")
+                failed_attempts = 1
+                # Insert new record
+                storage.insert_security_row(cursor, username, datetime.now())
         
-        # Update the security record
-        cursor.execute("""
-            UPDATE user_security 
-            SET failed_attempts = %s, last_failed_attempt = %s, lockout_until = %s
-            WHERE username = %s
-        """, (failed_attempts, datetime.now(), lockout_until, username))
+            # Determine lockout duration based on attempts
+            lockout_until = None
+            lockout_duration = _progressive_lockout(failed_attempts)
+            if lockout_duration:
+                lockout_until = datetime.now() + lockout_duration
+                log_suspicious_activity(f"Account {username} locked for {lockout_duration} after {failed_attempts} failed attempts")
         
-        cursor.close()
-        connection.close()
+            # Update the security record
+            storage.set_failed_attempts(cursor, username, failed_attempts, datetime.now(), lockout_until)
         
+            cursor.close()
+
+        if _lockout_cache is not None:
+            _lockout_cache.update(username, failed_attempts, lockout_until)
         log_suspicious_activity(f"Failed login attempt for username: {username}")
         
-    except mysql.connector.Error as error:
+    except db.Error as error:
         log_suspicious_activity(f"Database error recording failed login: {error}")
 
 def apply_immediate_sql_lockout(username, detected_pattern):
@@ -216,152 +565,784 @@ def apply_immediate_sql_lockout(username, detected_pattern):
         return
     
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
+        with _db_connection() as connection:
+            cursor = connection.cursor()
         
-        # 24-hour lockout for SQL injection
-        lockout_until = datetime.now() + timedelta(hours=24)
-        lockout_reason = f"SQL injection attempt: {detected_pattern}"
+            # 24-hour lockout for SQL injection
+            lockout_until = datetime.now() + timedelta(hours=24)
+            lockout_reason = f"SQL injection attempt: {detected_pattern}"
         
-        # Insert or update security record with immediate lockout
-        cursor.execute("""
-            INSERT INTO user_security (username, failed_attempts, lockout_until, lockout_reason, last_failed_attempt)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-            lockout_until = VALUES(lockout_until),
-            lockout_reason = VALUES(lockout_reason),
-            last_failed_attempt = VALUES(last_failed_attempt)
-        """, (username, 0, lockout_until, lockout_reason, datetime.now()))
+            # Insert or update security record with immediate lockout
+            get_storage().sql_lockout(cursor, username, lockout_until, lockout_reason, datetime.now())
         
-        cursor.close()
-        connection.close()
+            cursor.close()
+
+        if _lockout_cache is not None:
+            _lockout_cache.update(username, lockout_until=lockout_until, lockout_reason=lockout_reason)
         
         log_suspicious_activity(f"IMMEDIATE LOCKOUT: Account {username} locked for 24 hours due to SQL injection attempt: {detected_pattern}")
         
-    except mysql.connector.Error as error:
+    except db.Error as error:
         log_suspicious_activity(f"Database error applying immediate lockout: {error}")
 
+# --- SQL injection detection rules ---
+# Weighted regex rules that apply to every input: (pattern, weight, description, anchors).
+# `anchors` are lexer token values; a rule can only match if at least one of them
+# appears in the token stream, so the regex is only run when an anchor is present.
+SQLI_REGEX_RULES = [
+    (r"\b(union\s+select|union\s+all\s+select)\b", 100, "UNION-based injection", ("union",)),
+    (r"\b(drop\s+table|alter\s+table|truncate\s+table)\b", 100, "Destructive command", ("table",)),
+    (r"\b(exec|execute)\s*\(", 90, "Code execution", ("exec", "execute")),
+    (r"(\b(or|and)\b\s*['\"]?\w+['\"]?\s*=\s*['\"]?\w+['\"]?)", 80, "Tautology (OR 1=1)", ("or", "and")), # Matches "OR 1=1", "OR 'a'='a'", "OR '1'='1'"
+    (r"(--|#|\/\*)", 30, "SQL Comment", ("--", "#", "/*")), # Comments are suspicious but maybe not instant block alone
+    (r";", 30, "Statement stacking", (";",)),
+]
+
+# Only flag standard SQL commands if the input doesn't start with them.
+# If it starts with them, it's likely a full query being analyzed, so the command itself is not the injection.
+RAW_INPUT_REGEX_RULES = [
+    (r"\b(select\s+.*\s+from)\b", 80, "Direct data extraction", ("select",)),
+    (r"\b(insert\s+into|update\s+.*set|delete\s+from)\b", 90, "Data modification attempt", ("insert", "update", "delete")),
+]
+
+# Token-based equivalents of rule patterns whose `.*` runs make Python's backtracking
+# regex engine go cubic on crafted input (e.g. "select" followed by thousands of spaces).
+# Each check gives the same answer as re.search(pattern, text) in a single pass.
+_INSERT_OR_DELETE = re.compile(r"\b(insert\s+into|delete\s+from)\b")
+
+def _select_from_check(text, tokens):
+    r"""Linear-time equivalent of re.search(r"\b(select\s+.*\s+from)\b", text)."""
+    last_newline = -1
+    latest_select_gap_end = None
+    for j in range(1, len(tokens)):
+        prev, token = tokens[j - 1], tokens[j]
+        # Track newlines in the whitespace gaps before `prev` (tokens never contain one)
+        newline = text.rfind("\n", tokens[j - 2].end if j >= 2 else 0, prev.start)
+        if newline != -1:
+            last_newline = newline
+        if j >= 2 and tokens[j - 2].value == "select" and prev.start > tokens[j - 2].end:
+            latest_select_gap_end = prev.start
+        if token.value != "from" or token.start == prev.end:
+            continue
+        # "select" directly before "from": \s+.*\s+ needs at least two whitespace characters
+        if prev.value == "select" and token.start - prev.end >= 2:
+            return True
+        # Otherwise the `.*` has to bridge from the end of the whitespace after
+        # "select" to the whitespace before "from" without crossing a newline
+        if latest_select_gap_end is not None and last_newline < latest_select_gap_end:
+            return True
+    return False
+
+def _data_modification_check(text, tokens):
+    r"""Linear-time equivalent of re.search(r"\b(insert\s+into|update\s+.*set|delete\s+from)\b", text)."""
+    if _INSERT_OR_DELETE.search(text):
+        return True
+    last_newline = -1
+    latest_update_gap_end = None
+    for j, token in enumerate(tokens):
+        newline = text.rfind("\n", tokens[j - 1].end if j else 0, token.start)
+        if newline != -1:
+            last_newline = newline
+        if j and tokens[j - 1].value == "update" and token.start > tokens[j - 1].end:
+            latest_update_gap_end = token.start
+        # `set\b` only needs to end a word, so "offset" counts as well
+        if latest_update_gap_end is not None and token.value.endswith("set") and last_newline < latest_update_gap_end:
+            return True
+    return False
+
+LINEAR_TIME_CHECKS = {
+    r"\b(select\s+.*\s+from)\b": _select_from_check,
+    r"\b(insert\s+into|update\s+.*set|delete\s+from)\b": _data_modification_check,
+}
+
+# The "Basic SQLi Dictionary" (Improvement 5)
+# Specific signatures that aren't covered by regex. Any hit is an instant block (score 100).
+BASIC_SQLI_DICTIONARY = {
+    "1=1": "Tautology injection",
+    "1'='1": "Quote tautology",
+    "'1'='1": "Quote tautology variant",
+    "admin'--": "Admin bypass attempt",
+    "' or '1'='1": "Classic OR injection",
+    " or '1'='1": "Classic OR injection variant",
+    "or '1'='1": "Classic OR injection variant 2",
+    "' or 1=1": "Numeric OR injection",
+    "' or 1=1--": "Numeric OR injection with comment",
+    "'; drop table": "Table drop attempt",
+    "'; delete from": "Delete injection",
+    "xp_": "Extended procedure",
+    "sp_": "System procedure",
+    "%27": "URL encoded single quote",
+    "%22": "URL encoded double quote",
+    "%3B": "URL encoded semicolon",
+    "&#39;": "HTML encoded single quote",
+    "&#34;": "HTML encoded double quote",
+    # Re-adding the keywords from original list as "Basic Dictionary" checks
+    " union ": "UNION injection",
+    " select ": "SELECT injection",
+    " insert ": "INSERT injection",
+    " delete ": "DELETE injection",
+    " update ": "UPDATE injection",
+    " drop ": "DROP injection",
+    " create ": "CREATE injection",
+    " alter ": "ALTER injection",
+    " truncate ": "TRUNCATE injection",
+    " exec ": "EXEC injection",
+    " execute ": "EXECUTE injection",
+}
+
+BLOCK_THRESHOLD = 80
+
+# What to do with inputs longer than a ruleset's max_scan_length:
+# "block" rejects them outright, "truncate" only scans the first max_scan_length characters.
+OVERSIZE_POLICIES = ("block", "truncate")
+OVERSIZE_VERDICT = (True, "Input exceeds maximum scan length", 100)
+
+# Inputs whose first token is one of these commands are treated as full SQL statements
+FULL_STATEMENT_COMMANDS = frozenset({"select", "insert", "update", "delete", "create", "alter", "drop"})
+
+# Characters the non-rule stages need before they can add to the score: the quote
+# checks need ', the suspicious-character count needs one of ';"- and URL/HTML
+# decoding only changes input containing % or &.
+STAGE_TRIGGER_CHARS = "';\"-"
+DECODE_TRIGGER_CHARS = "%&"
+
+# Result of a batch detection: three sequences aligned with the inputs
+BatchVerdicts = namedtuple("BatchVerdicts", ["malicious", "patterns", "scores"])
+
+# Result of detect_fields(): the combined verdict, the field it came from and
+# a dict of per-field (is_malicious, detected_pattern, score) verdicts
+FieldVerdicts = namedtuple("FieldVerdicts", ["malicious", "pattern", "score", "field", "fields"])
+
+# Per-field profiles for detect_fields(). "ignore" lists finding descriptions dropped for
+# the field (None is the unlabeled weight of a lone quote); "block_threshold" optionally
+# overrides the ruleset's threshold. Fields get "default" unless a profile is passed.
+FIELD_PROFILES = {
+    "default": {},
+    # Passwords are only ever hashed, and legitimately contain quotes, '#' and '--'.
+    # Tautologies, UNION/stacked commands and dictionary signatures still count.
+    "password": {
+        'ignore': frozenset({None, "Suspicious single quote usage", "SQL Comment", "Multiple suspicious characters"}),
+    },
+}
+
+
+class Ruleset:
+    """
+    Compiled form of the SQL injection detection rules.
+    Build it once and reuse it; every pattern is compiled up front so a
+    detect() call only scans the input, it never rebuilds rule tables.
+    """
+
+    def __init__(self, regex_rules, raw_input_regex_rules, dictionary, block_threshold=BLOCK_THRESHOLD,
+                 max_scan_length=None, oversize_policy="block", decode_input=True, prefilter=True):
+        if oversize_policy not in OVERSIZE_POLICIES:
+            raise ValueError(f"Unknown oversize policy: {oversize_policy}")
+        self.block_threshold = block_threshold
+        self.max_scan_length = max_scan_length
+        self.oversize_policy = oversize_policy
+        # Also score the canonical (NFKC + URL/HTML decoded) form of encoded input
+        self.decode_input = decode_input
+        # "name@version" of the rule pack this ruleset was built from; None for the built-in rules
+        self.rule_pack = None
+
+        # Fingerprint of the rule tables; caches drop their verdicts when it changes
+        self.version = hashlib.sha256(
+            json.dumps([regex_rules, raw_input_regex_rules, dictionary, block_threshold,
+                        max_scan_length, oversize_policy, decode_input]).encode()
+        ).hexdigest()[:16]
+
+        # Regex rules: (check, weight, description, anchors, raw_input_only), in reporting order.
+        # check(input_lower, tokens) is either a token-based linear-time check or a compiled regex search.
+        self._rules = tuple(
+            [(self._compile_check(p), w, d, frozenset(a), False) for p, w, d, a in regex_rules]
+            + [(self._compile_check(p), w, d, frozenset(a), True) for p, w, d, a in raw_input_regex_rules]
+        )
+
+        # Dictionary entries share one Aho-Corasick automaton, so every entry is found
+        # in a single pass no matter how many signatures the dictionary holds.
+        self._dictionary = tuple(f"{desc} (Dictionary Match)" for desc in dictionary.values())
+        self._dictionary_matcher = AhoCorasick(needle.lower() for needle in dictionary)
+
+        # Fast-verdict order for the token-based stages: highest possible weight first.
+        # _fast_remaining[k] is the most score the stages from position k onwards can still add.
+        fast_order = [(rule[1], "rule", i) for i, rule in enumerate(self._rules)]
+        fast_order += [(90, "quote", None), (20, "suspicious_chars", None)]
+        fast_order.sort(key=lambda entry: -entry[0])
+        self._fast_order = tuple((stage, index) for _, stage, index in fast_order)
+        weights = [weight for weight, _, _ in fast_order]
+        self._fast_remaining = tuple(sum(weights[k:]) for k in range(len(weights) + 1))
+
+        # Input that fails every prefilter condition has no findings at all, so it gets
+        # the empty-findings verdict without running the stages (see sqlock/prefilter.py)
+        self._clean_verdict = self._verdict([])
+        self.prefilter = Prefilter.from_conditions(
+            STAGE_TRIGGER_CHARS + (DECODE_TRIGGER_CHARS if decode_input else ""),
+            [anchor for rule in self._rules for anchor in rule[3]],
+            dictionary,
+        ) if prefilter else None
+
+    @classmethod
+    def default(cls, **options):
+        """Build the ruleset from the module-level rule tables."""
+        return cls(SQLI_REGEX_RULES, RAW_INPUT_REGEX_RULES, BASIC_SQLI_DICTIONARY, **options)
+
+    @classmethod
+    def from_rule_pack(cls, pack, **options):
+        """
+        Build the ruleset from a loaded rule pack (see sqlock.rulepack.load_rule_pack).
+        A pack without a detector section gets the built-in rules; keyword options
+        override the pack's block_threshold.
+        """
+        detector = pack.get("detector")
+        if detector is None:
+            ruleset = cls.default(**options)
+        else:
+            options.setdefault("block_threshold", detector.get("block_threshold", BLOCK_THRESHOLD))
+            ruleset = cls(detector["regex_rules"], detector["raw_input_regex_rules"], detector["dictionary"], **options)
+        ruleset.rule_pack = f"{pack['name']}@{pack['version']}"
+        return ruleset
+
+    @staticmethod
+    def _compile_check(pattern):
+        if pattern in LINEAR_TIME_CHECKS:
+            return LINEAR_TIME_CHECKS[pattern]
+        search = re.compile(pattern).search
+        return lambda input_lower, tokens: search(input_lower)
+
+    def _matching_rules(self, input_lower, tokens, is_full_statement):
+        """Return the indexes of the regex rules that match, in rule order."""
+        token_values = {token.value for token in tokens}
+        matched = []
+        for i, (check, _, _, anchors, raw_input_only) in enumerate(self._rules):
+            if raw_input_only and is_full_statement:
+                continue
+            if not anchors.isdisjoint(token_values) and check(input_lower, tokens):
+                matched.append(i)
+        return matched
+
+    def _scan_input(self, input_string):
+        """Apply the oversize policy and normalize; returns None when the input is blocked for its size."""
+        if self.max_scan_length is not None and len(input_string) > self.max_scan_length:
+            if self.oversize_policy == "block":
+                return None
+            input_string = input_string[:self.max_scan_length]
+        return normalize_quotes(input_string)
+
+    # Each stage below returns a list of (description, weight) findings.
+    # A description of None adds to the score without being reported as a pattern.
+
+    @staticmethod
+    def _quick_findings(input_lower):
+        # Quick check for obvious SQL injection patterns first
+        if "' or '" in input_lower or "' or 1" in input_lower or "' and '" in input_lower:
+            return [("SQL injection pattern detected", 100)]
+        return []
+
+    @staticmethod
+    def _quote_findings(input_string, tokens):
+        # Context-Aware Checks (Improvement 3) & Weighted Scoring (Improvement 1)
+        # Single quote is only suspicious if followed by SQL keywords or operators.
+        if "'" not in input_string:
+            return []
+        quote_context = None
+        for token, next_token in zip(tokens, tokens[1:]):
+            if token.value != "'":
+                continue
+            if next_token.value in ("or", "and"):
+                quote_context = "logic"
+                break
+            if next_token.value in (";", "--", "#", "/*"):
+                quote_context = "terminator"
+        if quote_context == "logic":
+            # High score for ' OR / ' AND which is a very common injection starter
+            return [("Suspicious single quote with logic operator", 90)]
+        if quote_context == "terminator":
+            return [("Suspicious single quote usage", 50)]
+        # Low score for just a quote (e.g. O'Reilly)
+        return [(None, 5)]
+
+    def _rule_findings(self, input_lower, tokens, is_full_statement):
+        rules = self._rules
+        return [(rules[i][2], rules[i][1]) for i in self._matching_rules(input_lower, tokens, is_full_statement)]
+
+    def _dictionary_findings(self, input_lower):
+        return [
+            (self._dictionary[i], 100) # Instant block threshold
+            for i in sorted(self._dictionary_matcher.matched_indexes(input_lower))
+        ]
+
+    @staticmethod
+    def _suspicious_char_findings(input_string):
+        # Multiple suspicious characters (from original code)
+        if sum(map(input_string.count, "';\"-")) > 3:
+            return [("Multiple suspicious characters", 20)]
+        return []
+
+    def _findings(self, input_string):
+        """Run every stage in reporting order. Returns (findings, is_full_statement)."""
+        input_lower = input_string.lower()
+        findings = self._quick_findings(input_lower)
+
+        # Tokenize once; the checks below look at tokens instead of re-scanning the string
+        tokens = tokenize(input_lower)
+
+        # Check if the input appears to be a complete SQL statement (starts with a command)
+        # This helps distinguish between a full query analysis (where SELECT is expected)
+        # and a raw input analysis (where SELECT is suspicious).
+        is_full_statement = bool(tokens) and tokens[0].value in FULL_STATEMENT_COMMANDS
+
+        # 1. Quote context, only for raw input because valid SQL often contains ' followed by OR/AND.
+        if not is_full_statement:
+            findings += self._quote_findings(input_string, tokens)
+        # 2. Regex Patterns (Improvement 2)
+        findings += self._rule_findings(input_lower, tokens, is_full_statement)
+        # 3. The "Basic SQLi Dictionary" (Improvement 5)
+        findings += self._dictionary_findings(input_lower)
+        # 4. Only apply to raw input, as valid SQL statements naturally contain many quotes/semicolons
+        if not is_full_statement:
+            findings += self._suspicious_char_findings(input_string)
+        return findings, is_full_statement
+
+    def _candidates(self, input_string):
+        """(scanned_string, findings, is_full_statement) for the input and, when decoding changes it, its canonical form."""
+        candidates = [(input_string,) + self._findings(input_string)]
+        if self.decode_input:
+            canonical = canonicalize(input_string)
+            if canonical != input_string:
+                candidates.append((canonical,) + self._findings(canonical))
+        return candidates
+
+    def _best_findings(self, input_string, candidates=None, ignore=frozenset()):
+        """
+        Findings for the input and, when decoding changes it, for its canonical form.
+        The higher score wins (ties keep the input as given), so decoding can only add detections.
+        Findings whose description is in `ignore` are dropped first.
+        Returns (findings, is_full_statement, scanned_string).
+        """
+        best = None
+        for scanned, findings, is_full_statement in candidates or self._candidates(input_string):
+            if ignore:
+                findings = [finding for finding in findings if finding[0] not in ignore]
+            if best is None or self._verdict(findings)[2] > self._verdict(best[0])[2]:
+                best = (findings, is_full_statement, scanned)
+        return best
+
+    def _verdict(self, findings, block_threshold=None):
+        score = sum(weight for _, weight in findings)
+        # Frontend expects 0-100, so clamp the score.
+        final_score = min(100, score)
+        if block_threshold is None:
+            block_threshold = self.block_threshold
+        is_malicious = final_score >= block_threshold # Threshold for blocking
+        primary_pattern = next((desc for desc, _ in findings if desc is not None), None)
+        return is_malicious, primary_pattern, final_score
+
+    def detect(self, input_string):
+        """
+        Comprehensive SQL injection pattern detection.
+        Returns (is_malicious, detected_pattern, score)
+        """
+        if not input_string or not isinstance(input_string, str):
+            return False, None, 0
+
+        input_string = self._scan_input(input_string)
+        if input_string is None:
+            return OVERSIZE_VERDICT
+        if self.prefilter is not None and not self.prefilter.needs_scan(input_string):
+            return self._clean_verdict
+        return self._detect_scanned(input_string)
+
+    def _detect_scanned(self, input_string):
+        findings, _, _ = self._best_findings(input_string)
+        return self._verdict(findings)
+
+    def detect_fast(self, input_string):
+        """
+        Fast-verdict detection: runs the highest-weight stages first and stops as soon
+        as the block decision can no longer change.
+        is_malicious always equals detect()'s; the pattern is the first rule that fired
+        in fast order and the score only counts the stages that ran.
+        """
+        if not input_string or not isinstance(input_string, str):
+            return False, None, 0
+
+        input_string = self._scan_input(input_string)
+        if input_string is None:
+            return OVERSIZE_VERDICT
+        if self.prefilter is not None and not self.prefilter.needs_scan(input_string):
+            return self._clean_verdict
+
+        verdict = self._fast_verdict(input_string)
+        if not verdict[0] and self.decode_input:
+            canonical = canonicalize(input_string)
+            if canonical != input_string:
+                canonical_verdict = self._fast_verdict(canonical)
+                if canonical_verdict[0]:
+                    return canonical_verdict
+        return verdict
+
+    def _fast_verdict(self, input_string):
+        threshold = self.block_threshold
+        input_lower = input_string.lower()
+
+        # Quick check and dictionary hits are each worth 100 and need no tokens
+        findings = self._quick_findings(input_lower) + self._dictionary_findings(input_lower)
+        score = sum(weight for _, weight in findings)
+        if min(100, score) >= threshold or min(100, score + self._fast_remaining[0]) < threshold:
+            return self._verdict(findings)
+
+        tokens = tokenize(input_lower)
+        is_full_statement = bool(tokens) and tokens[0].value in FULL_STATEMENT_COMMANDS
+        token_values = {token.value for token in tokens}
+        for step, (stage, rule_index) in enumerate(self._fast_order, start=1):
+            if stage == "rule":
+                check, weight, desc, anchors, raw_input_only = self._rules[rule_index]
+                if (raw_input_only and is_full_statement) or anchors.isdisjoint(token_values):
+                    continue
+                stage_findings = [(desc, weight)] if check(input_lower, tokens) else []
+            elif is_full_statement:
+                continue
+            elif stage == "quote":
+                stage_findings = self._quote_findings(input_string, tokens)
+            else:
+                stage_findings = self._suspicious_char_findings(input_string)
+
+            if stage_findings:
+                findings += stage_findings
+                score += sum(weight for _, weight in stage_findings)
+            if min(100, score) >= threshold or min(100, score + self._fast_remaining[step]) < threshold:
+                break
+        return self._verdict(findings)
+
+    def explain(self, input_string):
+        """
+        Full rule breakdown for the dashboard.
+        Returns the detect() verdict plus every rule that fired with its weight.
+        """
+        findings = []
+        is_full_statement = False
+        scanned = None
+        if input_string and isinstance(input_string, str):
+            scan_input = self._scan_input(input_string)
+            if scan_input is None:
+                findings = [OVERSIZE_VERDICT[1:]]
+            else:
+                findings, is_full_statement, scanned = self._best_findings(scan_input)
+
+        is_malicious, primary_pattern, final_score = self._verdict(findings)
+        return {
+            'malicious': is_malicious,
+            'pattern': primary_pattern,
+            'score': final_score,
+            'raw_score': sum(weight for _, weight in findings),
+            'threshold': self.block_threshold,
+            'full_statement': is_full_statement,
+            'scanned': scanned,
+            'matches': [
+                {'rule': desc if desc is not None else "Single quote", 'weight': weight}
+                for desc, weight in findings
+            ],
+        }
+
+    def _detect_distinct(self, values):
+        """Verdicts for a collection of distinct strings, prefiltered as one batch."""
+        verdicts = {}
+        pending = []
+        for value in values:
+            scan_input = self._scan_input(value) if value else None
+            if not value:
+                verdicts[value] = (False, None, 0)
+            elif scan_input is None:
+                verdicts[value] = OVERSIZE_VERDICT
+            else:
+                pending.append((value, scan_input))
+
+        if self.prefilter is not None:
+            needed = self.prefilter.needs_scan_many(scan_input for _, scan_input in pending)
+        else:
+            needed = [True] * len(pending)
+        for (value, scan_input), needs_scan in zip(pending, needed):
+            verdicts[value] = self._detect_scanned(scan_input) if needs_scan else self._clean_verdict
+        return verdicts
+
+    def _field_profile(self, field, profile):
+        if profile is None:
+            profile = "default"
+        if isinstance(profile, str):
+            if profile not in FIELD_PROFILES:
+                raise ValueError(f"Unknown field profile: {profile}")
+            profile = FIELD_PROFILES[profile]
+        return frozenset(profile.get('ignore', ())), profile.get('block_threshold', self.block_threshold)
+
+    def detect_fields(self, fields, profiles=None):
+        """
+        Scan every field of a request in one call.
+        `fields` maps field names to values; `profiles` optionally maps field names to a
+        FIELD_PROFILES name or a profile dict (other fields get the strict "default" one).
+        Each distinct value is normalized, canonicalized and scored once, and the prefilter
+        screens all of them as one batch.
+        Returns FieldVerdicts(malicious, pattern, score, field, fields): the combined verdict
+        comes from the first malicious field in mapping order, or else the highest-scoring one.
+        """
+        profiles = profiles or {}
+        resolved = {name: self._field_profile(name, profiles.get(name)) for name in fields}
+
+        scan_inputs = {}
+        for value in fields.values():
+            if value and isinstance(value, str) and value not in scan_inputs:
+                scan_inputs[value] = self._scan_input(value)
+        pending = list({scan for scan in scan_inputs.values() if scan is not None})
+        if self.prefilter is not None:
+            needs_scan = dict(zip(pending, self.prefilter.needs_scan_many(pending)))
+        else:
+            needs_scan = dict.fromkeys(pending, True)
+
+        candidates = {}
+        verdicts = {}
+        for name, value in fields.items():
+            ignore, block_threshold = resolved[name]
+            scan = scan_inputs.get(value) if isinstance(value, str) else None
+            if not value or not isinstance(value, str):
+                verdicts[name] = (False, None, 0)
+            elif scan is None:
+                verdicts[name] = OVERSIZE_VERDICT
+            elif not needs_scan[scan]:
+                verdicts[name] = self._verdict([], block_threshold)
+            else:
+                if scan not in candidates:
+                    candidates[scan] = self._candidates(scan)
+                findings, _, _ = self._best_findings(scan, candidates[scan], ignore)
+                verdicts[name] = self._verdict(findings, block_threshold)
+
+        combined_field = next((name for name, verdict in verdicts.items() if verdict[0]), None)
+        if combined_field is None and verdicts:
+            combined_field = max(verdicts, key=lambda name: verdicts[name][2])
+        combined = verdicts.get(combined_field, (False, None, 0))
+        return FieldVerdicts(combined[0], combined[1], combined[2], combined_field, verdicts)
+
+    def detect_many(self, inputs):
+        """
+        Run detect() over a batch of inputs (list, pandas Series, NumPy array or any iterable).
+        Returns BatchVerdicts(malicious, patterns, scores) aligned with the input order.
+        Each distinct string is only scored once, so repeated payloads and common
+        usernames cost a dict lookup. With NumPy installed the results are arrays
+        (bool, object, int); otherwise they are lists.
+        """
+        if hasattr(inputs, "tolist"):
+            # pandas Series / NumPy arrays: iterate plain Python objects, not boxed scalars
+            inputs = inputs.tolist()
+        elif not isinstance(inputs, list):
+            inputs = list(inputs)
+
+        seen = self._detect_distinct({value for value in inputs if isinstance(value, str)})
+        malicious = []
+        patterns = []
+        scores = []
+        for value in inputs:
+            verdict = seen[value] if isinstance(value, str) else (False, None, 0)
+            malicious.append(verdict[0])
+            patterns.append(verdict[1])
+            scores.append(verdict[2])
+
+        try:
+            import numpy as np
+        except ImportError:
+            return BatchVerdicts(malicious, patterns, scores)
+
+        pattern_array = np.empty(len(patterns), dtype=object)
+        pattern_array[:] = patterns
+        return BatchVerdicts(
+            np.array(malicious, dtype=bool),
+            pattern_array,
+            np.array(scores, dtype=np.int64),
+        )
+
+
+DEFAULT_RULESET = Ruleset.default()
+
+def export_rule_pack(name="sqlock-default", version="builtin"):
+    """Return the built-in detector rules as a rule pack document, e.g. to start a pack file from."""
+    rule_table = lambda rules: [
+        {'pattern': p, 'weight': w, 'description': d, 'anchors': list(a)} for p, w, d, a in rules
+    ]
+    return {
+        'format': 1,
+        'name': name,
+        'version': version,
+        'detector': {
+            'block_threshold': BLOCK_THRESHOLD,
+            'regex_rules': rule_table(SQLI_REGEX_RULES),
+            'raw_input_regex_rules': rule_table(RAW_INPUT_REGEX_RULES),
+            'dictionary': dict(BASIC_SQLI_DICTIONARY),
+        },
+    }
+
+# Set by use_rule_pack(); keeps DEFAULT_RULESET in sync with a rule pack file
+_rule_pack_watcher = None
+
+def _swap_default_ruleset(ruleset, pack):
+    global DEFAULT_RULESET
+    # One reference assignment: detections already running keep the ruleset they started with
+    DEFAULT_RULESET = ruleset
+
+def use_rule_pack(path, poll_interval=1.0, reload_signal=True, **options):
+    """
+    Load the detection rules from a rule pack file and hot-reload them when it changes.
+    The file's mtime is checked at most every poll_interval seconds; with reload_signal
+    (main thread only) SIGHUP forces a reload too. A pack that fails to load is logged
+    and the current rules stay active. Returns the RulePackWatcher.
+    """
+    global _rule_pack_watcher
+    watcher = RulePackWatcher(
+        path,
+        lambda pack: Ruleset.from_rule_pack(pack, **options),
+        poll_interval=poll_interval,
+        on_reload=_swap_default_ruleset,
+        on_error=lambda e: log_suspicious_activity(f"Rule pack reload failed, keeping current rules: {e}"),
+    )
+    _swap_default_ruleset(watcher.current(), watcher.pack)
+    if reload_signal and threading.current_thread() is threading.main_thread():
+        try:
+            watcher.install_signal_handler()
+        except RulePackError:
+            pass  # No SIGHUP on this platform; mtime polling still applies
+    _rule_pack_watcher = watcher
+    return watcher
+
+def use_builtin_rules():
+    """Stop following a rule pack and go back to the built-in rules."""
+    global _rule_pack_watcher, DEFAULT_RULESET
+    _rule_pack_watcher = None
+    DEFAULT_RULESET = Ruleset.default()
+
+def _current_ruleset():
+    watcher = _rule_pack_watcher
+    if watcher is not None:
+        watcher.current()  # Swaps DEFAULT_RULESET when the pack file changed
+    return DEFAULT_RULESET
+
+class VerdictCache:
+    """
+    Size-bounded LRU cache of detection verdicts, keyed on the normalized input.
+    Entries can optionally expire after `ttl` seconds. The whole cache is dropped
+    as soon as it is used with a ruleset whose version differs from the one that
+    produced the cached verdicts.
+    """
+
+    def __init__(self, capacity=4096, ttl=None):
+        if capacity < 1:
+            raise ValueError("VerdictCache capacity must be at least 1")
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._ruleset_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def detect(self, input_string, ruleset):
+        """Return ruleset.detect(input_string), served from the cache when possible."""
+        if not input_string or not isinstance(input_string, str):
+            return ruleset.detect(input_string)
+
+        # normalize_quotes only rewrites non-ASCII quotes, so ASCII input is already its own key
+        key = input_string if input_string.isascii() else normalize_quotes(input_string)
+        now = time.monotonic() if self.ttl is not None else None
+
+        with self._lock:
+            if self._ruleset_version != ruleset.version:
+                if self._ruleset_version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._ruleset_version = ruleset.version
+            entry = self._entries.get(key)
+            if entry is not None and (now is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        verdict = ruleset.detect(key)
+
+        with self._lock:
+            # Skip the store if the ruleset changed while we were scoring
+            if self._ruleset_version == ruleset.version:
+                self._entries[key] = (verdict, now + self.ttl if now is not None else None)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return verdict
+
+    def clear(self):
+        """Drop every cached verdict."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters as a dictionary."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+# Opt-in verdict cache used by detect_sql_injection_patterns (see enable_verdict_cache)
+_verdict_cache = None
+
+def enable_verdict_cache(capacity=4096, ttl=None):
+    """Put a VerdictCache in front of detect_sql_injection_patterns and return it."""
+    global _verdict_cache
+    _verdict_cache = VerdictCache(capacity, ttl)
+    return _verdict_cache
+
+def disable_verdict_cache():
+    """Remove the verdict cache; every call goes back to running the rules."""
+    global _verdict_cache
+    _verdict_cache = None
+
 def detect_sql_injection_patterns(input_string):
     """
     Comprehensive SQL injection pattern detection.
     Returns (is_malicious, detected_pattern, score)
     """
-    if not input_string or not isinstance(input_string, str):
-        return False, None, 0
-    
-    input_string = normalize_quotes(input_string)
-    score = 0
-    detected_patterns = []
-    input_lower = input_string.lower()
-    
-    # Quick check for obvious SQL injection patterns first
-    if "' or '" in input_lower or "' or 1" in input_lower or "' and '" in input_lower:
-        score += 100
-        detected_patterns.append("SQL injection pattern detected")
-
-    # Check if the input appears to be a complete SQL statement (starts with a command)
-    # This helps distinguish between a full query analysis (where SELECT is expected)
-    # and a raw input analysis (where SELECT is suspicious).
-    is_full_statement = re.match(r"^\s*(select|insert|update|delete|create|alter|drop)\b", input_lower)
-
-    # 1. Context-Aware Checks (Improvement 3) & Weighted Scoring (Improvement 1)
-    # Single quote is only suspicious if followed by SQL keywords or operators
-    # Regex explanation: ' followed by optional space, then OR, AND, ;, --, #, or /*
-    # We only apply this if it's NOT a full statement, because valid SQL often contains ' followed by OR/AND.
-    if not is_full_statement:
-        # High score for ' OR / ' AND which is a very common injection starter
-        # Match patterns like: ' OR, ' AND, 'OR, 'AND (with or without space)
-        if re.search(r"'\s*(or|and)\s", input_lower) or re.search(r"'\s*(or|and)\b", input_lower):
-            score += 90
-            detected_patterns.append("Suspicious single quote with logic operator")
-        elif re.search(r"'\s*(;|--|#|/\*)", input_lower):
-            score += 50
-            detected_patterns.append("Suspicious single quote usage")
-        elif "'" in input_string:
-            # Low score for just a quote (e.g. O'Reilly)
-            score += 5
-    
-    # 2. Regex Patterns (Improvement 2)
-    regex_patterns = [
-        (r"\b(union\s+select|union\s+all\s+select)\b", 100, "UNION-based injection"),
-        # (r"\b(select\s+.*\s+from)\b", 80, "Direct data extraction"), # Moved below
-        # (r"\b(insert\s+into|update\s+.*set|delete\s+from)\b", 90, "Data modification attempt"), # Moved below
-        (r"\b(drop\s+table|alter\s+table|truncate\s+table)\b", 100, "Destructive command"),
-        (r"\b(exec|execute)\s*\(", 90, "Code execution"),
-        (r"(\b(or|and)\b\s*['\"]?\w+['\"]?\s*=\s*['\"]?\w+['\"]?)", 80, "Tautology (OR 1=1)"), # Matches "OR 1=1", "OR 'a'='a'", "OR '1'='1'"
-        (r"(--|#|\/\*)", 30, "SQL Comment"), # Comments are suspicious but maybe not instant block alone
-        (r";", 30, "Statement stacking"),
-    ]
+    ruleset = _current_ruleset()
+    cache = _verdict_cache
+    if cache is not None:
+        return cache.detect(input_string, ruleset)
+    return ruleset.detect(input_string)
 
-    # Only flag standard SQL commands if the input doesn't start with them.
-    # If it starts with them, it's likely a full query being analyzed, so the command itself is not the injection.
-    if not is_full_statement:
-        regex_patterns.append((r"\b(select\s+.*\s+from)\b", 80, "Direct data extraction"))
-        regex_patterns.append((r"\b(insert\s+into|update\s+.*set|delete\s+from)\b", 90, "Data modification attempt"))
-
-    for pattern, weight, desc in regex_patterns:
-        if re.search(pattern, input_lower):
-            score += weight
-            detected_patterns.append(desc)
-
-    # 3. The "Basic SQLi Dictionary" (Improvement 5)
-    # The user wants the existing dictionary to trigger blocks. 
-    # I will include the specific keywords from the original list that aren't covered by regex or are specific signatures.
-    # If found, we ensure score is at least 100 (Blocked).
-    
-    basic_sqli_dictionary = {
-        "1=1": "Tautology injection",
-        "1'='1": "Quote tautology",
-        "'1'='1": "Quote tautology variant",
-        "admin'--": "Admin bypass attempt",
-        "' or '1'='1": "Classic OR injection",
-        " or '1'='1": "Classic OR injection variant",
-        "or '1'='1": "Classic OR injection variant 2",
-        "' or 1=1": "Numeric OR injection",
-        "' or 1=1--": "Numeric OR injection with comment",
-        "'; drop table": "Table drop attempt",
-        "'; delete from": "Delete injection",
-        "xp_": "Extended procedure",
-        "sp_": "System procedure",
-        "%27": "URL encoded single quote",
-        "%22": "URL encoded double quote",
-        "%3B": "URL encoded semicolon",
-        "&#39;": "HTML encoded single quote",
-        "&#34;": "HTML encoded double quote",
-        # Re-adding the keywords from original list as "Basic Dictionary" checks
-        " union ": "UNION injection",
-        " select ": "SELECT injection",
-        " insert ": "INSERT injection",
-        " delete ": "DELETE injection",
-        " update ": "UPDATE injection",
-        " drop ": "DROP injection",
-        " create ": "CREATE injection",
-        " alter ": "ALTER injection",
-        " truncate ": "TRUNCATE injection",
-        " exec ": "EXEC injection",
-        " execute ": "EXECUTE injection",
-    }
+def detect_sql_injection_fast(input_string):
+    """
+    Fast-verdict variant of detect_sql_injection_patterns for the login hot path.
+    is_malicious is always the same; the pattern and score may be partial.
+    """
+    return _current_ruleset().detect_fast(input_string)
 
-    for pattern, description in basic_sqli_dictionary.items():
-        if pattern.lower() in input_lower:
-            score += 100 # Instant block threshold
-            detected_patterns.append(f"{description} (Dictionary Match)")
+def explain_sql_injection(input_string):
+    """Full rule breakdown (every rule that fired and its weight) for the dashboard."""
+    return _current_ruleset().explain(input_string)
 
-    # 4. Multiple suspicious characters (from original code)
-    # Only apply to raw input, as valid SQL statements naturally contain many quotes/semicolons
-    if not is_full_statement and len([c for c in input_string if c in "';\"--"]) > 3: # Increased threshold slightly
-        score += 20
-        detected_patterns.append("Multiple suspicious characters")
+def detect_fields(fields, profiles=None):
+    """
+    Scan all fields of a request together, e.g. {'username': ..., 'password': ...}.
+    Returns FieldVerdicts(malicious, pattern, score, field, fields) with per-field verdicts in `fields`.
+    """
+    return _current_ruleset().detect_fields(fields, profiles)
 
-    # Cap score at 100 for display consistency, or let it go higher? 
-    # Frontend expects 0-100 usually, but we can clamp it.
-    final_score = min(100, score)
-    
-    is_malicious = final_score >= 80 # Threshold for blocking
-    
-    primary_pattern = detected_patterns[0] if detected_patterns else None
-    
-    return is_malicious, primary_pattern, final_score
+def detect_many(inputs):
+    """
+    Batch version of detect_sql_injection_patterns for bulk re-scoring and multi-field checks.
+    Returns BatchVerdicts(malicious, patterns, scores) aligned with the inputs.
+    """
+    return _current_ruleset().detect_many(inputs)
 
 def reset_failed_attempts(username):
     """Reset failed login attempts for a user after successful login. Will NOT reset SQL injection lockouts."""
@@ -370,28 +1351,101 @@ def reset_failed_attempts(username):
         return
     
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
+        with _db_connection() as connection:
+            cursor = connection.cursor()
         
-        # Only reset if it's not an SQL injection lockout
-        cursor.execute("""
-            UPDATE user_security 
-            SET failed_attempts = 0, lockout_until = NULL 
-            WHERE username = %s AND (lockout_reason IS NULL OR lockout_reason NOT LIKE '%SQL injection%')
-        """, (username,))
+            get_storage().reset_failed_attempts(cursor, username)
         
-        cursor.close()
-        connection.close()
+            cursor.close()
+
+        if _lockout_cache is not None:
+            _lockout_cache.reset(username)
         
-    except mysql.connector.Error as error:
+    except db.Error as error:
         log_suspicious_activity(f"Database error resetting failed attempts: {error}")
 
-def authenticate_user(username, password):
+# --- Login rate limit ---
+# Opt-in (enable_login_rate_limit): sliding-window limits per username and per client
+# address, checked in memory before authenticate_user reads or writes user_security.
+# Rejected attempts are still logged as security events. Only transitions touch
+# user_security: when a username starts being limited, its row (created if needed)
+# gets a short "Rate limit exceeded" lockout; existing longer lockouts are kept.
+
+RATE_LIMIT_REASON = "Rate limit exceeded"
+
+_login_rate_limits = None
+
+def enable_login_rate_limit(per_username=10, per_address=50, window=60.0, shards=16, max_keys=100000):
+    """
+    Allow at most `per_username` login attempts per username and `per_address` per
+    client address (None disables that key) in any `window` seconds. Returns the
+    (username, address) RateLimiter pair.
+    """
+    global _login_rate_limits
+    _login_rate_limits = (
+        RateLimiter(per_username, window, shards, max_keys) if per_username else None,
+        RateLimiter(per_address, window, shards, max_keys) if per_address else None,
+    )
+    return _login_rate_limits
+
+def disable_login_rate_limit():
+    """Remove the login rate limits."""
+    global _login_rate_limits
+    _login_rate_limits = None
+
+def login_rate_limit_stats():
+    """Counters of the username and address limiters (None while disabled)."""
+    limits = _login_rate_limits
+    if limits is None:
+        return None
+    by_username, by_address = limits
+    return {
+        'username': by_username.stats() if by_username is not None else None,
+        'address': by_address.stats() if by_address is not None else None,
+    }
+
+def _sync_rate_limit_lockout(username, window):
+    lockout_until = datetime.now() + timedelta(seconds=window)
+    try:
+        with _db_connection() as connection:
+            cursor = connection.cursor()
+            get_storage().rate_limit_lockout(cursor, username, lockout_until, RATE_LIMIT_REASON)
+            cursor.close()
+        if _lockout_cache is not None:
+            _lockout_cache.invalidate(username)  # The row may have kept a longer lockout
+    except db.Error as error:
+        log_suspicious_activity(f"Database error recording rate limit lockout: {error}")
+
+def _login_rate_limited(username, client_address):
+    """Count this attempt; True if the username or the address is over its limit."""
+    by_username, by_address = _login_rate_limits
+    if by_address is not None and client_address:
+        allowed, changed = by_address.hit(client_address)
+        if not allowed:
+            if changed:
+                log_suspicious_activity(f"Login rate limit exceeded for address {client_address}")
+            return True
+    if by_username is not None:
+        allowed, changed = by_username.hit(username)
+        if not allowed:
+            if changed:
+                log_suspicious_activity(f"Login rate limit exceeded for username: {username}")
+                _sync_rate_limit_lockout(username, by_username.window)
+            return True
+    return False
+
+# Field profiles authenticate_user scans with. Empty: both fields get the strict
+# default scan, so a password such as x';-- triggers the SQL injection lockout.
+# {'password': "password"} opts in to accepting quotes, '#' and '--' in passwords.
+AUTH_FIELD_PROFILES = {}
+
+def authenticate_user(username, password, client_address=None):
     """
     Secure user authentication with comprehensive security features:
     1. Input validation (Vinay's feature)
     2. SQL injection detection with immediate lockout (Faizan's feature)  
     3. Progressive account lockout after 3 failed attempts (Dani's feature)
+    `client_address` is only used by the optional login rate limit.
     """
     # Feature 1: Input Validation (Vinay)
     if not username or not password:
@@ -403,72 +1457,521 @@ def authenticate_user(username, password):
         return None
     
     # Feature 2: SQL Injection Detection (Faizan)
-    username_malicious, username_pattern, username_score = detect_sql_injection_patterns(username)
-    password_malicious, password_pattern, password_score = detect_sql_injection_patterns(password)
+    # Both fields are scanned in one call, with AUTH_FIELD_PROFILES
+    verdicts = detect_fields({'username': username, 'password': password}, AUTH_FIELD_PROFILES)
+    username_malicious, username_pattern, username_score = verdicts.fields['username']
     
-    # Log the security check to the database
-    log_security_event(
-        "block" if username_malicious else "allow",
-        username_score,
-        f"Auth Username: {username}"
-    )
+    decision = "block" if username_malicious else "allow"
+    event_text = f"Auth Username: {username}"
 
-    if username_malicious or password_malicious:
-        detected_pattern = username_pattern if username_malicious else password_pattern
+    if verdicts.malicious:
+        # Log the security check to the database
+        log_security_event(decision, username_score, event_text)
+        detected_pattern = verdicts.pattern
         apply_immediate_sql_lockout(username, detected_pattern)
         log_suspicious_activity(f"CRITICAL: SQL injection detected and immediate lockout applied: {username} - {detected_pattern}")
         return None
     
-    # Feature 3: Check Account Lockout (Dani)
-    if is_account_locked(username):
+    limits = _login_rate_limits
+    if limits is not None and _login_rate_limited(username, client_address):
+        log_security_event(decision, username_score, event_text)
+        return None
+
+    cache = _lockout_cache
+    if cache is not None and cache.is_locked(username):
+        # Known to be locked: reject from memory without reading the users table
+        log_security_event(decision, username_score, event_text)
         log_suspicious_activity(f"Login attempt on locked account: {username}")
         return None
-    
+
     # Hash the provided password for comparison
     password_hash = hashlib.sha256(password.encode()).hexdigest()
     
-    # Secure parameterized query to prevent SQL injection
-    query = """
-    SELECT id, username, email, password_hash 
-    FROM users 
-    WHERE username = %s AND password_hash = %s
-    """
-    
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        cursor.execute(query, (username, password_hash))
-        result = cursor.fetchone()
-        
-        if result:
-            # Successful login - reset failed attempts (but not SQL injection lockouts)
-            reset_failed_attempts(username)
+        # The event log (without a sink), lockout check, credential check and counter update
+        # share one connection
+        sink = _event_sink
+        if sink is not None:
+            # Queued before checking out a connection: a submit waiting for room must not
+            # hold one of the connections the sink's flusher needs to make that room
+            sink.submit(decision, username_score, event_text, timeout=_call_time_left())
+        with _db_connection() as connection:
+            cursor = connection.cursor()
+            if sink is None:
+                _insert_security_event(cursor, decision, username_score, event_text)
+            user = _check_credentials(cursor, username, password_hash)
+            connection.commit()
             cursor.close()
-            connection.close()
+        if user is not None and limits is not None and limits[0] is not None:
+            limits[0].reset(username)
+        return user
             
+    except db.Error as error:
+        log_suspicious_activity(f"Database connection error: {error}")
+        return None
+
+# --- Consolidated login ---
+# authenticate_user reads the lockout state and checks the password in one statement,
+# then writes the new counter state in at most one more. The write only applies if the
+# counter is still what was read; otherwise the login is re-read and re-decided, so
+# concurrent failures for one user can neither be lost nor double-counted. If the
+# counter changes under all LOGIN_RETRIES re-reads, the failure is added on top of
+# whatever it is then, with the lockout computed by the database.
+
+# The lockout ends first_failure and add_failure apply when the counter they
+# increment reaches 5+, 4 or 3 (the storage backend picks one from the stored count)
+def _progressive_lockout_ends(now):
+    return tuple(now + _progressive_lockout(failures) for failures in (5, 4, 3))
+
+# Re-reads allowed when the counter changed underneath a failed login
+LOGIN_RETRIES = 3
+
+def _check_credentials(cursor, username, password_hash):
+    """
+    Lockout check, credential check and counter update for a login that passed
+    detection. Returns the user dict, or None when locked or the password is wrong.
+    """
+    cache = _lockout_cache
+    storage = get_storage()
+    for _ in range(LOGIN_RETRIES):
+        version = cache.version(username) if cache is not None else None
+        # Secure parameterized query to prevent SQL injection
+        state = storage.login_state(cursor, username, password_hash)
+        user_id, user_name, email, security_user, failed_attempts, lockout_until, lockout_reason = state
+        if cache is not None:
+            cache.store(username, (failed_attempts, lockout_until, lockout_reason) if security_user else None, version)
+
+        # Feature 3: Check Account Lockout (Dani)
+        if lockout_until and datetime.now() < lockout_until:
+            log_suspicious_activity(f"Login attempt on locked account: {username}")
+            return None
+
+        if user_id is not None:
+            # Successful login - reset failed attempts (but not SQL injection lockouts)
+            if failed_attempts or lockout_until is not None:
+                storage.reset_failed_attempts(cursor, username)
+                if cache is not None:
+                    cache.reset(username)
             # Return user information as dictionary
             return {
-                'id': result[0],
-                'username': result[1], 
-                'email': result[2]
+                'id': user_id,
+                'username': user_name, 
+                'email': email
             }
+
+        # Failed login - record attempt and apply progressive lockout
+        if security_user is None:
+            now = datetime.now()
+            storage.first_failure(cursor, username, now, _progressive_lockout_ends(now))
+            if cache is not None:
+                cache.invalidate(username)  # A concurrent first failure may have counted too
         else:
-            # Failed login - record attempt and apply progressive lockout
-            record_failed_login(username)
-            cursor.close()
-            connection.close()
-            return None
-            
-    except mysql.connector.Error as error:
-        log_suspicious_activity(f"Database connection error: {error}")
+            failed_attempts = failed_attempts or 0
+            lockout_duration = _progressive_lockout(failed_attempts + 1)
+            lockout_until = datetime.now() + lockout_duration if lockout_duration else None
+            if not storage.count_failure(cursor, username, failed_attempts, datetime.now(), lockout_until):
+                continue  # Another login changed the counter first; decide again on fresh state
+            if cache is not None:
+                cache.update(username, failed_attempts + 1, lockout_until)
+            if lockout_duration:
+                log_suspicious_activity(f"Account {username} locked for {lockout_duration} after {failed_attempts + 1} failed attempts")
+        log_suspicious_activity(f"Failed login attempt for username: {username}")
         return None
 
+    # The wrong password was seen on every attempt; the failure must still count
+    now = datetime.now()
+    storage.add_failure(cursor, username, now, _progressive_lockout_ends(now))
+    if cache is not None:
+        cache.invalidate(username)
+    log_suspicious_activity(f"Failed login attempt for username: {username}")
+    return None
+
+# --- Asyncio API ---
+# Awaitable counterparts of the login and lockout helpers for async front ends. They
+# run the same blocking code (detection included) on a dedicated thread pool sized to
+# the connection pool, so every thread can hold a connection and the event loop is
+# never blocked. Each call has a timeout (TimeoutError), which also bounds the wait
+# for room in a full "block" event sink on the worker thread. Cancelling a call that
+# has not started yet drops it; one already running finishes in the background and
+# its result is discarded.
+
+# Seconds an async call may take, including time queued behind other calls
+ASYNC_CALL_TIMEOUT = 10.0
+
+_async_executor = None
+_async_executor_lock = threading.Lock()
+
+def _get_async_executor():
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _async_executor = ThreadPoolExecutor(DB_POOL_SETTINGS['size'], thread_name_prefix="sqlock-db")
+        return _async_executor
+
+def shutdown_async_executor(wait=True):
+    """Stop the async API's worker threads (a new pool is started on the next call)."""
+    global _async_executor
+    with _async_executor_lock:
+        executor, _async_executor = _async_executor, None
+    if executor is not None:
+        if sys.version_info >= (3, 9):
+            executor.shutdown(wait=wait, cancel_futures=True)
+        else:
+            executor.shutdown(wait=wait)  # Queued calls still run; their results are discarded
+
+# Deadline of the async call running on a worker thread, for waits inside the helpers
+_async_call = threading.local()
+
+def _call_time_left():
+    """Seconds left for the async call on this thread (None outside one)."""
+    deadline = getattr(_async_call, 'deadline', None)
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def _call_with_deadline(deadline, function, args):
+    _async_call.deadline = deadline
+    try:
+        return function(*args)
+    finally:
+        _async_call.deadline = None
+
+async def _run_blocking(function, args, timeout):
+    import asyncio
+    timeout = ASYNC_CALL_TIMEOUT if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_get_async_executor(), _call_with_deadline, time.monotonic() + timeout,
+                                  function, args)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        # Before Python 3.11 asyncio has its own TimeoutError class
+        raise TimeoutError(f"Call did not finish within {timeout} seconds") from None
+
+async def authenticate_user_async(username, password, timeout=None, client_address=None):
+    """Awaitable authenticate_user; same checks, same return value."""
+    return await _run_blocking(authenticate_user, (username, password, client_address), timeout)
+
+async def is_account_locked_async(username, timeout=None):
+    """Awaitable is_account_locked."""
+    return await _run_blocking(is_account_locked, (username,), timeout)
+
+async def get_lockout_info_async(username, timeout=None):
+    """Awaitable get_lockout_info."""
+    return await _run_blocking(get_lockout_info, (username,), timeout)
+
+async def record_failed_login_async(username, timeout=None):
+    """Awaitable record_failed_login."""
+    return await _run_blocking(record_failed_login, (username,), timeout)
+
+async def apply_immediate_sql_lockout_async(username, detected_pattern, timeout=None):
+    """Awaitable apply_immediate_sql_lockout."""
+    return await _run_blocking(apply_immediate_sql_lockout, (username, detected_pattern), timeout)
+
+def handle_mitigation_request(request):
+    """
+    Analyze one request and return the JSON-ready response. This is the logic behind
+    the CLI and the daemon: `request` holds query, and optionally username,
+    apply_lockout and explain.
+    """
+    query = request.get("query")
+    if not isinstance(query, str):
+        return {"success": False, "error": "Query text is required."}
+    username = request.get("username")
+    explain = bool(request.get("explain"))
+
+    normalized_query = normalize_quotes(query)
+    if explain:
+        explanation = explain_sql_injection(normalized_query)
+        malicious, pattern, score = explanation['malicious'], explanation['pattern'], explanation['score']
+    else:
+        malicious, pattern, score = detect_sql_injection_patterns(normalized_query)
+    lockout_applied = False
+
+    if malicious and request.get("apply_lockout") and username:
+        apply_immediate_sql_lockout(username, pattern or "Suspicious pattern")
+        lockout_applied = True
+
+    response = {
+        "success": True,
+        "malicious": malicious,
+        "pattern": pattern,
+        "score": score,
+        "lockout_applied": lockout_applied,
+    }
+    if explain:
+        response["matches"] = explanation['matches']
+        response["raw_score"] = explanation['raw_score']
+    return response
+
+def _answer_request(request):
+    """handle_mitigation_request for the daemon and batch modes: never raises, echoes "id"."""
+    try:
+        response = handle_mitigation_request(request)
+    except Exception as error:
+        log_suspicious_activity(f"Mitigation request failed: {error}")
+        response = {"success": False, "error": "Internal error"}
+    if "id" in request:
+        response["id"] = request["id"]
+    return response
+
+# --- Daemon mode ---
+# A long-running process that answers JSON-lines requests over a Unix socket or
+# localhost TCP, so callers skip interpreter start-up and keep the caches warm.
+# Each line sent is one request object (the handle_mitigation_request fields, plus
+# an optional "id" echoed back); each line received is its response.
+# {"op": "health"} returns the daemon's status instead.
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+class _MitigationRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.track_connection(self.connection)
+        try:
+            while True:
+                line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+                if not line:
+                    break
+                if len(line) > MAX_REQUEST_BYTES:
+                    self._send({"success": False, "error": f"Request exceeds {MAX_REQUEST_BYTES} bytes"})
+                    break
+                if line.strip():
+                    self._send(self.server.respond(line))
+        except OSError:
+            pass  # Client went away
+        finally:
+            self.server.untrack_connection(self.connection)
+
+    def _send(self, response):
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+
+class _MitigationServerMixin:
+    """Request dispatch, health reporting and graceful shutdown shared by the socket servers."""
+
+    # Handler threads are joined on server_close(), so in-flight requests finish
+    daemon_threads = False
+    block_on_close = True
+    allow_reuse_address = True
+
+    def init_state(self):
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self._connections = set()
+        self._state_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def track_connection(self, connection):
+        with self._state_lock:
+            self._connections.add(connection)
+        if self._stopping.is_set():
+            # Accepted just as shutdown began: let the handler see EOF right away
+            self._close_reading(connection)
+
+    def untrack_connection(self, connection):
+        with self._state_lock:
+            self._connections.discard(connection)
+
+    @staticmethod
+    def _close_reading(connection):
+        try:
+            connection.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass
+
+    def respond(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as error:
+            with self._state_lock:
+                self.errors += 1
+            return {"success": False, "error": f"Invalid request: {error}"}
+
+        if request.get("op", "analyze") == "health":
+            return self.health()
+        response = _answer_request(request)
+        with self._state_lock:
+            self.requests += 1
+            if not response.get("success"):
+                self.errors += 1
+        return response
+
+    def health(self):
+        ruleset = DEFAULT_RULESET
+        cache = _verdict_cache
+        with self._state_lock:
+            requests, errors, connections = self.requests, self.errors, len(self._connections)
+        return {
+            "success": True,
+            "status": "stopping" if self._stopping.is_set() else "ok",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+            "requests": requests,
+            "errors": errors,
+            "active_connections": connections,
+            "ruleset_version": ruleset.version,
+            "rule_pack": ruleset.rule_pack,
+            "verdict_cache": cache.stats() if cache is not None else None,
+            "prefilter": ruleset.prefilter.stats() if ruleset.prefilter is not None else None,
+            "db_pool": db_pool_stats(),
+            "event_sink": event_sink_stats(),
+        }
+
+    def begin_shutdown(self):
+        """
+        Stop accepting connections and let every handler finish the request it is on.
+        Safe to call from a signal handler; serve_forever() returns shortly after.
+        """
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        # shutdown() waits for serve_forever() to exit, so it cannot run on that thread
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        with self._state_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            self._close_reading(connection)
+
+class MitigationTCPServer(_MitigationServerMixin, socketserver.ThreadingTCPServer):
+    def __init__(self, address):
+        super().__init__(address, _MitigationRequestHandler)
+        self.init_state()
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class MitigationUnixServer(_MitigationServerMixin, socketserver.ThreadingUnixStreamServer):
+        def __init__(self, path):
+            try:
+                mode = os.lstat(path).st_mode
+            except FileNotFoundError:
+                pass
+            else:
+                if not stat.S_ISSOCK(mode):
+                    raise FileExistsError(f"{path} exists and is not a socket; refusing to replace it")
+                os.unlink(path)  # Stale socket from a previous run
+            # Created owner-only: no window where other local users could connect
+            old_umask = os.umask(0o177)
+            try:
+                super().__init__(path, _MitigationRequestHandler)
+            finally:
+                os.umask(old_umask)
+            self.init_state()
+
+        def server_close(self):
+            super().server_close()
+            try:
+                os.unlink(self.server_address)
+            except OSError:
+                pass
+
+def make_mitigation_server(socket_path=None, port=None, host="127.0.0.1"):
+    """Create (but do not start) the daemon on a Unix socket path or a localhost TCP port."""
+    if socket_path:
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise OSError("Unix sockets are not available on this platform; use a TCP port")
+        return MitigationUnixServer(socket_path)
+    if port is None:
+        raise ValueError("Either socket_path or port is required")
+    return MitigationTCPServer((host, port))
+
+def serve_mitigation_daemon(socket_path=None, port=None, host="127.0.0.1", cache_size=4096):
+    """
+    Run the daemon until SIGTERM or SIGINT, then finish in-flight requests and exit.
+    The verdict cache is enabled for the life of the process.
+    """
+    if cache_size:
+        enable_verdict_cache(cache_size)
+    server = make_mitigation_server(socket_path, port, host)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: server.begin_shutdown())
+    address = server.server_address
+    print(json.dumps({"success": True, "status": "listening",
+                      "address": address if isinstance(address, str) else f"{address[0]}:{address[1]}"}),
+          flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+# --- Batch mode ---
+# Streams JSON-lines records from stdin or a file and writes one response line per
+# non-blank input line, in input order. A record is a request object like the daemon's
+# (or a bare JSON string, short for {"query": ...}); the CLI's --username,
+# --apply-lockout and --explain flags fill in fields a record leaves out.
+
+BATCH_CHUNK_LINES = 256
+
+def _answer_batch_line(lineno, line, defaults):
+    try:
+        record = json.loads(line)
+    except ValueError as error:
+        return {"success": False, "error": f"Invalid request: {error}", "line": lineno}
+    if isinstance(record, str):
+        record = {"query": record}
+    elif not isinstance(record, dict):
+        return {"success": False, "error": "Invalid request: request must be a JSON object or string", "line": lineno}
+    return _answer_request(dict(defaults, **record))
+
+def _answer_batch_chunk(chunk):
+    """Score one chunk of (lineno, line) pairs; returns the response lines as one string."""
+    lines, defaults = chunk
+    answers = "".join(json.dumps(_answer_batch_line(lineno, line, defaults)) + "\n" for lineno, line in lines)
+    flush_activity_log()  # Pool workers exit without running atexit handlers
+    return answers
+
+def _batch_chunks(stream, defaults, size=BATCH_CHUNK_LINES):
+    chunk = []
+    for lineno, line in enumerate(stream, 1):
+        if line.strip():
+            chunk.append((lineno, line))
+            if len(chunk) == size:
+                yield chunk, defaults
+                chunk = []
+    if chunk:
+        yield chunk, defaults
+
+def _init_batch_worker(rules, cache_size):
+    # Forked workers inherit the parent's rules and cache; spawned ones start from scratch
+    if rules and DEFAULT_RULESET.rule_pack is None:
+        use_rule_pack(rules, reload_signal=False)
+    if cache_size and _verdict_cache is None:
+        enable_verdict_cache(cache_size)
+
+def run_mitigation_batch(stream, out, workers=1, defaults=None, rules=None, cache_size=0):
+    """
+    Answer every JSON-lines record read from `stream`, writing the responses to `out`
+    in input order. With workers > 1, chunks of BATCH_CHUNK_LINES lines are scored in a
+    process pool with at most 2 * workers chunks in flight, so memory stays bounded
+    however long the input is. Returns the number of records answered.
+    """
+    chunks = _batch_chunks(stream, dict(defaults or {}))
+    answered = 0
+    if workers <= 1:
+        for chunk in chunks:
+            out.write(_answer_batch_chunk(chunk))
+            answered += len(chunk[0])
+        return answered
+
+    from concurrent.futures import ProcessPoolExecutor
+    pending = deque()
+    with ProcessPoolExecutor(workers, initializer=_init_batch_worker, initargs=(rules, cache_size)) as pool:
+        for chunk in chunks:
+            pending.append(pool.submit(_answer_batch_chunk, chunk))
+            answered += len(chunk[0])
+            if len(pending) >= 2 * workers:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+    return answered
+
 def _run_cli_interface() -> None:
     """Allows calling the mitigation helpers from the command line.
 
     This is primarily used by the Next.js frontend through a serverless route
     that shells out to Python and expects JSON back. Keeping the logic here
     avoids duplicating the SQLi detection heuristics in TypeScript.
+    With --serve the same logic runs as a long-lived daemon instead, and
+    --stdin-jsonl / --input stream a whole file of requests through it.
     """
 
     parser = argparse.ArgumentParser(description="SQLock mitigation CLI")
@@ -476,8 +1979,8 @@ def _run_cli_interface() -> None:
         "--query",
         dest="query",
         type=str,
-        required=True,
-        help="User-provided string / SQL to analyze for SQLi patterns",
+        default=None,
+        help="User-provided string / SQL to analyze for SQLi patterns (required unless --serve or a batch input is given)",
     )
     parser.add_argument(
         "--username",
@@ -492,26 +1995,108 @@ def _run_cli_interface() -> None:
         action="store_true",
         help="Apply the immediate SQL lockout when a malicious pattern is detected",
     )
+    parser.add_argument(
+        "--rules",
+        dest="rules",
+        type=str,
+        default=os.environ.get(RULE_PACK_ENV),
+        help=f"Rule pack file (JSON or TOML) to use instead of the built-in rules (default: ${RULE_PACK_ENV})",
+    )
+    parser.add_argument(
+        "--explain",
+        dest="explain",
+        action="store_true",
+        help="Include the full rule breakdown (every matched rule and its weight) in the output",
+    )
+    parser.add_argument(
+        "--serve",
+        dest="serve",
+        action="store_true",
+        help="Run as a daemon answering JSON-lines requests on --socket or --port",
+    )
+    parser.add_argument(
+        "--socket",
+        dest="socket_path",
+        type=str,
+        default=None,
+        help="Unix socket path for --serve",
+    )
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        default=None,
+        help="Localhost TCP port for --serve",
+    )
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size",
+        type=int,
+        default=4096,
+        help="Verdict cache entries kept by --serve and the batch modes (0 disables the cache)",
+    )
+    parser.add_argument(
+        "--stdin-jsonl",
+        dest="stdin_jsonl",
+        action="store_true",
+        help="Read JSON-lines requests from stdin and write one JSON result per line",
+    )
+    parser.add_argument(
+        "--input",
+        dest="input_path",
+        type=str,
+        default=None,
+        help="Read JSON-lines requests from this file and write one JSON result per line",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help="Worker processes for the batch modes (output order always follows the input)",
+    )
 
     args = parser.parse_args()
+    if args.serve and not (args.socket_path or args.port is not None):
+        parser.error("--serve needs --socket PATH or --port N")
+    batch = args.stdin_jsonl or args.input_path is not None
+    if sum([args.serve, args.stdin_jsonl, args.input_path is not None, args.query is not None]) > 1:
+        parser.error("--query, --serve, --stdin-jsonl and --input are mutually exclusive")
+    if not (args.serve or batch) and args.query is None:
+        parser.error("--query is required")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
 
-    normalized_query = normalize_quotes(args.query)
-    malicious, pattern, score = detect_sql_injection_patterns(normalized_query)
-    lockout_applied = False
+    if args.rules:
+        try:
+            # The daemon follows edits to the pack (mtime or SIGHUP); one-shot runs just load it
+            use_rule_pack(args.rules, reload_signal=args.serve)
+        except (OSError, RulePackError) as error:
+            print(json.dumps({"success": False, "error": f"Could not load rule pack: {error}"}))
+            return
 
-    if malicious and args.apply_lockout and args.username:
-        apply_immediate_sql_lockout(args.username, pattern or "Suspicious pattern")
-        lockout_applied = True
+    if args.serve:
+        serve_mitigation_daemon(args.socket_path, args.port, cache_size=args.cache_size)
+        return
 
-    response = {
-        "success": True,
-        "malicious": malicious,
-        "pattern": pattern,
-        "score": score,
-        "lockout_applied": lockout_applied,
-    }
+    if batch:
+        if args.cache_size:
+            enable_verdict_cache(args.cache_size)
+        defaults = {"username": args.username, "apply_lockout": args.apply_lockout, "explain": args.explain}
+        if args.input_path:
+            with open(args.input_path, encoding="utf-8") as stream:
+                run_mitigation_batch(stream, sys.stdout, args.workers, defaults, args.rules, args.cache_size)
+        else:
+            run_mitigation_batch(sys.stdin, sys.stdout, args.workers, defaults, args.rules, args.cache_size)
+        sys.stdout.flush()
+        return
 
-    print(json.dumps(response))
+    print(json.dumps(handle_mitigation_request({
+        "query": args.query,
+        "username": args.username,
+        "apply_lockout": args.apply_lockout,
+        "explain": args.explain,
+    })))
 
 
 if __name__ == "__main__":
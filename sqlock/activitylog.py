@@ -0,0 +1,181 @@
+"""
+Buffered, rotating JSON-lines log shared by every SQLock process on a host.
+
+log() only appends a record to an in-memory buffer. A background thread writes
+the buffer every `flush_interval` seconds (flush_interval=0 writes at once),
+and whatever is left is written at exit. Each write is a single O_APPEND write
+of whole lines made under an exclusive flock, so concurrent processes never
+interleave partial lines.
+
+Rotation happens at write time, under the same lock:
+
+- size: when the file would grow past `max_bytes`
+- time: when the file was last written in an earlier `rotate_interval`
+  period (e.g. 86400 rotates at the first write of each UTC day)
+
+Rotated files are kept as path.1 (newest) ... path.<backups>, gzip-compressed
+to path.N.gz with compress=True. A process that finds the file rotated under
+it simply reopens the new one.
+
+Records go to the path as resolved when they were logged, so a relative path
+follows the working directory of the caller. echo=True also prints each
+message to stderr. A write that fails (e.g. the directory is gone) is reported
+on stderr and counted in write_errors.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND alone keeps whole-line writes
+    fcntl = None
+
+
+class ActivityLog:
+    """
+    Thread- and process-safe log writer; log(message, **fields) adds one JSON line
+    to `path`. Pass flush_interval=0 to write synchronously.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, rotate_interval=None, backups=5, compress=False,
+                 flush_interval=1.0, echo=False):
+        if backups < 1:
+            raise ValueError("Keep at least one rotated file (backups >= 1)")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.echo = echo
+        self.rotations = 0
+        self.write_errors = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pid = None
+        self._buffer = []
+        self._closed = False
+        atexit.register(self.close)
+
+    def log(self, message, **fields):
+        """Buffer one record: {"time", "pid", "message", **fields}."""
+        record = {"time": datetime.now().isoformat(timespec="milliseconds"), "pid": os.getpid(), "message": message}
+        record.update(fields)
+        line = json.dumps(record, default=str) + "\n"
+        if self.echo:
+            print(f"!!! WARNING: {message} !!!", file=sys.stderr)
+        path = os.path.abspath(self.path)
+        with self._cond:
+            if self._pid != os.getpid():
+                self._start()
+            self._buffer.append((path, line))
+            if self.flush_interval and not self._closed:
+                return
+        self.flush()
+
+    def _start(self):
+        # First record in this process (or in a forked child, whose copied buffer the parent still owns)
+        self._pid = os.getpid()
+        self._buffer = []
+        if self.flush_interval:
+            threading.Thread(target=self._run, name="sqlock-activity-log", daemon=True).start()
+
+    def _run(self):
+        pid = os.getpid()
+        while True:
+            with self._cond:
+                self._cond.wait(self.flush_interval)
+                if self._closed or self._pid != pid:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write every buffered record now."""
+        with self._write_lock:
+            with self._cond:
+                pending, self._buffer = self._buffer, []
+            by_path = {}
+            for path, line in pending:
+                by_path.setdefault(path, []).append(line)
+            for path, lines in by_path.items():
+                try:
+                    self._append(path, "".join(lines).encode("utf-8"))
+                except OSError as error:
+                    # There is nowhere else to log this; say it once per failed write
+                    self.write_errors += 1
+                    print(f"SQLock activity log: {len(lines)} record(s) lost: {error}", file=sys.stderr)
+
+    def _open_locked(self, path):
+        """Open `path` for appending under an exclusive lock, reopening if it was rotated meanwhile."""
+        while True:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _append(self, path, data):
+        fd = self._open_locked(path)
+        try:
+            if self._should_rotate(fd, len(data)):
+                self._rotate(path)
+                os.close(fd)
+                fd = self._open_locked(path)
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+        finally:
+            os.close(fd)
+
+    def _should_rotate(self, fd, incoming):
+        stat = os.fstat(fd)
+        if not stat.st_size:
+            return False
+        if self.max_bytes and stat.st_size + incoming > self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and (
+            stat.st_mtime // self.rotate_interval != time.time() // self.rotate_interval
+        )
+
+    def _backup_name(self, path, index):
+        return f"{path}.{index}.gz" if self.compress else f"{path}.{index}"
+
+    def _rotate(self, path):
+        oldest = self._backup_name(path, self.backups)
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.backups - 1, 0, -1):
+            source = self._backup_name(path, index)
+            if os.path.exists(source):
+                os.replace(source, self._backup_name(path, index + 1))
+        if self.compress:
+            import gzip
+            with open(path, "rb") as source, gzip.open(self._backup_name(path, 1), "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(path)
+        else:
+            os.replace(path, self._backup_name(path, 1))
+        self.rotations += 1
+
+    def close(self):
+        """Write what is buffered and stop the flusher thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._pid == os.getpid():
+            self.flush()
+        atexit.unregister(self.close)
@@ -0,0 +1,64 @@
+"""
+Input canonicalization for the SQLock detectors.
+
+canonicalize() turns the many spellings of the same payload into one string
+that every rule can share:
+- NFKC normalization folds full-width and compatibility characters
+  (e.g. "ＯＲ １＝１") onto their plain forms.
+- Smart / typographic quotes are mapped to ' and ". Each replacement is
+  guarded by a membership test; on CPython this is far faster than
+  str.translate, which walks non-ASCII strings one character at a time.
+- URL (%27) and HTML (&#39;, &apos;) encodings are decoded repeatedly, so
+  double-encoded payloads (%2527) are unwrapped too. Decoding stops after
+  MAX_DECODE_ROUNDS rounds, which bounds the work an attacker can ask for.
+
+Plain ASCII input without '%' or '&' is returned untouched without any copies,
+which is the common case for usernames and passwords.
+"""
+
+import html
+import unicodedata
+from urllib.parse import unquote
+
+MAX_DECODE_ROUNDS = 3
+
+# Typographic quotes that NFKC leaves alone, mapped to their ASCII equivalents
+QUOTE_TRANSLATIONS = {
+    "\u2018": "'",  # ‘ left single quotation mark
+    "\u2019": "'",  # ’ right single quotation mark
+    "\u201a": "'",  # ‚ single low-9 quotation mark
+    "\u201b": "'",  # ‛ single high-reversed-9 quotation mark
+    "\u02bc": "'",  # ʼ modifier letter apostrophe
+    "\u2032": "'",  # ′ prime
+    "\u201c": '"',  # “ left double quotation mark
+    "\u201d": '"',  # ” right double quotation mark
+    "\u201e": '"',  # „ double low-9 quotation mark
+    "\u201f": '"',  # ‟ double high-reversed-9 quotation mark
+}
+
+_QUOTE_PAIRS = tuple(QUOTE_TRANSLATIONS.items())
+
+def _fold(value):
+    """NFKC plus quote translation; a no-op for ASCII."""
+    if value.isascii():
+        return value
+    value = unicodedata.normalize("NFKC", value)
+    for quote, replacement in _QUOTE_PAIRS:
+        if quote in value:
+            value = value.replace(quote, replacement)
+    return value
+
+def canonicalize(value, max_rounds=MAX_DECODE_ROUNDS):
+    """Return the canonical form of value (see module docstring). Non-strings are returned as-is."""
+    if not isinstance(value, str):
+        return value
+
+    value = _fold(value)
+    for _ in range(max_rounds):
+        if "%" not in value and "&" not in value:
+            break
+        decoded = _fold(html.unescape(unquote(value)))
+        if decoded == value:
+            break
+        value = decoded
+    return value
@@ -0,0 +1,53 @@
+"""
+Lazily loaded MySQL driver for the SQLock tools.
+
+Importing mysql.connector costs more than the rest of Mitigation_SRC put
+together (about 75 ms of a 130 ms cold start), and detection-only runs never
+touch the database. This module stands in for the driver until the first
+connection is made:
+
+- connect(config) imports mysql.connector on first use and opens a connection
+- Error, IntegrityError, ... resolve to the driver's exception classes on first
+  access, so `except db.Error:` works unchanged (Python only evaluates an
+  except clause once an exception is actually propagating)
+
+Tests that patch mysql.connector.connect keep working, because the driver is
+always looked up on the real mysql.connector module.
+
+With another storage backend in use (sqlock/storage.py), use_errors() points
+the exception names at that backend's classes instead.
+"""
+
+import importlib
+
+DRIVER = "mysql.connector"
+
+_driver = None
+_errors = None
+
+def driver():
+    """Import (once) and return the mysql.connector module."""
+    global _driver
+    if _driver is None:
+        _driver = importlib.import_module(DRIVER)
+    return _driver
+
+def is_loaded():
+    """Whether the driver has been imported yet (by this module or anyone else)."""
+    import sys
+    return DRIVER in sys.modules
+
+def connect(config):
+    """Open a driver connection with the given DB_CONFIG-style keyword settings."""
+    return driver().connect(**config)
+
+def use_errors(namespace):
+    """Resolve Error, IntegrityError, ... from `namespace` (None: the MySQL driver)."""
+    global _errors
+    _errors = namespace
+
+def __getattr__(name):
+    # Exception classes and other driver attributes, resolved on first access
+    if name[:1].isupper():
+        return getattr(_errors if _errors is not None else driver(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
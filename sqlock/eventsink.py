@@ -0,0 +1,256 @@
+"""
+Background, batched writer for security events.
+
+Callers hand events to submit() and return immediately; a flusher thread writes
+them in batches of up to `batch_size` as soon as a batch is full, or after
+`flush_interval` seconds otherwise. Events are (decision, score, query_text)
+tuples and `write_batch(events)` does the actual multi-row INSERT.
+
+The queue holds at most `max_queue` events. When it is full, `policy` decides:
+
+- "block": submit() waits for room (the pre-sink behaviour, minus the round trip),
+  at most `timeout` seconds (default `block_timeout`, 5 seconds; None: no limit),
+  then raises TimeoutError
+- "drop_allow": "allow" events are dropped first: a new allow event is discarded,
+  and a block/challenge event evicts the oldest queued allow event. With no allow
+  event left to evict it waits like "block", so no attack is ever lost
+- "spill": overflow is appended to `spill_path` (JSON lines) and written back
+  once the queue has drained, `batch_size` lines at a time. The file being
+  written back is `spill_path`.draining, with the byte offset written so far in
+  `spill_path`.draining.pos, so an interrupted drain resumes where it stopped
+
+A batch that fails to write is reported through `on_error` and counted as
+failed; under "spill" it goes to the spill file to be retried. close() (also
+registered with atexit) stops accepting events and flushes everything left.
+stats() returns the counters: queued, flushed, dropped, spilled, failed,
+timed_out, batches, depth and max_depth.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+POLICIES = ("block", "drop_allow", "spill")
+
+
+class EventSink:
+    """
+    Thread-safe queue in front of `write_batch`, a callable that stores a list of
+    (decision, score, query_text) events in one statement.
+    """
+
+    def __init__(self, write_batch, max_queue=10000, batch_size=100, flush_interval=0.5,
+                 policy="block", spill_path=None, on_error=None, block_timeout=5.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy {policy!r}; expected one of {POLICIES}")
+        if policy == "spill" and not spill_path:
+            raise ValueError("The spill policy needs a spill_path")
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.spill_path = spill_path
+        self.on_error = on_error
+        self.block_timeout = block_timeout
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._counters = dict.fromkeys(("queued", "flushed", "dropped", "spilled", "failed", "timed_out", "batches"), 0)
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._queue = deque()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._max_depth = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="sqlock-event-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, decision, score, query_text, timeout=None):
+        """
+        Queue one event. Returns False if it was dropped (or the sink is closed).
+        Waiting for room gives up after `timeout` seconds (default: block_timeout)
+        with TimeoutError.
+        """
+        event = (decision, score, query_text)
+        timeout = self.block_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            if self._pid != os.getpid():
+                self._start()  # Forked child: the parent's flusher thread did not come along
+            if self._closed:
+                self._counters["dropped"] += 1
+                return False
+            spill = False
+            while len(self._queue) >= self.max_queue:
+                if self.policy == "spill":
+                    spill = True
+                    break
+                if self.policy == "drop_allow":
+                    if decision == "allow":
+                        self._counters["dropped"] += 1
+                        return False
+                    if self._evict_allow():
+                        continue
+                if deadline is None:
+                    self._cond.wait()
+                elif not self._cond.wait(max(0.0, deadline - time.monotonic())) and \
+                        len(self._queue) >= self.max_queue:
+                    self._counters["timed_out"] += 1
+                    raise TimeoutError(f"Event queue still full after {timeout} seconds")
+                if self._closed:
+                    self._counters["dropped"] += 1
+                    return False
+            if spill:
+                self._counters["spilled"] += 1
+            else:
+                self._queue.append(event)
+                self._counters["queued"] += 1
+                self._max_depth = max(self._max_depth, len(self._queue))
+                if len(self._queue) >= self.batch_size:
+                    self._cond.notify_all()
+        if spill:
+            self._spill([event])
+        return True
+
+    def _evict_allow(self):
+        for index, queued in enumerate(self._queue):
+            if queued[0] == "allow":
+                del self._queue[index]
+                self._counters["dropped"] += 1
+                return True
+        return False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closed or self._flush_requested) and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._queue:
+                    self._flush_requested = False
+                    if self._closed:
+                        return
+                    drain_spill = self.policy == "spill"
+                    batch = None
+                else:
+                    count = min(self.batch_size, len(self._queue))
+                    batch = [self._queue.popleft() for _ in range(count)]
+                    self._in_flight = len(batch)
+                    drain_spill = False
+                    self._cond.notify_all()  # Room for blocked submitters
+            if batch:
+                self._write(batch)
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+            elif drain_spill:
+                self._drain_spill()
+
+    def _write(self, batch):
+        try:
+            self.write_batch(batch)
+        except Exception as error:
+            with self._cond:
+                self._counters["failed"] += len(batch)
+            if self.on_error is not None:
+                self.on_error(error)
+            if self.policy == "spill":
+                self._spill(batch)
+            return False
+        with self._cond:
+            self._counters["flushed"] += len(batch)
+            self._counters["batches"] += 1
+        return True
+
+    def _spill(self, events):
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                for event in events:
+                    spill_file.write(json.dumps(event) + "\n")
+
+    def _drain_spill(self):
+        """Write back spilled events (called when the queue is empty)."""
+        with self._drain_lock:
+            while self._drain_spill_file():
+                pass
+
+    def _drain_spill_file(self):
+        """Write back one spill file; False once none is left or a batch failed again."""
+        draining = self.spill_path + ".draining"
+        progress = draining + ".pos"
+        with self._spill_lock:
+            if not os.path.exists(draining):  # Otherwise resume an interrupted drain first
+                if not os.path.exists(self.spill_path):
+                    return False
+                os.replace(self.spill_path, draining)
+        offset = 0
+        failed = False
+        if os.path.exists(progress):
+            with open(progress, encoding="utf-8") as progress_file:
+                offset = int(progress_file.read() or 0)
+        with open(draining, "rb") as spill_file:
+            spill_file.seek(offset)
+            while True:
+                lines = []
+                while len(lines) < self.batch_size:
+                    line = spill_file.readline()
+                    if not line:
+                        break
+                    if line.strip():
+                        lines.append(line)
+                if not lines:
+                    break
+                # A batch that fails again is spilled again by _write, to be retried on
+                # the next drain rather than in this one
+                failed = not self._write([tuple(json.loads(line)) for line in lines]) or failed
+                with open(progress, "w", encoding="utf-8") as progress_file:
+                    progress_file.write(str(spill_file.tell()))
+        os.remove(draining)
+        if os.path.exists(progress):
+            os.remove(progress)
+        return not failed
+
+    def flush(self, timeout=None):
+        """Wait until every queued event has been written. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait(remaining)
+        if self.policy == "spill":
+            self._drain_spill()
+        return True
+
+    def close(self, timeout=10.0):
+        """Stop accepting events, write what is queued and stop the flusher."""
+        with self._cond:
+            if self._pid != os.getpid() or self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self.policy == "spill":
+            self._drain_spill()
+        atexit.unregister(self.close)
+
+    def stats(self):
+        """Sink counters as a JSON-ready dict."""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(depth=len(self._queue), max_depth=self._max_depth, policy=self.policy)
+        return stats
@@ -0,0 +1,70 @@
+"""
+Lightweight SQL lexer used as the front end of the SQLock detector.
+
+tokenize() makes one pass over the input and splits it into quotes, comment
+markers, keywords, identifiers, number literals and operators. Rules can then
+answer context questions ("is this quote followed by OR?", "does the input
+start with a command?") by looking at neighbouring tokens instead of re-scanning
+the string with another regex.
+
+This is not a full SQL parser. It is tuned for spotting injections:
+- Quotes are emitted one per character instead of being paired into string
+  literals, because an injected payload is usually an *unbalanced* quote.
+- Comment markers (--, #, /*) are emitted on their own and lexing continues
+  after them; the text an attacker hides behind a comment is exactly what the
+  detector needs to see.
+- Words follow the regex definition of \\w, so token boundaries line up with
+  \\b in the detector's regex rules.
+"""
+
+import re
+from collections import namedtuple
+
+Token = namedtuple("Token", ["kind", "value", "start", "end"])
+
+# Token kinds
+KEYWORD = "keyword"
+IDENTIFIER = "identifier"
+NUMBER = "number"
+QUOTE = "quote"
+COMMENT = "comment"
+OPERATOR = "operator"
+
+SQL_KEYWORDS = frozenset({
+    "add", "all", "alter", "and", "as", "asc", "between", "by", "case", "create",
+    "delay", "delete", "desc", "distinct", "drop", "else", "end", "exec", "execute",
+    "exists", "from", "group", "having", "in", "insert", "into", "is", "join", "like",
+    "limit", "not", "null", "or", "order", "select", "set", "sleep", "table",
+    "then", "truncate", "union", "update", "values", "waitfor", "when", "where",
+})
+
+# Whitespace is matched (so it can be skipped) but never emitted as a token.
+# Every other character ends up in exactly one token.
+_TOKEN_RE = re.compile(
+    r"(?P<ws>\s+)"
+    r"|(?P<comment>--|#|/\*)"
+    r"|(?P<quote>['\"`])"
+    r"|(?P<word>\w+)"
+    r"|(?P<operator>.)",
+    re.DOTALL,
+)
+
+def _word_kind(value):
+    if value.isdigit():
+        return NUMBER
+    if value.lower() in SQL_KEYWORDS:
+        return KEYWORD
+    return IDENTIFIER
+
+def tokenize(text):
+    """Split text into a list of Token(kind, value, start, end), skipping whitespace."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "ws":
+            continue
+        value = match.group()
+        if kind == "word":
+            kind = _word_kind(value)
+        tokens.append(Token(kind, value, match.start(), match.end()))
+    return tokens
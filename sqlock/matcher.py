@@ -0,0 +1,130 @@
+"""
+Multi-pattern literal matching for the SQLock detectors.
+
+AhoCorasick builds one automaton out of a list of literal needles and then
+finds every occurrence of every needle in a single left-to-right pass, so the
+scan cost depends on the input length, not on how many needles there are.
+
+If the optional `pyahocorasick` package is installed (pip install pyahocorasick)
+its C automaton is used; otherwise a pure-Python automaton is built.
+"""
+
+from collections import deque
+
+try:
+    import ahocorasick as _ahocorasick
+except ImportError:  # optional accelerated backend
+    _ahocorasick = None
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed list of literal needles.
+
+    Needles are identified by their position in the list passed in, so callers
+    can keep a parallel list of descriptions / weights. Matching is exact and
+    case-sensitive; lowercase both the needles and the text for a
+    case-insensitive scan.
+    """
+
+    def __init__(self, needles, backend=None):
+        self.needles = tuple(needles)
+        if any(not needle for needle in self.needles):
+            raise ValueError("AhoCorasick needles must be non-empty strings")
+
+        if backend is None:
+            backend = "pyahocorasick" if _ahocorasick is not None else "python"
+        if backend == "pyahocorasick":
+            if _ahocorasick is None:
+                raise ImportError("pyahocorasick is not installed")
+            self._build_accelerated()
+        elif backend == "python":
+            self._build_python()
+        else:
+            raise ValueError(f"Unknown AhoCorasick backend: {backend}")
+        self.backend = backend
+
+    def _build_accelerated(self):
+        automaton = _ahocorasick.Automaton()
+        indexes_by_needle = {}
+        for i, needle in enumerate(self.needles):
+            indexes_by_needle.setdefault(needle, []).append(i)
+        for needle, indexes in indexes_by_needle.items():
+            automaton.add_word(needle, (tuple(indexes), len(needle)))
+        if indexes_by_needle:
+            automaton.make_automaton()
+        self._automaton = automaton
+
+    def _build_python(self):
+        # Trie: goto[state] maps a character to the next state.
+        goto = [{}]
+        outputs = [[]]
+        for i, needle in enumerate(self.needles):
+            state = 0
+            for ch in needle:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(i)
+
+        # Breadth-first failure links, then fold them into a full transition table
+        # so scanning is a single dict lookup per input character.
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, fallback in delta[fail[state]].items():
+                delta[state].setdefault(ch, fallback)
+            for ch, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(ch, 0)
+                queue.append(next_state)
+
+        self._delta = delta
+        self._outputs = [
+            tuple((i, len(self.needles[i])) for i in sorted(out)) for out in outputs
+        ]
+
+    def finditer(self, text):
+        """Yield (needle_index, start, end) for every needle occurrence, ordered by end offset."""
+        if self.backend == "pyahocorasick":
+            if not self.needles:
+                return
+            for end, (indexes, length) in self._automaton.iter(text):
+                for i in indexes:
+                    yield i, end + 1 - length, end + 1
+            return
+
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for pos, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for i, length in outputs[state]:
+                    yield i, pos + 1 - length, pos + 1
+
+    def matched_indexes(self, text):
+        """Return the set of needle indexes that occur anywhere in text."""
+        if self.backend == "pyahocorasick":
+            if not self.needles:
+                return set()
+            found = set()
+            for _, (indexes, _) in self._automaton.iter(text):
+                found.update(indexes)
+            return found
+
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found.update(i for i, _ in outputs[state])
+        return found
@@ -0,0 +1,213 @@
+"""
+Process-wide database connection pool.
+
+Opening a MySQL connection costs a TCP handshake plus the auth exchange, which
+is several round trips before the first statement runs. The pool keeps up to
+`size` connections open and hands them out again:
+
+- checkout reuses the most recently returned idle connection, opens a new one
+  while fewer than `size` exist, or waits up to `checkout_timeout` seconds
+- health check: a connection that sat idle for `check_idle_after` seconds or
+  more is pinged (is_connected()) before it is handed out; dead ones are
+  dropped and the next candidate is tried
+- connections older than `max_lifetime` seconds are closed instead of reused,
+  so server-side timeouts and failovers never see a stale socket
+- a connection returned after an error is closed rather than pooled
+- after fork() the child starts with an empty pool; inherited sockets belong to
+  the parent and are never used or closed by the child
+
+stats() reports the pool metrics (open, in use, peak, reuses, waits, ...).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """No connection became available within checkout_timeout."""
+
+
+class _Entry:
+    __slots__ = ("connection", "created", "last_used")
+
+    def __init__(self, connection, now):
+        self.connection = connection
+        self.created = now
+        self.last_used = now
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool over `connect`, a zero-argument callable returning a DB-API
+    connection with is_connected() and close().
+    """
+
+    def __init__(self, connect, size=5, max_lifetime=1800.0, checkout_timeout=10.0, check_idle_after=1.0):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.connect = connect
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.check_idle_after = check_idle_after
+        self._cond = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._in_use = {}
+        self._open = 0
+        self._closed = False
+        self._counters = dict.fromkeys(
+            ("checkouts", "created", "reused", "health_check_failures", "expired", "discarded", "waits", "timeouts"), 0
+        )
+        self._peak_in_use = 0
+        self._wait_seconds = 0.0
+
+    def _expired(self, entry, now):
+        return self.max_lifetime is not None and now - entry.created >= self.max_lifetime
+
+    def acquire(self):
+        """Check a connection out of the pool; pair every call with release()."""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            if self._pid != os.getpid():
+                self._reset_state()  # Forked child: the parent's sockets are not ours
+            self._counters["checkouts"] += 1
+        while True:
+            stale = []
+            entry = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                waited = False
+                while entry is None:
+                    now = time.monotonic()
+                    while self._idle:
+                        candidate = self._idle.pop()
+                        if self._expired(candidate, now):
+                            self._open -= 1
+                            self._counters["expired"] += 1
+                            stale.append(candidate.connection)
+                            continue
+                        entry = candidate
+                        break
+                    if entry is not None or self._open < self.size:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(f"No database connection available within {self.checkout_timeout}s")
+                    if not waited:
+                        self._counters["waits"] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                    self._wait_seconds += min(remaining, time.monotonic() - now)
+                if entry is None:
+                    self._open += 1  # Reserve the slot before connecting outside the lock
+            for connection in stale:
+                _close_quietly(connection)
+
+            if entry is None:
+                try:
+                    connection = self.connect()
+                except BaseException:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                entry = _Entry(connection, time.monotonic())
+                with self._cond:
+                    self._counters["created"] += 1
+                    self._track(entry)
+                return connection
+
+            if time.monotonic() - entry.last_used >= self.check_idle_after and not self._healthy(entry.connection):
+                _close_quietly(entry.connection)
+                with self._cond:
+                    self._open -= 1
+                    self._counters["health_check_failures"] += 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._counters["reused"] += 1
+                self._track(entry)
+            return entry.connection
+
+    def _track(self, entry):
+        self._in_use[id(entry.connection)] = entry
+        self._peak_in_use = max(self._peak_in_use, len(self._in_use))
+
+    @staticmethod
+    def _healthy(connection):
+        try:
+            return bool(connection.is_connected())
+        except Exception:
+            return False
+
+    def release(self, connection, discard=False):
+        """Return a connection; with discard=True (e.g. after an error) it is closed instead."""
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                # Checked out before a fork or a reset; not ours to pool
+                _close_quietly(connection)
+                return
+            now = time.monotonic()
+            if discard or self._closed or self._expired(entry, now):
+                self._open -= 1
+                self._counters["discarded" if discard else "expired"] += 1
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+                connection = None
+            self._cond.notify()
+        if connection is not None:
+            _close_quietly(connection)
+
+    @contextmanager
+    def connection(self):
+        """`with pool.connection() as conn:` checks out and returns a connection."""
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, discard=True)
+            raise
+        self.release(connection)
+
+    def close(self):
+        """Close the idle connections; ones still checked out are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle = [entry.connection for entry in self._idle] if self._pid == os.getpid() else []
+            self._open -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for connection in idle:
+            _close_quietly(connection)
+
+    def stats(self):
+        """Pool metrics as a JSON-ready dict."""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(
+                size=self.size,
+                open=self._open,
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                peak_in_use=self._peak_in_use,
+                wait_ms_total=round(self._wait_seconds * 1000, 3),
+            )
+        return stats
@@ -0,0 +1,205 @@
+"""
+One-pass prefilter that tells clearly benign input apart before full rule evaluation.
+
+Every stage of the detector needs something specific in the input before it can
+add to the score: a quote, a comment marker, an anchor word such as "union", a
+dictionary needle such as "xp_". The prefilter collects those necessary
+conditions into three sets:
+
+- trigger characters: any occurrence needs a full scan (quotes, ;, -, #, =, ...)
+- trigger words: a full scan is needed when one of them is a whole word
+  (a maximal \\w run, which is exactly what the lexer emits as a token)
+- trigger substrings: a full scan is needed when one of them occurs anywhere
+
+Non-ASCII input always gets a full scan, because case folding and Unicode
+normalization can turn it into any of the above.
+
+Zero false negatives: needs_scan() only returns False when none of the
+conditions holds, and every detector stage needs at least one of them to fire.
+The detector therefore scores such input exactly as it scores an empty finding
+list, so skipping the full evaluation cannot change any verdict.
+tests/test_prefilter.py checks this against a corpus for the current ruleset.
+
+needs_scan_many() does the same screen for a batch. With NumPy installed it runs
+as array operations over a character-code matrix: a lookup table for trigger
+characters, word-start bigrams for trigger words and hashed trigrams for
+trigger substrings. Hash collisions and bigram-only word matching can only send
+extra input to the full scan, never skip input that needed one.
+"""
+
+import re
+import threading
+
+# Strings longer than this are screened one by one instead of in the NumPy matrix
+VECTOR_WIDTH = 128
+# Rows per NumPy chunk, which bounds the matrix to VECTOR_WIDTH * 4 bytes per row
+VECTOR_CHUNK = 4096
+
+_HASH_BUCKETS = 65521
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_")
+_WORD_RUN = re.compile(r"\w+", re.ASCII)
+
+
+def _trigram_hash(a, b, c):
+    return (a * 16129 + b * 127 + c) % _HASH_BUCKETS
+
+
+def _needle_condition(needle):
+    """
+    Return ("char", c), ("word", w) or ("substring", s): one condition every input
+    containing `needle` (lowercase) must meet.
+    """
+    for ch in needle:
+        if ch not in _WORD_CHARS and not ch.isspace():
+            return ("char", ch)
+    runs = list(_WORD_RUN.finditer(needle))
+    if not runs:
+        return ("char", needle[0])
+    for run in runs:
+        # A run with whitespace on both sides is a whole word wherever the needle occurs
+        if run.start() > 0 and run.end() < len(needle):
+            return ("word", run.group())
+    longest = max(runs, key=lambda run: len(run.group())).group()
+    if len(longest) == 1:
+        return ("char", longest)
+    return ("substring", longest)
+
+
+class Prefilter:
+    """
+    Screen for input that cannot produce a single detector finding.
+    Build it with from_conditions(); needs_scan() / needs_scan_many() do the screening.
+    """
+
+    def __init__(self, trigger_chars, trigger_words, trigger_substrings):
+        self.trigger_chars = frozenset(trigger_chars)
+        self.trigger_words = frozenset(trigger_words)
+        self.trigger_substrings = frozenset(trigger_substrings)
+
+        alternatives = []
+        if self.trigger_chars:
+            alternatives.append("[" + "".join(re.escape(ch) for ch in sorted(self.trigger_chars)) + "]")
+        if self.trigger_words:
+            alternatives.append(r"\b(?:" + "|".join(re.escape(w) for w in sorted(self.trigger_words)) + r")\b")
+        alternatives += [re.escape(s) for s in sorted(self.trigger_substrings)]
+        # re.ASCII keeps \b in line with the lexer for the ASCII input that reaches it
+        self._search = re.compile("|".join(alternatives), re.IGNORECASE | re.ASCII).search if alternatives else None
+        self._tables = None
+
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_conditions(cls, stage_chars, anchors, needles):
+        """
+        Build the prefilter from the detector's necessary conditions:
+        stage_chars - characters a non-rule stage needs (e.g. quotes)
+        anchors     - token values; a rule only runs when one of its anchors is a token
+        needles     - lowercase substrings that must occur for a dictionary hit
+        """
+        chars, words, substrings = set(stage_chars), set(), set()
+        for anchor in anchors:
+            anchor = anchor.lower()
+            if anchor and all(ch in _WORD_CHARS for ch in anchor):
+                words.add(anchor)
+            elif anchor:
+                chars.add(anchor[0])
+        for needle in needles:
+            if not needle:
+                continue
+            kind, value = _needle_condition(needle.lower())
+            {"char": chars, "word": words, "substring": substrings}[kind].add(value)
+        return cls(chars, words, substrings)
+
+    def _screen(self, text):
+        if not text.isascii():
+            return True
+        return self._search is not None and self._search(text) is not None
+
+    def needs_scan(self, text):
+        """True unless `text` certainly produces no finding."""
+        needed = self._screen(text)
+        with self._lock:
+            self.checked += 1
+            if not needed:
+                self.skipped += 1
+        return needed
+
+    def needs_scan_many(self, texts):
+        """needs_scan() for a list of strings; returns a list of bools in the same order."""
+        texts = list(texts)
+        try:
+            import numpy as np
+        except ImportError:
+            needed = [self._screen(text) for text in texts]
+        else:
+            needed = self._screen_vectorized(np, texts)
+        with self._lock:
+            self.checked += len(needed)
+            self.skipped += needed.count(False)
+        return needed
+
+    def _build_tables(self, np):
+        char_table = np.zeros(128, dtype=bool)
+        for ch in self.trigger_chars:
+            if ord(ch) < 128:
+                char_table[ord(ch)] = True
+        word_table = np.zeros(128, dtype=bool)
+        word_table[[ord(ch) for ch in _WORD_CHARS]] = True
+
+        # Word start followed by its second character (0 when the word is one character long)
+        word_start_table = np.zeros(128 * 128, dtype=bool)
+        for word in self.trigger_words:
+            word_start_table[ord(word[0]) * 128 + (ord(word[1]) if len(word) > 1 else 0)] = True
+
+        trigram_table = np.zeros(_HASH_BUCKETS, dtype=bool)
+        bigram_table = np.zeros(128 * 128, dtype=bool)
+        for substring in self.trigger_substrings:
+            if len(substring) >= 3:
+                trigram_table[_trigram_hash(*map(ord, substring[:3]))] = True
+            else:
+                bigram_table[ord(substring[0]) * 128 + ord(substring[1])] = True
+        self._tables = (char_table, word_table, word_start_table, trigram_table, bigram_table)
+        return self._tables
+
+    def _screen_vectorized(self, np, texts):
+        char_table, word_table, word_start_table, trigram_table, bigram_table = self._tables or self._build_tables(np)
+        needed = [True] * len(texts)
+        short = [i for i, text in enumerate(texts) if len(text) <= VECTOR_WIDTH]
+        for i in set(range(len(texts))).difference(short):
+            needed[i] = self._screen(texts[i])
+
+        for offset in range(0, len(short), VECTOR_CHUNK):
+            rows = short[offset:offset + VECTOR_CHUNK]
+            batch = np.array([texts[i] for i in rows], dtype=str)
+            width = max(batch.dtype.itemsize // 4, 1)
+            # One uint32 code point per column, padded with 0 (a non-word, non-trigger character)
+            codes = np.zeros((len(rows), width + 2), dtype=np.int64)
+            codes[:, :batch.dtype.itemsize // 4] = batch.view(np.uint32).reshape(len(rows), -1)
+
+            hit = (codes > 127).any(axis=1)
+            codes = np.where((codes >= 65) & (codes <= 90), codes + 32, np.minimum(codes, 127))
+            hit |= char_table[codes].any(axis=1)
+
+            is_word = word_table[codes]
+            current, following, third = codes[:, :-2], codes[:, 1:-1], codes[:, 2:]
+            starts = is_word[:, :-2].copy()
+            starts[:, 1:] &= ~is_word[:, :-3]
+            second = np.where(is_word[:, 1:-1], following, 0)
+            hit |= (starts & word_start_table[current * 128 + second]).any(axis=1)
+            hit |= bigram_table[current * 128 + following].any(axis=1)
+            hit |= trigram_table[(current * 16129 + following * 127 + third) % _HASH_BUCKETS].any(axis=1)
+
+            for i, row_hit in zip(rows, hit.tolist()):
+                needed[i] = row_hit
+        return needed
+
+    def stats(self):
+        """Return the screening counters as a dictionary."""
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'skipped': self.skipped,
+                'skip_rate': round(self.skipped / self.checked, 4) if self.checked else 0.0,
+            }
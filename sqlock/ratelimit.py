@@ -0,0 +1,119 @@
+"""
+Sharded in-memory sliding-window rate limiter.
+
+Each key (a username, a client address, ...) allows `limit` hits per `window`
+seconds. The window slides: the count of the previous fixed window is weighted
+by how much of it still overlaps the last `window` seconds and added to the
+current one, so there is no burst at window boundaries and each key costs two
+counters. Rejected hits are not counted, so a key is let through again as soon
+as its rate drops below the limit.
+
+Keys are spread over `shards` independently locked shards, so concurrent
+callers rarely wait on each other. Each shard keeps its keys in least recently
+used order and holds at most max_keys / shards of them; the idlest keys are
+evicted first, and keys idle for two windows are dropped as soon as they are
+seen, as their count has decayed to zero anyway.
+
+hit() reports whether the key just changed state, so callers can persist
+transitions (allowed -> limited) instead of every attempt.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Shard:
+    __slots__ = ("lock", "keys")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = OrderedDict()
+
+
+class RateLimiter:
+    """
+    `hit(key)` returns (allowed, changed): whether this hit is within the limit, and
+    whether it flipped the key between allowed and limited.
+    """
+
+    def __init__(self, limit, window, shards=16, max_keys=100000):
+        if limit < 1 or window <= 0:
+            raise ValueError("RateLimiter needs limit >= 1 and window > 0")
+        if shards < 1 or max_keys < shards:
+            raise ValueError("RateLimiter needs shards >= 1 and max_keys >= shards")
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._shards = [_Shard() for _ in range(shards)]
+        self._per_shard = max_keys // shards
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def hit(self, key):
+        now = time.monotonic()
+        window_start = now - now % self.window
+        shard = self._shard(key)
+        with shard.lock:
+            # state: [window_start, previous count, current count, limited, last seen]
+            state = shard.keys.get(key)
+            if state is None:
+                state = [window_start, 0, 0, False, now]
+                shard.keys[key] = state
+                self._trim(shard, now)
+            else:
+                shard.keys.move_to_end(key)
+                if state[0] != window_start:
+                    elapsed_windows = round((window_start - state[0]) / self.window)
+                    state[1] = state[2] if elapsed_windows == 1 else 0
+                    state[2] = 0
+                    state[0] = window_start
+            state[4] = now
+            overlap = 1 - (now - window_start) / self.window
+            allowed = state[1] * overlap + state[2] < self.limit
+            if allowed:
+                state[2] += 1
+            changed = allowed == state[3]
+            state[3] = not allowed
+        # Plain counters: a lost update under contention only skews stats()
+        if allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return allowed, changed
+
+    def _trim(self, shard, now):
+        idle_after = 2 * self.window
+        keys = shard.keys
+        while len(keys) > self._per_shard:
+            keys.popitem(last=False)
+            self.evictions += 1
+        while keys:
+            oldest = next(iter(keys.values()))
+            if now - oldest[4] < idle_after:
+                break
+            keys.popitem(last=False)
+
+    def reset(self, key):
+        """Forget `key` (e.g. after a successful login)."""
+        shard = self._shard(key)
+        with shard.lock:
+            shard.keys.pop(key, None)
+
+    def __len__(self):
+        return sum(len(shard.keys) for shard in self._shards)
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'window': self.window,
+            'keys': len(self),
+            'max_keys': self.max_keys,
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'evictions': self.evictions,
+        }
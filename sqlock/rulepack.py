@@ -0,0 +1,252 @@
+"""
+Versioned rule packs for the SQLock detectors.
+
+A rule pack is a JSON (or, on Python 3.11+, TOML) file holding the detection
+rules, so weights, regexes and dictionary entries can be tuned without a code
+deploy:
+
+    {
+      "format": 1,
+      "name": "sqlock-default",
+      "version": "2026.10.0",
+      "detector": {
+        "block_threshold": 80,
+        "regex_rules": [{"pattern": "...", "weight": 100, "description": "...", "anchors": ["union"]}],
+        "raw_input_regex_rules": [...],
+        "dictionary": {"1=1": "Tautology injection"}
+      },
+      "log_analyzer": {
+        "signatures": ["union select"],
+        "patterns": ["\\bunion\\s+select\\b"]
+      }
+    }
+
+"detector" feeds Mitigation_SRC.Ruleset and "log_analyzer" feeds SQLlog's
+SignatureMatcher. Either section may be left out, in which case that tool keeps
+its built-in rules. load_rule_pack() validates the whole file (including
+compiling every regex) before anything is swapped in, so a bad edit is rejected
+instead of half-applied.
+
+RulePackWatcher keeps a compiled object built from a pack and rebuilds it when
+the file's mtime changes or a reload signal arrives. The new object is built
+completely and then swapped in with a single reference assignment, so
+detections already running keep using the object they started with.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+RULE_PACK_FORMAT = 1
+
+# Environment variable naming a rule pack to load instead of the built-in rules
+RULE_PACK_ENV = "SQLOCK_RULE_PACK"
+
+
+class RulePackError(ValueError):
+    """Raised when a rule pack cannot be read or does not validate."""
+
+
+def _require(condition, path, message):
+    if not condition:
+        raise RulePackError(f"{path}: {message}")
+
+
+def _check_regex(pattern, where, path):
+    _require(isinstance(pattern, str) and pattern, path, f"{where} must be a non-empty string")
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise RulePackError(f"{path}: {where} is not a valid regex: {e}") from None
+
+
+def _parse_rules(rules, section, path):
+    """Validate a list of rule tables and return (pattern, weight, description, anchors) tuples."""
+    _require(isinstance(rules, list), path, f"detector.{section} must be a list")
+    parsed = []
+    for n, rule in enumerate(rules):
+        where = f"detector.{section}[{n}]"
+        _require(isinstance(rule, dict), path, f"{where} must be a table")
+        _check_regex(rule.get("pattern"), f"{where}.pattern", path)
+        weight = rule.get("weight")
+        _require(isinstance(weight, int) and not isinstance(weight, bool) and weight >= 0,
+                 path, f"{where}.weight must be a non-negative integer")
+        description = rule.get("description")
+        _require(isinstance(description, str) and description, path, f"{where}.description must be a non-empty string")
+        anchors = rule.get("anchors")
+        _require(isinstance(anchors, list) and anchors and all(isinstance(a, str) and a for a in anchors),
+                 path, f"{where}.anchors must be a non-empty list of strings")
+        parsed.append((rule["pattern"], weight, description, tuple(a.lower() for a in anchors)))
+    return parsed
+
+
+def _parse_detector(section, path):
+    _require(isinstance(section, dict), path, "detector must be a table")
+    detector = {
+        "regex_rules": _parse_rules(section.get("regex_rules", []), "regex_rules", path),
+        "raw_input_regex_rules": _parse_rules(section.get("raw_input_regex_rules", []), "raw_input_regex_rules", path),
+    }
+    dictionary = section.get("dictionary", {})
+    _require(isinstance(dictionary, dict) and all(
+        isinstance(k, str) and k and isinstance(v, str) and v for k, v in dictionary.items()
+    ), path, "detector.dictionary must map non-empty strings to descriptions")
+    detector["dictionary"] = dict(dictionary)
+    if "block_threshold" in section:
+        threshold = section["block_threshold"]
+        _require(isinstance(threshold, int) and not isinstance(threshold, bool),
+                 path, "detector.block_threshold must be an integer")
+        detector["block_threshold"] = threshold
+    return detector
+
+
+def _parse_log_analyzer(section, path):
+    _require(isinstance(section, dict), path, "log_analyzer must be a table")
+    signatures = section.get("signatures", [])
+    _require(isinstance(signatures, list) and all(isinstance(s, str) and s.strip() for s in signatures),
+             path, "log_analyzer.signatures must be a list of non-empty strings")
+    patterns = section.get("patterns", [])
+    _require(isinstance(patterns, list), path, "log_analyzer.patterns must be a list")
+    for n, pattern in enumerate(patterns):
+        _check_regex(pattern, f"log_analyzer.patterns[{n}]", path)
+    return {"signatures": list(signatures), "patterns": list(patterns)}
+
+
+def _read_document(path):
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise RulePackError(f"{path}: TOML rule packs need Python 3.11+ (use JSON instead)") from None
+        try:
+            with open(path, "rb") as f:
+                return tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise RulePackError(f"{path}: {e}") from None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        raise RulePackError(f"{path}: {e}") from None
+
+
+def load_rule_pack(path):
+    """
+    Read and validate a rule pack. Returns a dict with "name", "version", and the
+    "detector" / "log_analyzer" sections that are present. Raises RulePackError
+    (or OSError if the file cannot be opened).
+    """
+    path = os.fspath(path)
+    document = _read_document(path)
+    _require(isinstance(document, dict), path, "a rule pack must be a table at the top level")
+    _require(document.get("format") == RULE_PACK_FORMAT, path,
+             f"unsupported rule pack format {document.get('format')!r} (expected {RULE_PACK_FORMAT})")
+    version = document.get("version")
+    _require(isinstance(version, str) and version, path, "version must be a non-empty string")
+
+    pack = {"name": document.get("name", os.path.basename(path)), "version": version}
+    if "detector" in document:
+        pack["detector"] = _parse_detector(document["detector"], path)
+    if "log_analyzer" in document:
+        pack["log_analyzer"] = _parse_log_analyzer(document["log_analyzer"], path)
+    return pack
+
+
+class RulePackWatcher:
+    """
+    Keeps `build(pack)` up to date with a rule pack file.
+
+    current() returns the latest compiled object. It checks the file's mtime at
+    most once every `poll_interval` seconds and rebuilds when it changed; a reload
+    can also be forced with reload() or by a signal (see install_signal_handler).
+    If the new pack fails to load, the previous object stays in place and
+    `on_error(exception)` is called. `on_reload(obj, pack)` runs after each swap.
+    """
+
+    def __init__(self, path, build, poll_interval=1.0, on_reload=None, on_error=None):
+        self.path = os.fspath(path)
+        self.poll_interval = poll_interval
+        self._build = build
+        self._on_reload = on_reload
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._reload_requested = False
+        self._next_poll = 0.0
+        self.reloads = 0
+        self.failures = 0
+
+        # The first load is not allowed to fail: there is nothing to fall back to
+        self._stamp = self._file_stamp()
+        self.pack = load_rule_pack(self.path)
+        self._current = build(self.pack)
+        self._next_poll = time.monotonic() + poll_interval
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def current(self):
+        """Return the compiled object, reloading first if the file changed."""
+        if self._reload_requested or time.monotonic() >= self._next_poll:
+            self._poll()
+        return self._current
+
+    def _poll(self):
+        # Only one thread reloads; the others keep using the current object meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            forced = self._reload_requested
+            self._reload_requested = False
+            self._next_poll = time.monotonic() + self.poll_interval
+            try:
+                stamp = self._file_stamp()
+            except OSError as e:
+                self._failed(e)
+                return
+            if forced or stamp != self._stamp:
+                self._stamp = stamp
+                self._reload()
+        finally:
+            self._lock.release()
+
+    def _reload(self):
+        try:
+            pack = load_rule_pack(self.path)
+            compiled = self._build(pack)
+        except (OSError, RulePackError, ValueError) as e:
+            self._failed(e)
+            return
+        # Single reference assignment: callers see either the old object or the new one
+        self.pack = pack
+        self._current = compiled
+        self.reloads += 1
+        if self._on_reload is not None:
+            self._on_reload(compiled, pack)
+
+    def _failed(self, error):
+        self.failures += 1
+        if self._on_error is not None:
+            self._on_error(error)
+
+    def reload(self):
+        """Reload the pack now, even if the file looks unchanged."""
+        self._reload_requested = True
+        self._poll()
+        return self._current
+
+    def request_reload(self, *_):
+        """Ask for a reload on the next current() call; safe to call from a signal handler."""
+        self._reload_requested = True
+
+    def install_signal_handler(self, signum=None):
+        """Reload when the process receives `signum` (SIGHUP by default, where available)."""
+        import signal
+
+        if signum is None:
+            signum = getattr(signal, "SIGHUP", None)
+            if signum is None:
+                raise RulePackError("SIGHUP is not available on this platform; pass a signal number")
+        signal.signal(signum, self.request_reload)
+        return signum
@@ -0,0 +1,80 @@
+"""
+The SQLock database schema, shared by every storage backend.
+
+Tables are described once and rendered for MySQL (tests/setup_test_db.py against
+the shared server) or SQLite (the embedded backend in sqlock/storage.py):
+
+- users: accounts checked by authenticate_user
+- user_security: failed-attempt counters and lockouts
+- Logs: one row per security decision (Mitigation_SRC, /api/log)
+- Security_Event: incidents flagged by sqlock/tools/SQLlog.py
+"""
+
+# (table, ((column, definition), ...), indexed columns). "ID" is the auto-increment primary key.
+TABLES = (
+    ("users", (
+        ("id", "ID"),
+        ("username", "VARCHAR(255) NOT NULL UNIQUE"),
+        ("email", "VARCHAR(255)"),
+        ("password_hash", "VARCHAR(64) NOT NULL"),
+        ("created_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+    ), ()),
+    ("user_security", (
+        ("id", "ID"),
+        ("username", "VARCHAR(255) NOT NULL UNIQUE"),
+        ("failed_attempts", "INT DEFAULT 0"),
+        ("last_failed_attempt", "TIMESTAMP NULL"),
+        ("lockout_until", "TIMESTAMP NULL"),
+        ("lockout_reason", "VARCHAR(50) NULL"),
+    ), ("username", "lockout_until")),
+    ("Logs", (
+        ("id", "ID"),
+        ("ts_utc", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+        ("decision", "VARCHAR(16)"),
+        ("suspicion_score", "INT"),
+        ("query_template", "TEXT"),
+    ), ("ts_utc",)),
+    ("Security_Event", (
+        ("id", "ID"),
+        ("ts_utc", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+        ("decision", "VARCHAR(16)"),
+        ("suspicion_score", "INT"),
+        ("query_template", "TEXT"),
+    ), ()),
+)
+
+# Columns read back as datetime (SQLite stores them as ISO strings)
+TIMESTAMP_COLUMNS = frozenset(
+    name for _, columns, _ in TABLES for name, definition in columns if definition.startswith("TIMESTAMP")
+)
+
+TEST_USERS = [
+    ('admin', 'admin@test.com', 'admin123'),
+    ('test_user', 'test@test.com', 'testpass'),
+    ('VinayNair', 'vinay@test.com', 'password'),
+    ('john_doe', 'john@test.com', 'secret123'),
+]
+
+_ID_COLUMN = {
+    "mysql": "INT AUTO_INCREMENT PRIMARY KEY",
+    "sqlite": "INTEGER PRIMARY KEY AUTOINCREMENT",
+}
+
+def create_table_statements(dialect):
+    """CREATE TABLE / INDEX statements for "mysql" or "sqlite" (all IF NOT EXISTS)."""
+    if dialect not in _ID_COLUMN:
+        raise ValueError(f"Unknown SQL dialect {dialect!r}; expected one of {sorted(_ID_COLUMN)}")
+    statements = []
+    for table, columns, indexes in TABLES:
+        lines = [f"{name} {_ID_COLUMN[dialect] if definition == 'ID' else definition}" for name, definition in columns]
+        if dialect == "mysql":
+            lines += [f"INDEX idx_{column} ({column})" for column in indexes]
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ",\n    ".join(lines) + "\n)")
+        if dialect == "sqlite":
+            statements += [f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})" for column in indexes]
+    return statements
+
+def create_schema(cursor, dialect):
+    """Create every missing table on a DB-API cursor of the given dialect."""
+    for statement in create_table_statements(dialect):
+        cursor.execute(statement)
@@ -0,0 +1,361 @@
+"""
+Lockout state shared by the SQLock worker processes of one host.
+
+SharedLockoutTable keeps the same entries as Mitigation_SRC.LockoutCache
+(failed_attempts, lockout_until, lockout_reason, or None for a user without a
+user_security row) in a memory-mapped file, so a lockout written through by one
+worker is seen by every other worker at memory speed. MySQL stays the durable
+record; an entry only says what the database held when it was last read or
+written, until it expires.
+
+Layout: a header, one generation counter per bucket, then fixed-size slots.
+A username hashes to one bucket of `bucket_size` slots; when the bucket is full
+the slot closest to expiry is reused, so the file never grows.
+
+- writers lock the bucket: a thread lock in-process plus an fcntl record lock
+  on the bucket's generation counter across processes
+- readers take no lock; each slot carries a sequence number that is odd while
+  it is being written, and a read that saw it change is retried (seqlock)
+- every write bumps the bucket's generation, so a database read that raced
+  with a write is not stored (see LockoutCache.version)
+
+lockout_until is stored as the microseconds of its naive local datetime (the form
+the MySQL driver returns), so it round-trips exactly; expiry uses Unix time.
+Reasons are kept up to 64 bytes.
+The file is opened without following symlinks and refused unless it belongs to
+this user with no group/other permissions; the default one lives in a private
+0700 directory, so other local users cannot plant, read or forge it.
+POSIX only (fcntl).
+"""
+
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MAGIC = b"SQLKLOCK"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sIIII")       # magic, version, slots, bucket_size, slot size
+_HEADER_SIZE = 64
+_GENERATION = struct.Struct("<Q")
+# seq, flags, key hash, lockout_until, expires_at, failed_attempts, reason
+_SLOT = struct.Struct("<IIQqdi4x64s")
+_SEQ = struct.Struct("<I")
+
+_USED = 1
+_HAS_ROW = 2
+
+REASON_BYTES = 64
+
+_READ_ATTEMPTS = 10000
+_EMPTY_SLOT = (0, 0, 0, 0, 0.0, 0, b"")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def default_path():
+    """Per-user file in /dev/shm (RAM-backed) when available, else the temp directory."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"sqlock-{os.getuid() if hasattr(os, 'getuid') else 0}", "lockouts")
+
+
+def _check_private(st, path):
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} must belong to this user and not be accessible to group or others")
+
+
+def _private_directory(path):
+    """Create `path` with mode 0700 if needed; refuse it unless it is this user's private directory."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    _check_private(st, path)
+
+
+def _key_hash(username):
+    # 0 marks an empty slot, so it is never a key
+    return int.from_bytes(hashlib.blake2b(username.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class SharedLockoutTable:
+    """
+    mmap-backed lockout table with the LockoutCache interface: get, is_locked,
+    version, store, update, reset, invalidate, clear and stats.
+    """
+
+    MISS = object()
+
+    def __init__(self, path=None, slots=65536, bucket_size=8, ttl=30.0, negative_ttl=None):
+        if fcntl is None:
+            raise OSError("SharedLockoutTable needs fcntl (POSIX)")
+        if bucket_size < 1 or slots < bucket_size or slots % bucket_size:
+            raise ValueError("slots must be a positive multiple of bucket_size")
+        if path is None:
+            path = default_path()
+            _private_directory(os.path.dirname(path))
+        self.path = path
+        self.slots = slots
+        self.bucket_size = bucket_size
+        self.buckets = slots // bucket_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._slots_offset = _HEADER_SIZE + self.buckets * _GENERATION.size
+        size = self._slots_offset + slots * _SLOT.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        try:
+            st = os.fstat(self._fd)
+            if not stat.S_ISREG(st.st_mode):
+                raise PermissionError(f"{self.path} is not a regular file")
+            _check_private(st, self.path)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)  # The first process to open the file lays it out
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(MAGIC, FORMAT_VERSION, slots, bucket_size, _SLOT.size), 0)
+            header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            if header != (MAGIC, FORMAT_VERSION, slots, bucket_size, _SLOT.size):
+                raise ValueError(f"{self.path} holds a different lockout table layout: {header[1:]}")
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._map = mmap.mmap(self._fd, size)
+        self._init_locks()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _init_locks(self):
+        self._pid = os.getpid()
+        # fcntl record locks belong to the process, so threads also need an in-process lock
+        self._thread_locks = [threading.Lock() for _ in range(min(self.buckets, 64))]
+
+    # --- slots ---
+
+    def _bucket(self, key):
+        return key % self.buckets
+
+    def _slot_offset(self, bucket, index):
+        return self._slots_offset + (bucket * self.bucket_size + index) * _SLOT.size
+
+    def _read_slot(self, offset):
+        for attempt in range(_READ_ATTEMPTS):
+            seq = _SEQ.unpack_from(self._map, offset)[0]
+            if not seq & 1:
+                values = _SLOT.unpack_from(self._map, offset)
+                # Valid only if no write started during the copy
+                if values[0] == seq and _SEQ.unpack_from(self._map, offset)[0] == seq:
+                    return values
+            if attempt % 64 == 63:
+                time.sleep(0)  # Let the writer finish
+        # A writer died halfway through this slot (or it never settled): report it empty
+        return _EMPTY_SLOT
+
+    def _write_slot(self, offset, flags, key, lockout_until, expires_at, failed_attempts, reason):
+        seq = _SEQ.unpack_from(self._map, offset)[0]
+        writing = seq + 2 if seq & 1 else seq + 1  # Odd while the slot is being written
+        _SEQ.pack_into(self._map, offset, writing & 0xFFFFFFFF)
+        _SLOT.pack_into(self._map, offset, writing & 0xFFFFFFFF, flags, key, lockout_until, expires_at,
+                        failed_attempts, reason)
+        _SEQ.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+
+    def _find(self, key, now):
+        """(offset, slot values) of the live entry for `key`, or (None, None)."""
+        bucket = self._bucket(key)
+        for index in range(self.bucket_size):
+            offset = self._slot_offset(bucket, index)
+            values = self._read_slot(offset)
+            if values[1] & _USED and values[2] == key and values[4] > now:
+                return offset, values
+        return None, None
+
+    def _locked_bucket(self, key):
+        return _BucketLock(self, self._bucket(key))
+
+    def _generation_offset(self, bucket):
+        return _HEADER_SIZE + bucket * _GENERATION.size
+
+    def _bump_generation(self, bucket):
+        offset = self._generation_offset(bucket)
+        _GENERATION.pack_into(self._map, offset, _GENERATION.unpack_from(self._map, offset)[0] + 1)
+
+    @staticmethod
+    def _state(values):
+        if not values[1] & _HAS_ROW:
+            return None
+        lockout_until = _EPOCH + values[3] * _MICROSECOND if values[3] else None
+        reason = values[6].rstrip(b"\0").decode("utf-8", "ignore") or None
+        return (values[5], lockout_until, reason)
+
+    def _put(self, key, state, ttl, now):
+        bucket = self._bucket(key)
+        target = None
+        oldest = None
+        for index in range(self.bucket_size):
+            offset = self._slot_offset(bucket, index)
+            values = self._read_slot(offset)
+            if values[1] & _USED and values[2] == key:
+                target = offset
+                break
+            if target is None and (not values[1] & _USED or values[4] <= now):
+                target = offset
+            if oldest is None or values[4] < oldest[1]:
+                oldest = (offset, values[4])
+        if target is None:
+            target = oldest[0]
+            self.evictions += 1
+        if state is None:
+            self._write_slot(target, _USED, key, 0, now + ttl, 0, b"")
+        else:
+            failed_attempts, lockout_until, reason = state
+            self._write_slot(target, _USED | _HAS_ROW, key,
+                             (lockout_until - _EPOCH) // _MICROSECOND if lockout_until else 0, now + ttl,
+                             failed_attempts or 0, (reason or "").encode("utf-8")[:REASON_BYTES])
+
+    # --- LockoutCache interface ---
+
+    def get(self, username):
+        """The shared state (None for a user without a row), or SharedLockoutTable.MISS."""
+        _, values = self._find(_key_hash(username), time.time())
+        if values is None:
+            self.misses += 1
+            return self.MISS
+        state = self._state(values)
+        if state is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return state
+
+    def is_locked(self, username):
+        """True only if a live entry says the account is locked right now."""
+        state = self.get(username)
+        return state is not self.MISS and state is not None and bool(state[1]) and datetime.now() < state[1]
+
+    def version(self, username=None):
+        """Generation of the user's bucket; take it before reading from the database."""
+        offset = self._generation_offset(self._bucket(_key_hash(username or "")))
+        return _GENERATION.unpack_from(self._map, offset)[0]
+
+    def store(self, username, state, version):
+        key = _key_hash(username)
+        ttl = self.ttl if state is not None else self.negative_ttl
+        with self._locked_bucket(key) as bucket:
+            if _GENERATION.unpack_from(self._map, self._generation_offset(bucket))[0] != version:
+                return  # A helper wrote a newer state while the row was being read
+            self._put(key, tuple(state) if state is not None else None, ttl, time.time())
+
+    def update(self, username, failed_attempts=None, lockout_until=MISS, lockout_reason=MISS):
+        """Write a change through to a live entry (see LockoutCache.update)."""
+        key = _key_hash(username)
+        with self._locked_bucket(key) as bucket:
+            self._bump_generation(bucket)
+            now = time.time()
+            _, values = self._find(key, now)
+            if values is None:
+                return
+            attempts, until, reason = self._state(values) or (0, None, None)
+            if failed_attempts is not None:
+                attempts = failed_attempts
+            if lockout_until is not self.MISS:
+                until = lockout_until
+            if lockout_reason is not self.MISS:
+                reason = lockout_reason
+            self._put(key, (attempts, until, reason), self.ttl, now)
+
+    def reset(self, username):
+        """Mirror of the reset statement: SQL injection lockouts are kept."""
+        key = _key_hash(username)
+        with self._locked_bucket(key) as bucket:
+            self._bump_generation(bucket)
+            now = time.time()
+            _, values = self._find(key, now)
+            state = self._state(values) if values is not None else None
+            if state is not None and not (state[2] and 'SQL injection' in state[2]):
+                self._put(key, (0, None, state[2]), self.ttl, now)
+
+    def invalidate(self, username):
+        key = _key_hash(username)
+        with self._locked_bucket(key) as bucket:
+            self._bump_generation(bucket)
+            offset, _ = self._find(key, time.time())
+            if offset is not None:
+                self._write_slot(offset, 0, 0, 0, 0.0, 0, b"")
+
+    def clear(self):
+        """Drop every entry (for all processes)."""
+        for bucket in range(self.buckets):
+            with _BucketLock(self, bucket):
+                self._bump_generation(bucket)
+                for index in range(self.bucket_size):
+                    offset = self._slot_offset(bucket, index)
+                    if self._read_slot(offset)[1] & _USED:
+                        self._write_slot(offset, 0, 0, 0, 0.0, 0, b"")
+
+    def stats(self):
+        """Table counters; hits, misses and evictions are this process's own."""
+        now = time.time()
+        live = 0
+        for slot in range(self.slots):
+            values = self._read_slot(self._slots_offset + slot * _SLOT.size)
+            if values[1] & _USED and values[4] > now:
+                live += 1
+        return {
+            'size': live,
+            'capacity': self.slots,
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'path': self.path,
+        }
+
+    def close(self):
+        if self._fd < 0:
+            return
+        self._map.close()
+        os.close(self._fd)
+        self._fd = -1
+
+
+class _BucketLock:
+    """Exclusive access to one bucket, against threads and other processes."""
+
+    def __init__(self, table, bucket):
+        if table._pid != os.getpid():
+            table._init_locks()  # Forked child: the parent's thread locks may be held
+        self.table = table
+        self.bucket = bucket
+        self.thread_lock = table._thread_locks[bucket % len(table._thread_locks)]
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            fcntl.lockf(self.table._fd, fcntl.LOCK_EX, _GENERATION.size,
+                        self.table._generation_offset(self.bucket), os.SEEK_SET)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+        return self.bucket
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.lockf(self.table._fd, fcntl.LOCK_UN, _GENERATION.size,
+                        self.table._generation_offset(self.bucket), os.SEEK_SET)
+        finally:
+            self.thread_lock.release()
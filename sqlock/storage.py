@@ -0,0 +1,531 @@
+"""
+Storage backends for the SQLock database helpers.
+
+Every helper that touches users, user_security, Logs or Security_Event goes
+through the operations of a backend:
+
+- MySQLStorage(config): the shared MySQL server (through the lazy driver in
+  sqlock/db.py); the default
+- SQLiteStorage(path): an embedded SQLite database, in memory (":memory:") or
+  in a file, for single-node deployments, local runs and repeatable benchmarks
+
+A backend has connect(), create_schema(with_test_users=False), close(), `errors`
+(the namespace `db.Error`, `db.IntegrityError`, ... resolve to while it is in
+use; None: the MySQL driver's own classes) and one method per operation, e.g.
+lockout_state(cursor, username) or first_failure(cursor, ...). Operations run on
+a cursor of one of the backend's connections, so a caller can run several of
+them on one connection.
+
+Each backend writes its statements in its own dialect (see _statements): %s
+placeholders and INSERT ... ON DUPLICATE KEY UPDATE for MySQL, ? and
+INSERT ... ON CONFLICT DO UPDATE for SQLite. Policy (lockout durations, what to
+reset) stays with the callers.
+
+open_storage(url) picks a backend from a string such as SQLOCK_STORAGE:
+"mysql", "sqlite" (in memory) or "sqlite:PATH".
+"""
+
+import hashlib
+import os
+import threading
+import time
+import types
+from datetime import datetime
+
+from sqlock import db, schema
+
+MYSQL_ENV = {
+    'host': 'SQLOCK_DB_HOST',
+    'port': 'SQLOCK_DB_PORT',
+    'database': 'SQLOCK_DB_NAME',
+    'user': 'SQLOCK_DB_USER',
+    'password': 'SQLOCK_DB_PASSWORD',
+}
+
+def mysql_config(host='10.147.17.110', port=3306, database='sqlockdb', user='VinayNair', password='password',
+                 **extra):
+    """DB_CONFIG-style settings; SQLOCK_DB_HOST, _PORT, _NAME, _USER and _PASSWORD override the defaults."""
+    config = dict(host=host, port=port, database=database, user=user, password=password)
+    for key, variable in MYSQL_ENV.items():
+        if os.environ.get(variable):
+            config[key] = os.environ[variable]
+    config['port'] = int(config['port'])
+    config.update(extra)
+    return config
+
+
+# --- Operations ---
+
+def _statements(p, upsert, new):
+    """
+    The helpers' statements in one dialect: `p` is its placeholder, upsert(key) the
+    clause that turns an INSERT into an update of the row with the same `key`, and
+    new(column) the value the INSERT tried to write.
+    """
+    # lockout_until for the counter a statement increments, from the stored count: the
+    # ends given for the 5th+, 4th and 3rd failure. Assigned before the increment, so
+    # MySQL (which assigns left to right) and SQLite (which reads the old row) agree.
+    progressive_lockout = f"""
+    lockout_until = CASE
+        WHEN COALESCE(failed_attempts, 0) + 1 >= 5 THEN {p}
+        WHEN COALESCE(failed_attempts, 0) + 1 = 4 THEN {p}
+        WHEN COALESCE(failed_attempts, 0) + 1 = 3 THEN {p}
+        ELSE lockout_until
+    END"""
+    longer = f"lockout_until IS NULL OR lockout_until < {new('lockout_until')}"
+    return {
+        'insert_event': f"INSERT INTO Logs (decision, suspicion_score, query_template) VALUES ({p}, {p}, {p})",
+        'insert_events': "INSERT INTO Logs (decision, suspicion_score, query_template) VALUES ",
+        'event_row': f"({p}, {p}, {p})",
+        'insert_incident':
+            f"INSERT INTO Security_Event (decision, suspicion_score, query_template) VALUES ({p}, {p}, {p})",
+        'scan_logs': "SELECT * FROM logs",
+        'find_user': f"SELECT id, username, email FROM users WHERE id = {p}",
+        'user_exists': f"SELECT 1 FROM users WHERE username = {p}",
+        'insert_user': f"INSERT INTO users (username, email, password_hash) VALUES ({p}, {p}, {p})",
+        'count_users': "SELECT COUNT(*) FROM users",
+        'lockout_state': f"""
+    SELECT failed_attempts, lockout_until, lockout_reason
+    FROM user_security
+    WHERE username = {p}
+""",
+        'failed_attempts': f"SELECT failed_attempts FROM user_security WHERE username = {p}",
+        'insert_security_row': f"""
+    INSERT INTO user_security (username, failed_attempts, last_failed_attempt)
+    VALUES ({p}, {p}, {p})
+""",
+        'set_failed_attempts': f"""
+    UPDATE user_security
+    SET failed_attempts = {p}, last_failed_attempt = {p}, lockout_until = {p}
+    WHERE username = {p}
+""",
+        'sql_lockout': f"""
+    INSERT INTO user_security (username, failed_attempts, lockout_until, lockout_reason, last_failed_attempt)
+    VALUES ({p}, {p}, {p}, {p}, {p})
+    {upsert('username')}
+    lockout_until = {new('lockout_until')},
+    lockout_reason = {new('lockout_reason')},
+    last_failed_attempt = {new('last_failed_attempt')}
+""",
+        # Only reset if it's not an SQL injection lockout
+        'reset_failed_attempts': f"""
+    UPDATE user_security
+    SET failed_attempts = 0, lockout_until = NULL
+    WHERE username = {p} AND (lockout_reason IS NULL OR lockout_reason NOT LIKE '%SQL injection%')
+""",
+        # Keeps a longer lockout; the reason is assigned while lockout_until is still the stored one
+        'rate_limit_lockout': f"""
+    INSERT INTO user_security (username, failed_attempts, lockout_until, lockout_reason)
+    VALUES ({p}, {p}, {p}, {p})
+    {upsert('username')}
+    lockout_reason = CASE WHEN {longer} THEN {new('lockout_reason')} ELSE lockout_reason END,
+    lockout_until = CASE WHEN {longer} THEN {new('lockout_until')} ELSE lockout_until END
+""",
+        # Always returns exactly one row: the users columns are NULL for a wrong password,
+        # the user_security ones when the user has no security record yet
+        'login_state': f"""
+    SELECT u.id, u.username, u.email, s.username, s.failed_attempts, s.lockout_until, s.lockout_reason
+    FROM (SELECT 1) AS login
+    LEFT JOIN users u ON u.username = {p} AND u.password_hash = {p}
+    LEFT JOIN user_security s ON s.username = {p}
+""",
+        # Applies only if no other login changed the counter since it was read
+        'count_failure': f"""
+    UPDATE user_security
+    SET failed_attempts = {p}, last_failed_attempt = {p}, lockout_until = {p}
+    WHERE username = {p} AND COALESCE(failed_attempts, 0) = {p}
+""",
+        # First failure of a user without a security record; a concurrent first failure
+        # adds one and gets its progressive lockout in the same statement
+        'first_failure': f"""
+    INSERT INTO user_security (username, failed_attempts, last_failed_attempt)
+    VALUES ({p}, {p}, {p})
+    {upsert('username')}{progressive_lockout},
+    failed_attempts = COALESCE(failed_attempts, 0) + 1,
+    last_failed_attempt = {new('last_failed_attempt')}
+""",
+        # Counts a failure whatever the counter is now
+        'add_failure': f"""
+    UPDATE user_security
+    SET{progressive_lockout},
+    failed_attempts = COALESCE(failed_attempts, 0) + 1,
+    last_failed_attempt = {p}
+    WHERE username = {p}
+""",
+    }
+
+
+class _Operations:
+    """
+    The users, user_security, Logs and Security_Event operations of the helpers, run on
+    a cursor of one of this backend's connections. Subclasses set STATEMENTS.
+    """
+
+    STATEMENTS = None
+
+    def _run(self, cursor, statement, params=()):
+        cursor.execute(self.STATEMENTS[statement], params)
+        return cursor
+
+    # Logs and Security_Event
+
+    def insert_event(self, cursor, decision, score, query_text):
+        self._run(cursor, 'insert_event', (decision, score, query_text))
+
+    def insert_events(self, cursor, events):
+        """One multi-row INSERT of (decision, score, query_text) events into Logs."""
+        statement = self.STATEMENTS['insert_events'] + ", ".join([self.STATEMENTS['event_row']] * len(events))
+        cursor.execute(statement, [value for event in events for value in event])
+
+    def insert_incidents(self, cursor, incidents):
+        """executemany of (decision, score, query_text) rows into Security_Event."""
+        cursor.executemany(self.STATEMENTS['insert_incident'], incidents)
+
+    def scan_logs(self, cursor):
+        """Run SELECT * FROM logs; the caller fetches the rows."""
+        self._run(cursor, 'scan_logs')
+
+    # users
+
+    def find_user(self, cursor, user_id):
+        """(id, username, email) or None."""
+        return self._run(cursor, 'find_user', (user_id,)).fetchone()
+
+    def add_users(self, cursor, users=schema.TEST_USERS):
+        """
+        Insert (username, email, password) accounts that do not exist yet, hashing the
+        password with SHA-256 like authenticate_user. Returns the usernames created.
+        """
+        created = []
+        for username, email, password in users:
+            if self._run(cursor, 'user_exists', (username,)).fetchone():
+                continue
+            password_hash = hashlib.sha256(password.encode()).hexdigest()
+            self._run(cursor, 'insert_user', (username, email, password_hash))
+            created.append(username)
+        return created
+
+    def count_users(self, cursor):
+        return self._run(cursor, 'count_users').fetchone()[0]
+
+    # user_security
+
+    def lockout_state(self, cursor, username):
+        """(failed_attempts, lockout_until, lockout_reason), or None without a row."""
+        return self._run(cursor, 'lockout_state', (username,)).fetchone()
+
+    def failed_attempts(self, cursor, username):
+        """The stored counter, or None without a row."""
+        row = self._run(cursor, 'failed_attempts', (username,)).fetchone()
+        return row[0] if row else None
+
+    def insert_security_row(self, cursor, username, now):
+        self._run(cursor, 'insert_security_row', (username, 0, now))
+
+    def set_failed_attempts(self, cursor, username, failed_attempts, now, lockout_until):
+        self._run(cursor, 'set_failed_attempts', (failed_attempts, now, lockout_until, username))
+
+    def sql_lockout(self, cursor, username, lockout_until, reason, now):
+        """Create or update the row with the given lockout; the counter is left alone."""
+        self._run(cursor, 'sql_lockout', (username, 0, lockout_until, reason, now))
+
+    def reset_failed_attempts(self, cursor, username):
+        """Clear the counter and lockout unless it is an SQL injection lockout."""
+        self._run(cursor, 'reset_failed_attempts', (username,))
+
+    def rate_limit_lockout(self, cursor, username, lockout_until, reason):
+        """Create or update the row with the given lockout unless it already has a longer one."""
+        self._run(cursor, 'rate_limit_lockout', (username, 0, lockout_until, reason))
+
+    def login_state(self, cursor, username, password_hash):
+        """
+        (user id, username, email, security username, failed_attempts, lockout_until,
+        lockout_reason): the user columns are None for a wrong password, the security
+        ones without a row.
+        """
+        return self._run(cursor, 'login_state', (username, password_hash, username)).fetchall()[0]
+
+    def count_failure(self, cursor, username, expected, now, lockout_until):
+        """Set the counter to expected + 1 if it still is `expected`; returns whether it was."""
+        self._run(cursor, 'count_failure', (expected + 1, now, lockout_until, username, expected))
+        return cursor.rowcount > 0
+
+    def first_failure(self, cursor, username, now, lockout_ends):
+        """
+        Count a first failure, creating the row. If another one created it first, its
+        counter goes up instead, locked out until lockout_ends[0], [1] or [2] when it
+        reaches 5+, 4 or 3.
+        """
+        self._run(cursor, 'first_failure', (username, 1, now) + tuple(lockout_ends))
+
+    def add_failure(self, cursor, username, now, lockout_ends):
+        """Add one to the counter whatever it is, with the lockout_ends of first_failure."""
+        self._run(cursor, 'add_failure', tuple(lockout_ends) + (now, username))
+
+
+class MySQLStorage(_Operations):
+    name = "mysql"
+    errors = None  # The driver's own exception classes
+    STATEMENTS = _statements("%s", lambda key: "ON DUPLICATE KEY UPDATE", lambda column: f"VALUES({column})")
+
+    def __init__(self, config):
+        self.config = config  # Kept by reference: later changes to DB_CONFIG apply to new connections
+
+    def connect(self):
+        return db.connect(self.config)
+
+    def create_schema(self, with_test_users=False):
+        """Create the missing tables (and the test accounts); returns the usernames created."""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            schema.create_schema(cursor, "mysql")
+            created = self.add_users(cursor) if with_test_users else []
+            connection.commit()
+            cursor.close()
+            return created
+        finally:
+            connection.close()
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"MySQLStorage({self.config.get('host')}:{self.config.get('port')}/{self.config.get('database')})"
+
+
+# --- SQLite ---
+
+class Error(Exception):
+    """Base of the errors raised by SQLite connections (DB-API names, like the MySQL driver's)."""
+
+    def __init__(self, msg=None, errno=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.errno = errno
+
+class InterfaceError(Error):
+    pass
+
+class DatabaseError(Error):
+    pass
+
+class OperationalError(DatabaseError):
+    pass
+
+class IntegrityError(DatabaseError):
+    pass
+
+class ProgrammingError(DatabaseError):
+    pass
+
+class PoolError(Error):
+    pass
+
+SQLITE_ERRORS = types.SimpleNamespace(
+    Error=Error, InterfaceError=InterfaceError, DatabaseError=DatabaseError, OperationalError=OperationalError,
+    IntegrityError=IntegrityError, ProgrammingError=ProgrammingError, PoolError=PoolError,
+)
+
+def _driver_error(error):
+    import sqlite3
+    if isinstance(error, sqlite3.IntegrityError):
+        return IntegrityError(msg=str(error))
+    if isinstance(error, sqlite3.OperationalError):
+        return OperationalError(msg=str(error))
+    if isinstance(error, sqlite3.ProgrammingError):
+        return ProgrammingError(msg=str(error))
+    return DatabaseError(msg=str(error))
+
+# Datetimes are stored as ISO strings and TIMESTAMP columns come back as datetime, like
+# MySQL's. Converted here rather than with sqlite3.register_adapter/_converter, which
+# would change every SQLite connection of the process.
+
+def _to_sqlite(params):
+    return [value.isoformat(" ") if isinstance(value, datetime) else value for value in params]
+
+def _from_sqlite(cursor, row):
+    description = cursor.description
+    if not any(column[0] in schema.TIMESTAMP_COLUMNS for column in description):
+        return row
+    return tuple(
+        datetime.fromisoformat(value) if isinstance(value, str) and column[0] in schema.TIMESTAMP_COLUMNS else value
+        for column, value in zip(description, row)
+    )
+
+
+class _SQLiteCursor:
+    def __init__(self, connection):
+        self._storage = connection._storage
+        self._lock = connection._lock
+        self._cursor = connection._raw.cursor()
+
+    def _run(self, method, query, params):
+        import sqlite3
+        self._storage._round_trip()
+        with self._lock:
+            try:
+                method(query, params)
+            except sqlite3.Error as error:
+                raise _driver_error(error) from error
+
+    def execute(self, query, params=()):
+        self._run(self._cursor.execute, query, _to_sqlite(params))
+
+    def executemany(self, query, seq_params):
+        self._run(self._cursor.executemany, query, (_to_sqlite(params) for params in seq_params))
+
+    def fetchone(self):
+        with self._lock:
+            return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        with self._lock:
+            return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        with self._lock:
+            return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class _SQLiteConnection:
+    """Autocommit connection, like DB_CONFIG's MySQL ones; commit() and rollback() are no-ops."""
+
+    def __init__(self, storage, raw, lock, owned):
+        self._storage = storage
+        self._raw = raw
+        self._lock = lock
+        self._owned = owned
+        self._open = True
+
+    def cursor(self):
+        return _SQLiteCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        if self._open and self._owned:
+            self._raw.close()
+        self._open = False
+
+
+class SQLiteStorage(_Operations):
+    """
+    Embedded SQLite backend. ":memory:" keeps one database shared by every connection
+    of the process (statements are serialized); a file path gives each connection its
+    own SQLite handle in WAL mode, so several processes can use the same file.
+    connect_latency and query_latency (seconds) simulate a database server's round
+    trips for benchmarks; stats() counts connections and statements.
+    """
+
+    name = "sqlite"
+    errors = SQLITE_ERRORS
+    STATEMENTS = _statements("?", lambda key: f"ON CONFLICT({key}) DO UPDATE SET", lambda column: f"excluded.{column}")
+
+    def __init__(self, path=":memory:", busy_timeout=5.0, connect_latency=0.0, query_latency=0.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.connect_latency = connect_latency
+        self.query_latency = query_latency
+        self._shared = None
+        self._shared_lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'connects': 0, 'statements': 0}
+
+    def _open(self):
+        import sqlite3
+        raw = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None)
+        raw.row_factory = _from_sqlite
+        if self.path != ":memory:":
+            raw.execute("PRAGMA journal_mode=WAL")
+        return raw
+
+    def _round_trip(self):
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        with self._stats_lock:
+            self._stats['statements'] += 1
+
+    def connect(self):
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+        with self._stats_lock:
+            self._stats['connects'] += 1
+        if self.path == ":memory:":
+            with self._shared_lock:
+                if self._shared is None:
+                    self._shared = self._open()
+            return _SQLiteConnection(self, self._shared, self._shared_lock, owned=False)
+        # The pool hands a connection to one thread at a time, so a per-connection lock is uncontended
+        return _SQLiteConnection(self, self._open(), threading.RLock(), owned=True)
+
+    def create_schema(self, with_test_users=False):
+        """Create the missing tables (and the test accounts); returns the usernames created."""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            schema.create_schema(cursor, "sqlite")
+            created = self.add_users(cursor) if with_test_users else []
+            cursor.close()
+            return created
+        finally:
+            connection.close()
+
+    def stats(self):
+        """Connections opened and statements run so far."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def close(self):
+        """Close the shared in-memory database (its data is gone afterwards)."""
+        with self._shared_lock:
+            if self._shared is not None:
+                self._shared.close()
+                self._shared = None
+
+    def __repr__(self):
+        return f"SQLiteStorage({self.path})"
+
+
+def open_storage(url=None, config=None):
+    """
+    Backend for `url`: "mysql" (default, using `config`), "sqlite" / "sqlite::memory:"
+    for an in-memory database or "sqlite:PATH" for a database file.
+    """
+    url = (url or "mysql").strip()
+    if url == "mysql":
+        return MySQLStorage(config if config is not None else mysql_config())
+    if url == "sqlite":
+        return SQLiteStorage()
+    if url.startswith("sqlite:"):
+        return SQLiteStorage(url[len("sqlite:"):] or ":memory:")
+    raise ValueError(f"Unknown storage {url!r}; expected 'mysql', 'sqlite' or 'sqlite:PATH'")
@@ -11,6 +11,10 @@ type PythonAnalyzeResult = {
   success: boolean;
   incidents_found: number;
   incidents_saved: number;
+  rows_scanned?: number;
+  startup_ms?: number;
+  analysis_ms?: number;
+  peak_rss_mb?: number | null;
   raw_output?: string;
 };
 
@@ -3,6 +3,7 @@ import { execFile } from "child_process";
 import { promisify } from "util";
 import path from "path";
 import { existsSync } from "fs";
+import net from "net";
 
 const execFileAsync = promisify(execFile);
 
@@ -10,11 +11,14 @@ const execFileAsync = promisify(execFile);
   query?: unknown;
   username?: unknown;
   applyLockout?: unknown;
+  explain?: unknown;
 };
 
- function extractPayload(body: unknown): { query: string; username?: string; applyLockout: boolean } | null {
+ function extractPayload(
+  body: unknown,
+): { query: string; username?: string; applyLockout: boolean; explain: boolean } | null {
   if (typeof body !== "object" || body === null) return null;
-  const { query, username, applyLockout } = body as MitigationRequestBody;
+  const { query, username, applyLockout, explain } = body as MitigationRequestBody;
   if (typeof query !== "string" || !query.trim()) {
     return null;
   }
@@ -25,6 +29,7 @@ const execFileAsync = promisify(execFile);
     query: query.trim(),
     username: normalizedUsername,
     applyLockout: Boolean(applyLockout),
+    explain: Boolean(explain),
   };
 }
 
@@ -34,8 +39,46 @@ const execFileAsync = promisify(execFile);
   pattern?: string | null;
   score?: number;
   lockout_applied?: boolean;
+  matches?: { rule: string; weight: number }[];
+  raw_score?: number;
 };
 
+ // When the mitigation daemon is running (`python Mitigation_SRC.py --serve --socket PATH`
+ // or `--port N`), requests go to it over JSON lines instead of spawning Python each time.
+ function daemonAddress(): net.NetConnectOpts | null {
+  const socketPath = process.env.SQLOCK_DAEMON_SOCKET;
+  if (socketPath) return { path: socketPath };
+  const port = Number(process.env.SQLOCK_DAEMON_PORT);
+  if (Number.isInteger(port) && port > 0) return { host: "127.0.0.1", port };
+  return null;
+}
+
+ function queryDaemon(
+  address: net.NetConnectOpts,
+  request: Record<string, unknown>,
+  timeoutMs: number,
+): Promise<MitigationCliResult> {
+  return new Promise((resolve, reject) => {
+    const socket = net.createConnection(address);
+    let buffer = "";
+    socket.setTimeout(timeoutMs, () => socket.destroy(new Error("Mitigation daemon timed out")));
+    socket.on("connect", () => socket.write(JSON.stringify(request) + "\n"));
+    socket.on("data", (chunk) => {
+      buffer += chunk.toString();
+      const newline = buffer.indexOf("\n");
+      if (newline === -1) return;
+      socket.end();
+      try {
+        resolve(JSON.parse(buffer.slice(0, newline)) as MitigationCliResult);
+      } catch (parseError) {
+        reject(parseError);
+      }
+    });
+    socket.on("error", reject);
+    socket.on("close", () => reject(new Error("Mitigation daemon closed the connection")));
+  });
+}
+
  function resolvePythonExecutable(): string {
   const cwd = process.cwd();
   const candidates = [
@@ -64,34 +107,62 @@ const execFileAsync = promisify(execFile);
       return NextResponse.json({ error: "Query text is required." }, { status: 400 });
     }
 
-    const pythonExe = resolvePythonExecutable();
-    const mitigationScript = path.join(process.cwd(), "Mitigation_SRC.py");
-    const args = [mitigationScript, "--query", payload.query];
-
-    if (payload.username) {
-      args.push("--username", payload.username);
+    let cliResult: MitigationCliResult = {};
+    const daemon = daemonAddress();
+    let daemonAnswered = false;
+
+    if (daemon) {
+      try {
+        cliResult = await queryDaemon(
+          daemon,
+          {
+            query: payload.query,
+            username: payload.username ?? null,
+            apply_lockout: payload.applyLockout,
+            explain: payload.explain,
+          },
+          5000,
+        );
+        daemonAnswered = true;
+      } catch (daemonError) {
+        // Fall back to a one-off process so a stopped daemon does not take the route down
+        console.error("Mitigation daemon unavailable, spawning the CLI instead", daemonError);
+      }
     }
 
-    if (payload.applyLockout) {
-      args.push("--apply-lockout");
-    }
+    if (!daemonAnswered) {
+      const pythonExe = resolvePythonExecutable();
+      const mitigationScript = path.join(process.cwd(), "Mitigation_SRC.py");
+      const args = [mitigationScript, "--query", payload.query];
 
-    const { stdout, stderr } = await execFileAsync(pythonExe, args, {
-      timeout: 15000,
-      windowsHide: true,
-    });
+      if (payload.username) {
+        args.push("--username", payload.username);
+      }
 
-    const stdoutText = stdout?.toString()?.trim() ?? "";
-    const stderrText = stderr?.toString()?.trim() ?? "";
+      if (payload.applyLockout) {
+        args.push("--apply-lockout");
+      }
 
-    let cliResult: MitigationCliResult = {};
-    if (stdoutText) {
-      const lastLine = stdoutText.split("\n").pop();
-      if (lastLine) {
-        try {
-          cliResult = JSON.parse(lastLine) as MitigationCliResult;
-        } catch (parseError) {
-          console.error("Failed to parse mitigation output", parseError, stdoutText, stderrText);
+      if (payload.explain) {
+        args.push("--explain");
+      }
+
+      const { stdout, stderr } = await execFileAsync(pythonExe, args, {
+        timeout: 15000,
+        windowsHide: true,
+      });
+
+      const stdoutText = stdout?.toString()?.trim() ?? "";
+      const stderrText = stderr?.toString()?.trim() ?? "";
+
+      if (stdoutText) {
+        const lastLine = stdoutText.split("\n").pop();
+        if (lastLine) {
+          try {
+            cliResult = JSON.parse(lastLine) as MitigationCliResult;
+          } catch (parseError) {
+            console.error("Failed to parse mitigation output", parseError, stdoutText, stderrText);
+          }
         }
       }
     }
@@ -112,6 +183,7 @@ const execFileAsync = promisify(execFile);
       pattern: cliResult.pattern,
       score: cliResult.score,
       lockout_applied: cliResult.lockout_applied,
+      ...(payload.explain ? { matches: cliResult.matches ?? [], raw_score: cliResult.raw_score } : {}),
     });
   } catch (error) {
     console.error("Mitigation execution failed", error);
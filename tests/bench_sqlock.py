@@ -0,0 +1,360 @@
+"""
+SQLock Benchmark Suite - throughput and p50/p99 latency for the hot paths
+
+Measures, against the fixed corpora in tests/corpora/:
+- normalize_quotes and detect_sql_injection_patterns (benign and malicious inputs)
+- authenticate_user against the embedded in-memory SQLite backend (sqlock/storage.py)
+- SQLlog.analyze_logs_from_database over a SQLite logs table of 10k, 1M and 10M rows
+
+Results are printed (or written with --output) as one JSON document, so runs can
+be diffed; --compare BASELINE.json exits non-zero when a result regressed.
+
+Run with:
+    python tests/bench_sqlock.py                        # everything, default sizes
+    python tests/bench_sqlock.py --only detect --calls 50000
+    python tests/bench_sqlock.py --log-rows 10000,1000000 --output bench.json
+    python tests/bench_sqlock.py --compare bench.json --tolerance 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(parent_dir, "sqlock", "tools"))
+
+import Mitigation_SRC
+from sqlock.storage import SQLiteStorage
+
+CORPUS_DIR = os.path.join(current_dir, "corpora")
+BENCHMARKS = ("normalize_quotes", "detect", "authenticate", "log_analyzer")
+DEFAULT_LOG_ROWS = (10_000, 1_000_000, 10_000_000)
+
+# Share of malicious messages in the generated logs table
+LOG_MALICIOUS_EVERY = 50
+
+
+def load_corpus(name):
+    """Return the inputs of tests/corpora/<name>.txt, one per line."""
+    with open(os.path.join(CORPUS_DIR, f"{name}.txt"), encoding="utf-8") as f:
+        return [line for line in f.read().splitlines() if line]
+
+
+def _percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def latency_stats(latencies_ns):
+    """p50 / p99 / max in microseconds for a list of per-call timings."""
+    ordered = sorted(latencies_ns)
+    return {
+        'p50_us': round(_percentile(ordered, 50) / 1000, 3),
+        'p99_us': round(_percentile(ordered, 99) / 1000, 3),
+        'max_us': round(ordered[-1] / 1000, 3),
+    }
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(func, inputs, calls):
+    """
+    Call func over `inputs` (cycling) `calls` times. Latencies are timed per call;
+    throughput comes from a second, untimed loop so timer overhead does not count.
+    """
+    n = len(inputs)
+    latencies = []
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(calls):
+        value = inputs[i % n]
+        start = perf_counter_ns()
+        func(value)
+        latencies.append(perf_counter_ns() - start)
+
+    start = time.perf_counter()
+    for i in range(calls):
+        func(inputs[i % n])
+    elapsed = time.perf_counter() - start
+
+    result = {'calls': calls, 'ops_per_sec': round(calls / elapsed, 1)}
+    result.update(latency_stats(latencies))
+    return result
+
+
+@contextlib.contextmanager
+def _quiet_workdir():
+    """Run in a scratch directory with stdout silenced (the helpers log to ./pseudo_log.txt and print)."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield scratch
+        finally:
+            os.chdir(previous)
+
+
+def bench_normalize_quotes(corpora, calls):
+    results = []
+    for name, inputs in corpora.items():
+        result = {'benchmark': 'normalize_quotes', 'corpus': name}
+        result.update(measure(Mitigation_SRC.normalize_quotes, inputs, calls))
+        results.append(result)
+    return results
+
+
+def _prefilter_counts():
+    prefilter = Mitigation_SRC.DEFAULT_RULESET.prefilter
+    if prefilter is None:
+        return 0, 0
+    stats = prefilter.stats()
+    return stats['checked'], stats['skipped']
+
+
+def bench_detect(corpora, calls):
+    results = []
+    for name, inputs in corpora.items():
+        flagged = sum(Mitigation_SRC.detect_sql_injection_patterns(value)[0] for value in inputs)
+        result = {'benchmark': 'detect_sql_injection_patterns', 'corpus': name,
+                  'flagged': flagged, 'corpus_size': len(inputs)}
+        checked_before, skipped_before = _prefilter_counts()
+        result.update(measure(Mitigation_SRC.detect_sql_injection_patterns, inputs, calls))
+        checked, skipped = _prefilter_counts()
+        # Share of calls the prefilter answered without running the rules
+        if checked > checked_before:
+            result['prefilter_skip_rate'] = round((skipped - skipped_before) / (checked - checked_before), 4)
+        results.append(result)
+    return results
+
+
+def _auth_scenarios(corpora, users):
+    """(name, [(username, password), ...]) login mixes for the authentication benchmark."""
+    return [
+        ("valid_login", [(u, p) for u, _, p in users]),
+        # Unknown accounts: each miss goes through record_failed_login without piling up lockouts
+        ("wrong_password", [(f"bench_user_{i}", "not-the-password") for i in range(1000)]),
+        ("sqli_username", [(payload, "whatever") for payload in corpora['malicious']]),
+    ]
+
+
+def bench_authenticate(corpora, calls, connect_latency=0.0, query_latency=0.0):
+    users = [(f"user{i}", f"user{i}@test.com", f"pass{i}!") for i in range(100)]
+    results = []
+    previous = Mitigation_SRC.get_storage()
+    with _quiet_workdir():
+        for name, logins in _auth_scenarios(corpora, users):
+            storage = SQLiteStorage(connect_latency=connect_latency, query_latency=query_latency)
+            storage.create_schema()
+            connection = storage.connect()
+            storage.add_users(connection.cursor(), users)
+            connection.close()
+            Mitigation_SRC.use_storage(storage)
+            try:
+                # Warm the code path once before measuring
+                Mitigation_SRC.authenticate_user(*logins[0])
+                storage.reset_stats()
+
+                result = {'benchmark': 'authenticate_user', 'scenario': name,
+                          'connect_latency_ms': connect_latency * 1000, 'query_latency_ms': query_latency * 1000}
+                result.update(measure(lambda login: Mitigation_SRC.authenticate_user(*login), logins, calls))
+                # measure() makes 2 * calls calls in total
+                stats = storage.stats()
+                result['connects_per_call'] = round(stats['connects'] / (2 * calls), 2)
+                result['queries_per_call'] = round(stats['statements'] / (2 * calls), 2)
+                results.append(result)
+            finally:
+                Mitigation_SRC.use_storage(previous)
+                storage.close()
+    return results
+
+
+def build_log_database(path, rows, corpora):
+    """Create a SQLite logs table with `rows` rows drawn from the corpora."""
+    benign, malicious = corpora['benign'], corpora['malicious']
+    start_time = datetime(2026, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE logs (id INTEGER PRIMARY KEY, timestamp TEXT, level TEXT, message TEXT, source TEXT)"
+    )
+
+    def generate():
+        for i in range(rows):
+            if i % LOG_MALICIOUS_EVERY == 0:
+                message = f"login username={malicious[(i // LOG_MALICIOUS_EVERY) % len(malicious)]}"
+            else:
+                message = f"login username={benign[i % len(benign)]}"
+            yield (i, (start_time + timedelta(seconds=i)).isoformat(" "), "info", message, "auth")
+
+    conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?, ?)", generate())
+    conn.commit()
+    conn.close()
+
+
+def bench_log_analyzer(corpora, row_counts, repeats):
+    import SQLlog
+
+    results = []
+    with _quiet_workdir() as scratch:
+        for rows in row_counts:
+            path = os.path.join(scratch, f"logs_{rows}.db")
+            build_log_database(path, rows, corpora)
+
+            runs = repeats if rows <= 100_000 else 1
+            timings = []
+            flagged = 0
+            with mock.patch.object(SQLlog, "connect_db", lambda streaming=False: sqlite3.connect(path)), \
+                    contextlib.redirect_stderr(io.StringIO()):
+                for _ in range(runs):
+                    start = time.perf_counter_ns()
+                    flagged = len(SQLlog.analyze_logs_from_database())
+                    timings.append(time.perf_counter_ns() - start)
+            os.remove(path)
+
+            best = min(timings)
+            result = {
+                'benchmark': 'analyze_logs_from_database',
+                'rows': rows,
+                'runs': runs,
+                'flagged': flagged,
+                'seconds': round(best / 1e9, 3),
+                'rows_per_sec': round(rows / (best / 1e9), 1),
+                'peak_rss_mb': _peak_rss_mb(),
+            }
+            if runs > 1:
+                stats = latency_stats(timings)
+                result['p50_ms'] = round(stats['p50_us'] / 1000, 3)
+                result['p99_ms'] = round(stats['p99_us'] / 1000, 3)
+            results.append(result)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(only=BENCHMARKS, calls=20000, auth_calls=2000, log_rows=DEFAULT_LOG_ROWS, log_repeats=5,
+                   connect_latency=0.0, query_latency=0.0):
+    """Run the selected benchmarks and return the JSON-ready report."""
+    corpora = {'benign': load_corpus("benign"), 'malicious': load_corpus("malicious")}
+    results = []
+    if "normalize_quotes" in only:
+        results += bench_normalize_quotes(corpora, calls)
+    if "detect" in only:
+        results += bench_detect(corpora, calls)
+    if "authenticate" in only:
+        results += bench_authenticate(corpora, auth_calls, connect_latency, query_latency)
+    if "log_analyzer" in only:
+        results += bench_log_analyzer(corpora, log_rows, log_repeats)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'ruleset_version': Mitigation_SRC.DEFAULT_RULESET.version,
+        },
+        'results': results,
+    }
+
+
+def result_key(result):
+    """Identify a result across runs (benchmark plus corpus / scenario / row count)."""
+    return "/".join(str(result[k]) for k in ("benchmark", "corpus", "scenario", "rows") if k in result)
+
+
+# Higher is better for throughput, lower is better for latency
+_HIGHER_IS_BETTER = ("ops_per_sec", "rows_per_sec")
+_LOWER_IS_BETTER = ("p50_us", "p99_us", "seconds", "p50_ms", "p99_ms")
+
+
+def compare_reports(baseline, current, tolerance=0.25):
+    """Return a list of regressions: metrics more than `tolerance` worse than the baseline."""
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        for metric in _HIGHER_IS_BETTER + _LOWER_IS_BETTER:
+            if not before.get(metric) or metric not in result:
+                continue
+            ratio = result[metric] / before[metric]
+            worse = ratio < 1 / (1 + tolerance) if metric in _HIGHER_IS_BETTER else ratio > 1 + tolerance
+            if worse:
+                regressions.append({'result': result_key(result), 'metric': metric,
+                                    'baseline': before[metric], 'current': result[metric]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQLock benchmark suite")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--calls", type=int, default=20000, help="Calls per corpus for the detector benchmarks")
+    parser.add_argument("--auth-calls", type=int, default=2000, help="Logins per authentication scenario")
+    parser.add_argument("--log-rows", default=",".join(map(str, DEFAULT_LOG_ROWS)),
+                        help="Comma-separated logs table sizes for the analyzer benchmark")
+    parser.add_argument("--log-repeats", type=int, default=5, help="Analyzer runs per size up to 100k rows")
+    parser.add_argument("--connect-latency-ms", type=float, default=0.0, help="Simulated cost of opening a DB connection")
+    parser.add_argument("--query-latency-ms", type=float, default=0.0, help="Simulated round trip per DB query")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report; exit with status 1 if any result regressed")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before --compare fails")
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(
+        only=only,
+        calls=args.calls,
+        auth_calls=args.auth_calls,
+        log_rows=[int(rows) for rows in args.log_rows.split(",") if rows],
+        log_repeats=args.log_repeats,
+        connect_latency=args.connect_latency_ms / 1000,
+        query_latency=args.query_latency_ms / 1000,
+    )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report['regressions'] = compare_reports(json.load(f), report, args.tolerance)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
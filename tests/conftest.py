@@ -0,0 +1,121 @@
+"""
+SQLock test fixtures - an embedded SQLite database for the Mitigation_SRC helpers (no MySQL needed)
+
+Usage:
+    def test_login(db):
+        authenticate_user("alice", "secret")
+
+    def test_latency(local_db):
+        db = local_db(query_latency=0.02)
+        db.add_user("admin", "admin@test.com", "admin123")
+        authenticate_user("admin", "admin123")
+        print(db.connects, db.queries)
+"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Mitigation_SRC
+from sqlock.storage import SQLiteStorage
+
+
+class LocalDatabase:
+    """
+    In-memory SQLiteStorage with the SQLock tables, used by the helpers while a test runs.
+    connect_latency / query_latency (seconds) simulate network round trips.
+    `connects` and `queries` count what the code under test asked for: the statements
+    run through add_user, execute and fetchall are left out.
+    """
+
+    def __init__(self, connect_latency=0.0, query_latency=0.0):
+        self.storage = SQLiteStorage(connect_latency=connect_latency, query_latency=query_latency)
+        self.storage.create_schema()
+        self._connection = self.storage.connect()
+        self._own_statements = 0
+        self.reset_counters()
+
+    @property
+    def query_latency(self):
+        return self.storage.query_latency
+
+    @query_latency.setter
+    def query_latency(self, seconds):
+        self.storage.query_latency = seconds
+
+    @property
+    def connects(self):
+        return self.storage.stats()['connects']
+
+    @property
+    def queries(self):
+        return self.storage.stats()['statements'] - self._own_statements
+
+    def execute(self, query, params=()):
+        """Run a statement in SQLite's dialect on the test's own connection."""
+        self._own_statements += 1
+        cursor = self._connection.cursor()
+        cursor.execute(query, params)
+        return cursor
+
+    def fetchall(self, query, params=()):
+        """Run a read query and return its rows."""
+        cursor = self.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    def add_user(self, username, email, password):
+        """Create a user the same way tests/setup_test_db.py does."""
+        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        self.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                     (username, email, password_hash)).close()
+
+    def reset_counters(self):
+        self.storage.reset_stats()
+        self._own_statements = 0
+
+    def close(self):
+        self._connection.close()
+        self.storage.close()
+
+
+@pytest.fixture
+def local_db():
+    """
+    Opens LocalDatabase(**latency) and switches the helpers to it; the previous
+    storage is back once the test ends.
+    """
+    previous = Mitigation_SRC.get_storage()
+    opened = []
+
+    def open_local_db(**latency):
+        database = LocalDatabase(**latency)
+        Mitigation_SRC.use_storage(database.storage)
+        opened.append(database)
+        return database
+
+    yield open_local_db
+    Mitigation_SRC.use_storage(previous)
+    for database in opened:
+        database.close()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, local_db):
+    """
+    LocalDatabase with the user alice (password "secret"), run from tmp_path so the
+    activity log stays there. The opt-in lockout cache and rate limit are off again
+    afterwards.
+    """
+    monkeypatch.chdir(tmp_path)
+    database = local_db()
+    database.add_user("alice", "alice@test.com", "secret")
+    yield database
+    Mitigation_SRC.disable_lockout_cache()
+    Mitigation_SRC.disable_login_rate_limit()
@@ -1,122 +1,96 @@
 """
 SQLock Database Setup - Create tables and test users for security testing
+
+Creates the tables from sqlock/schema.py on the MySQL server (DB_CONFIG, see
+sqlock/storage.py for the SQLOCK_DB_* overrides) or, with --storage sqlite:PATH,
+in an embedded SQLite database file.
 """
 
-import mysql.connector
-import hashlib
-from datetime import datetime
+import argparse
+import os
+import sys
+
+# Add parent directory to path for importing the sqlock helpers
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlock import db
+from sqlock.schema import TABLES, TEST_USERS, create_schema
+from sqlock.storage import mysql_config, open_storage
 
 # Database configuration - should match Mitigation-SRC
-DB_CONFIG = {
-    'host': '10.147.17.110',
-    'database': 'sqlockdb',
-    'user': 'VinayNair',
-    'password': 'password',
-    'port': 3306,
-    'autocommit': True,
-    'connect_timeout': 10
-}
+DB_CONFIG = mysql_config(user='VinayNair', autocommit=True, connect_timeout=10)
 
-def setup_database():
+def setup_database(storage_url=None):
     """Create required tables and test users"""
-    print("Setting up SQLock database...")
+    storage = open_storage(storage_url, DB_CONFIG)
+    db.use_errors(storage.errors)
+    print(f"Setting up SQLock database ({storage})...")
     
+    connection = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = storage.connect()
         cursor = connection.cursor()
         
-        # Create users table
-        print("Creating users table...")
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(255) NOT NULL UNIQUE,
-            email VARCHAR(255),
-            password_hash VARCHAR(64) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        print("Users table ready")
-        
-        # Create user_security table for lockout functionality
-        print("Creating user_security table...")
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_security (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(255) NOT NULL UNIQUE,
-            failed_attempts INT DEFAULT 0,
-            last_failed_attempt TIMESTAMP NULL,
-            lockout_until TIMESTAMP NULL,
-            lockout_reason VARCHAR(50) NULL,
-            INDEX idx_username (username),
-            INDEX idx_lockout_until (lockout_until)
-        )
-        """)
-        print("User security table ready")
-        
-        # Add lockout_reason column if it doesn't exist (for existing tables)
-        try:
-            cursor.execute("""
-            ALTER TABLE user_security 
-            ADD COLUMN lockout_reason VARCHAR(50) NULL DEFAULT NULL
-            """)
-            print("Added lockout_reason column to existing user_security table")
-        except mysql.connector.Error:
-            # Column already exists, ignore error
-            pass
+        print("Creating tables: " + ", ".join(table for table, _, _ in TABLES))
+        create_schema(cursor, storage.name)
+        print("Tables ready")
         
-        # Create test users with hashed passwords
-        print("Creating test users...")
-        test_users = [
-            ('admin', 'admin@test.com', 'admin123'),
-            ('test_user', 'test@test.com', 'testpass'),
-            ('VinayNair', 'vinay@test.com', 'password'),
-            ('john_doe', 'john@test.com', 'secret123')
-        ]
-        
-        for username, email, password in test_users:
-            # Hash the password using SHA-256 (same method as Mitigation-SRC)
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            
+        if storage.name == "mysql":
+            # Add lockout_reason column if it doesn't exist (for existing tables)
             try:
                 cursor.execute("""
-                INSERT INTO users (username, email, password_hash) 
-                VALUES (%s, %s, %s)
-                """, (username, email, password_hash))
+                ALTER TABLE user_security 
+                ADD COLUMN lockout_reason VARCHAR(50) NULL DEFAULT NULL
+                """)
+                print("Added lockout_reason column to existing user_security table")
+            except db.Error:
+                # Column already exists, ignore error
+                pass
+        
+        # Create test users with hashed passwords (same method as Mitigation-SRC)
+        print("Creating test users...")
+        created = storage.add_users(cursor, TEST_USERS)
+        for username, email, password in TEST_USERS:
+            if username in created:
                 print(f"Created user: {username} (password: {password})")
-            except mysql.connector.IntegrityError:
+            else:
                 print(f"User {username} already exists")
         
         connection.commit()
         
         # Verify setup
-        cursor.execute("SELECT COUNT(*) FROM users")
-        user_count = cursor.fetchone()[0]
+        user_count = storage.count_users(cursor)
         print(f"\nSetup complete! {user_count} users in database")
         
         print("\nTest users created:")
-        print("Username: admin, Password: admin123")
-        print("Username: test_user, Password: testpass") 
-        print("Username: VinayNair, Password: password")
-        print("Username: john_doe, Password: secret123")
+        for username, _, password in TEST_USERS:
+            print(f"Username: {username}, Password: {password}")
+        cursor.close()
         
-    except mysql.connector.Error as e:
+    except db.Error as e:
         print(f"Database error: {e}")
         return False
     finally:
-        if connection.is_connected():
-            cursor.close()
+        if connection is not None and connection.is_connected():
             connection.close()
     
     return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the SQLock tables and test users")
+    parser.add_argument(
+        "--storage",
+        default=os.environ.get("SQLOCK_STORAGE"),
+        help="'mysql' (default, DB_CONFIG) or 'sqlite:PATH' for an embedded database file (default: $SQLOCK_STORAGE)",
+    )
+    args = parser.parse_args()
+
     print("SQLock Database Setup")
     print("=" * 40)
     
-    if setup_database():
+    if setup_database(args.storage):
         print("\nDatabase setup successful!")
         print("You can now run your security tests.")
     else:
         print("\nDatabase setup failed!")
-        print("Check your database connection and try again.")
\ No newline at end of file
+        print("Check your database connection and try again.")
@@ -0,0 +1,123 @@
+"""
+SQLock Activity Log Tests - sqlock/activitylog.py and log_suspicious_activity
+Run with: python -m pytest tests/test_activity_log.py
+"""
+
+import sys
+import os
+import gzip
+import json
+import multiprocessing
+import subprocess
+import time
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from sqlock.activitylog import ActivityLog
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as log_file:
+        return [json.loads(line) for line in log_file]
+
+
+def test_records_are_buffered_json_lines(tmp_path):
+    path = tmp_path / "activity.log"
+    log = ActivityLog(str(path), flush_interval=0.1)
+    log.log("Empty username or password provided", event="suspicious_activity")
+    log.log("second")
+    assert not path.exists()  # Still in memory
+    time.sleep(0.3)
+    first, second = _records(path)
+    assert first["message"] == "Empty username or password provided"
+    assert first["event"] == "suspicious_activity" and first["pid"] == os.getpid()
+    assert second["message"] == "second" and second["time"] >= first["time"]
+    log.close()
+
+
+def test_size_rotation_keeps_backups(tmp_path):
+    path = tmp_path / "activity.log"
+    log = ActivityLog(str(path), max_bytes=1000, backups=2, flush_interval=0)
+    for i in range(60):
+        log.log(f"record {i:03d}")
+    log.close()
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["activity.log", "activity.log.1", "activity.log.2"]
+    assert all(os.path.getsize(tmp_path / name) <= 1000 for name in names)
+    newest = _records(path)[-1]["message"]
+    oldest_kept = _records(str(path) + ".2")[0]["message"]
+    assert newest == "record 059" and oldest_kept > "record 000"  # The oldest file was dropped
+    assert log.rotations >= 3
+
+
+def test_compressed_and_time_based_rotation(tmp_path):
+    path = tmp_path / "activity.log"
+    log = ActivityLog(str(path), max_bytes=None, rotate_interval=3600, compress=True, flush_interval=0)
+    log.log("yesterday")
+    os.utime(path, (time.time() - 86400, time.time() - 86400))
+    log.log("today")
+    log.close()
+    assert [record["message"] for record in _records(path)] == ["today"]
+    with gzip.open(str(path) + ".1.gz", "rt", encoding="utf-8") as rotated:
+        assert json.loads(rotated.read())["message"] == "yesterday"
+
+
+def _write_many(path, worker):
+    log = ActivityLog(path, max_bytes=20000, backups=50, flush_interval=0.01)
+    for i in range(300):
+        log.log(f"worker {worker} record {i} " + "x" * 40)
+    log.close()
+
+
+def test_processes_share_one_file_without_interleaving(tmp_path):
+    path = str(tmp_path / "activity.log")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_many, args=(path, n)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    records = []
+    for name in os.listdir(tmp_path):
+        records.extend(_records(tmp_path / name))  # Every line parses: no torn writes
+    assert len(records) == 1200
+    assert len({record["message"] for record in records}) == 1200
+
+
+def test_buffered_records_are_written_at_exit(tmp_path):
+    code = (
+        "from sqlock.activitylog import ActivityLog\n"
+        "log = ActivityLog('activity.log', flush_interval=60)\n"
+        "for i in range(20):\n"
+        "    log.log(str(i))\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True, timeout=30,
+                   env=dict(os.environ, PYTHONPATH=parent_dir))
+    assert len(_records(tmp_path / "activity.log")) == 20
+
+
+def test_log_suspicious_activity_stays_off_stdout(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    Mitigation_SRC.log_suspicious_activity("admin' OR 1=1--")
+    Mitigation_SRC.flush_activity_log()
+    assert capsys.readouterr().out == ""
+    record = _records("pseudo_log.txt")[-1]
+    assert record["message"] == "Suspicious input blocked: admin' OR 1=1--"
+
+    settings = dict(Mitigation_SRC.ACTIVITY_LOG_SETTINGS)
+    Mitigation_SRC.configure_activity_log(echo=True)
+    try:
+        Mitigation_SRC.log_suspicious_activity("again")
+        assert "again" in capsys.readouterr().err
+    finally:
+        Mitigation_SRC.configure_activity_log(**settings)
+    with pytest.raises(ValueError):
+        Mitigation_SRC.configure_activity_log(colour=True)
@@ -0,0 +1,127 @@
+"""
+SQLock Asyncio API Tests - the *_async login and lockout helpers (no database needed)
+Run with: python -m pytest tests/test_async.py
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+
+
+@pytest.fixture
+def slow_db(tmp_path, monkeypatch, local_db):
+    monkeypatch.chdir(tmp_path)
+    db = local_db(query_latency=0.02)
+    db.add_user("alice", "alice@test.com", "secret")
+    yield db
+    Mitigation_SRC.shutdown_async_executor()
+
+
+def test_concurrent_logins(slow_db):
+    async def main():
+        logins = [Mitigation_SRC.authenticate_user_async("alice", "secret") for _ in range(10)]
+        logins.append(Mitigation_SRC.authenticate_user_async("mallory' OR 1=1--", "x"))
+        return await asyncio.gather(*logins)
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    assert results[:10] == [{'id': 1, 'username': 'alice', 'email': 'alice@test.com'}] * 10
+    assert results[10] is None
+    # 11 logins of two 20 ms statements each would take ~0.45 s one after another
+    assert elapsed < 0.3, elapsed
+
+
+def test_lockout_helpers_match_the_blocking_ones(slow_db):
+    async def main():
+        for _ in range(3):
+            await Mitigation_SRC.record_failed_login_async("bob")
+        await Mitigation_SRC.apply_immediate_sql_lockout_async("eve", "UNION-based injection")
+        return (
+            await Mitigation_SRC.is_account_locked_async("bob"),
+            await Mitigation_SRC.get_lockout_info_async("bob"),
+            await Mitigation_SRC.get_lockout_info_async("eve"),
+        )
+
+    bob_locked, bob_info, eve_info = asyncio.run(main())
+    assert bob_locked is Mitigation_SRC.is_account_locked("bob") is True
+    assert bob_info['failed_attempts'] == 3
+    assert bob_info['locked'] == Mitigation_SRC.get_lockout_info("bob")['locked']
+    assert eve_info['is_sql_injection_lockout']
+
+
+def test_timeout_and_cancellation(slow_db):
+    slow_db.query_latency = 0.2
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await Mitigation_SRC.is_account_locked_async("alice", timeout=0.05)
+
+        # Fill every worker, then cancel a call still waiting in the queue
+        busy = [asyncio.ensure_future(Mitigation_SRC.get_lockout_info_async("alice"))
+                for _ in range(Mitigation_SRC.DB_POOL_SETTINGS['size'])]
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(Mitigation_SRC.record_failed_login_async("carol"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        await asyncio.gather(*busy)
+
+    asyncio.run(main())
+    slow_db.query_latency = 0
+    assert Mitigation_SRC.get_lockout_info("carol")['failed_attempts'] == 0
+
+
+def test_timeout_is_the_builtin_one_on_every_python(slow_db, monkeypatch):
+    class AsyncioTimeoutError(Exception):
+        """asyncio.TimeoutError before Python 3.11: not a builtin TimeoutError."""
+
+    async def wait_for(awaitable, timeout):
+        await awaitable
+        raise AsyncioTimeoutError()
+
+    monkeypatch.setattr(asyncio, "TimeoutError", AsyncioTimeoutError)
+    monkeypatch.setattr(asyncio, "wait_for", wait_for)
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await Mitigation_SRC.is_account_locked_async("alice", timeout=1)
+
+    asyncio.run(main())
+
+
+def test_timeout_bounds_a_full_event_sink(slow_db, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(Mitigation_SRC, "_write_event_batch", lambda events: gate.wait())
+    sink = Mitigation_SRC.enable_event_sink(max_queue=1, batch_size=1, flush_interval=0.01)
+    try:
+        Mitigation_SRC.log_security_event("allow", 0, "taken by the stuck flusher")
+        time.sleep(0.05)
+        Mitigation_SRC.log_security_event("allow", 0, "fills the queue")
+
+        async def main():
+            with pytest.raises(TimeoutError):
+                await Mitigation_SRC.authenticate_user_async("alice", "secret", timeout=0.2)
+
+        asyncio.run(main())
+        # The worker thread gave up at the deadline instead of waiting for room forever
+        deadline = time.monotonic() + 1
+        while sink.stats()['timed_out'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sink.stats()['timed_out'] == 1
+    finally:
+        gate.set()
+        Mitigation_SRC.disable_event_sink()
@@ -0,0 +1,139 @@
+"""
+SQLock Login Path Tests - the consolidated authenticate_user against the step-by-step helpers
+Run with: python -m pytest tests/test_auth_path.py
+"""
+
+import sys
+import os
+import hashlib
+from datetime import datetime, timedelta
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+
+
+def _step_by_step_login(db, username, password):
+    """The login as it used to run: one helper (and connection) per step."""
+    if Mitigation_SRC.is_account_locked(username):
+        return None
+    password_hash = hashlib.sha256(password.encode()).hexdigest()
+    row = db.fetchall("SELECT id, username, email FROM users WHERE username = ? AND password_hash = ?",
+                      (username, password_hash))
+    if row:
+        Mitigation_SRC.reset_failed_attempts(username)
+        return {'id': row[0][0], 'username': row[0][1], 'email': row[0][2]}
+    Mitigation_SRC.record_failed_login(username)
+    return None
+
+
+def _expire_lockout(db, username):
+    db.execute("UPDATE user_security SET lockout_until = ? WHERE username = ?",
+               (datetime.now() - timedelta(seconds=1), username))
+
+
+def _scenario(db, login):
+    trace = []
+
+    def state():
+        row = db.fetchall("SELECT failed_attempts, lockout_until, lockout_reason FROM user_security WHERE username = 'alice'")
+        if not row:
+            return None
+        attempts, until, reason = row[0]
+        remaining = round((until - datetime.now()).total_seconds() / 60) if until else None
+        return attempts, remaining, reason
+
+    for password in ["bad", "bad", "bad", "secret", "expire", "bad", "expire", "bad", "expire", "secret",
+                     "sqli", "secret", "expire", "secret", "bad"]:
+        if password == "expire":
+            _expire_lockout(db, "alice")
+            continue
+        if password == "sqli":
+            Mitigation_SRC.apply_immediate_sql_lockout("alice", "Tautology (OR 1=1)")
+            trace.append(("sqli", state()))
+            continue
+        trace.append((login("alice", password), state()))
+    return trace
+
+
+def test_same_results_and_lockouts_as_step_by_step(tmp_path, monkeypatch, local_db):
+    monkeypatch.chdir(tmp_path)
+    traces = []
+    for login in (Mitigation_SRC.authenticate_user, None):
+        database = local_db()
+        database.add_user("alice", "alice@test.com", "secret")
+        traces.append(_scenario(database, login or (lambda u, p: _step_by_step_login(database, u, p))))
+    consolidated, step_by_step = traces
+    assert consolidated == step_by_step
+    # 3rd failure locks for 15 minutes, 4th for an hour, 5th for a day
+    assert [t[1][1] for t in consolidated[:3]] == [None, None, 15]
+    assert consolidated[4][1][:2] == (4, 60) and consolidated[5][1][:2] == (5, 1440)
+
+
+def test_one_connection_and_few_statements(db):
+    db.reset_counters()
+    assert Mitigation_SRC.authenticate_user("alice", "secret")['email'] == "alice@test.com"
+    assert db.queries == 2  # Logs insert + lockout/credential read
+    db.reset_counters()
+    assert Mitigation_SRC.authenticate_user("alice", "wrong") is None
+    assert db.queries == 3  # ... + counter write
+    assert Mitigation_SRC.db_pool_stats()['checkouts'] == 2
+
+
+def test_concurrent_failure_is_not_lost(db, monkeypatch):
+    Mitigation_SRC.authenticate_user("alice", "wrong")
+    original = Mitigation_SRC._progressive_lockout
+    calls = []
+
+    def racing(failed_attempts):
+        if not calls:
+            # Another worker records a failure between our read and our write
+            db.execute("UPDATE user_security SET failed_attempts = failed_attempts + 1 WHERE username = 'alice'")
+        calls.append(failed_attempts)
+        return original(failed_attempts)
+
+    monkeypatch.setattr(Mitigation_SRC, "_progressive_lockout", racing)
+    assert Mitigation_SRC.authenticate_user("alice", "wrong") is None
+    assert calls == [2, 3]  # Re-read after the conflicting write, then counted on top of it
+    assert Mitigation_SRC.get_lockout_info("alice")['failed_attempts'] == 3
+    assert Mitigation_SRC.is_account_locked("alice")
+
+
+def test_failure_is_counted_when_the_counter_keeps_changing(db, monkeypatch):
+    Mitigation_SRC.authenticate_user("alice", "wrong")
+    original = Mitigation_SRC._progressive_lockout
+    calls = []
+
+    def racing(failed_attempts):
+        if len(calls) < Mitigation_SRC.LOGIN_RETRIES:
+            # Another worker records a failure between each of our reads and writes
+            db.execute("UPDATE user_security SET failed_attempts = failed_attempts + 1 WHERE username = 'alice'")
+        calls.append(failed_attempts)
+        return original(failed_attempts)
+
+    monkeypatch.setattr(Mitigation_SRC, "_progressive_lockout", racing)
+    assert Mitigation_SRC.authenticate_user("alice", "wrong") is None
+    info = Mitigation_SRC.get_lockout_info("alice")
+    assert info['failed_attempts'] == 1 + Mitigation_SRC.LOGIN_RETRIES + 1  # Ours is counted too
+    assert info['locked'] and info['time_remaining'] > 23 * 3600
+
+
+def test_racing_first_failure_gets_the_progressive_lockout(db, monkeypatch):
+    original = Mitigation_SRC._progressive_lockout
+    calls = []
+
+    def racing(failed_attempts):
+        if not calls:
+            # Two other first failures land between our read and our insert
+            db.execute("INSERT INTO user_security (username, failed_attempts) VALUES ('alice', 2)")
+        calls.append(failed_attempts)
+        return original(failed_attempts)
+
+    monkeypatch.setattr(Mitigation_SRC, "_progressive_lockout", racing)
+    assert Mitigation_SRC.authenticate_user("alice", "wrong") is None
+    info = Mitigation_SRC.get_lockout_info("alice")
+    assert info['failed_attempts'] == 3 and info['locked'] and 899 <= info['time_remaining'] <= 900
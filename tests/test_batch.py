@@ -0,0 +1,85 @@
+"""
+SQLock Batch Mode Tests - streaming JSON-lines input through Mitigation_SRC (no database needed)
+Run with: python -m pytest tests/test_batch.py
+"""
+
+import sys
+import os
+import io
+import json
+import subprocess
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from bench_sqlock import load_corpus
+
+
+def _records(count):
+    corpus = load_corpus("benign") + load_corpus("malicious")
+    for i in range(count):
+        query = corpus[i % len(corpus)]
+        yield json.dumps(query if i % 5 == 0 else {"query": query, "id": i}) + "\n"
+
+
+def test_workers_keep_input_order():
+    lines = list(_records(1500))
+    serial, parallel = io.StringIO(), io.StringIO()
+    assert Mitigation_SRC.run_mitigation_batch(lines, serial) == 1500
+    assert Mitigation_SRC.run_mitigation_batch(lines, parallel, workers=3) == 1500
+    assert parallel.getvalue() == serial.getvalue()
+
+    responses = [json.loads(line) for line in serial.getvalue().splitlines()]
+    for i, (line, response) in enumerate(zip(lines, responses)):
+        record = json.loads(line)
+        query = record if isinstance(record, str) else record["query"]
+        assert response["malicious"] == Mitigation_SRC.detect_sql_injection_patterns(query)[0]
+        assert response.get("id") == (None if i % 5 == 0 else i)
+
+
+def test_input_is_streamed():
+    consumed = []
+
+    def source():
+        for line in _records(100000):
+            consumed.append(line)
+            yield line
+
+    class StopAfterFirstWrite(io.StringIO):
+        def write(self, text):
+            # Only a bounded window of chunks may be read ahead of the first result
+            assert len(consumed) <= 5 * Mitigation_SRC.BATCH_CHUNK_LINES
+            raise StopIteration
+
+    for workers in (1, 2):
+        consumed.clear()
+        try:
+            Mitigation_SRC.run_mitigation_batch(source(), StopAfterFirstWrite(), workers=workers)
+        except StopIteration:
+            pass
+        assert consumed
+
+
+def test_defaults_and_bad_lines():
+    out = io.StringIO()
+    lines = ['{"query": "admin\'--", "id": "a"}\n', "not json\n", "\n", "[1]\n", '{"query": "x", "explain": false}\n']
+    assert Mitigation_SRC.run_mitigation_batch(lines, out, defaults={"explain": True}) == 4
+    first, bad_json, bad_type, last = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first["id"] == "a" and first["raw_score"] == 180
+    assert bad_json["success"] is False and bad_json["line"] == 2
+    assert bad_type["success"] is False and bad_type["line"] == 4
+    assert "matches" not in last
+
+
+def test_cli_stdin_jsonl():
+    result = subprocess.run(
+        [sys.executable, os.path.join(parent_dir, "Mitigation_SRC.py"), "--stdin-jsonl", "--workers", "2"],
+        input="".join(_records(20)), capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(responses) == 20 and all(r["success"] for r in responses)
@@ -0,0 +1,67 @@
+"""
+SQLock Benchmark Suite Tests - smoke runs of tests/bench_sqlock.py at tiny sizes
+Run with: python -m pytest tests/test_benchmarks.py
+"""
+
+import sys
+import os
+import json
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+import bench_sqlock
+
+
+def test_corpora_are_classified():
+    for value in bench_sqlock.load_corpus("malicious"):
+        assert Mitigation_SRC.detect_sql_injection_patterns(value)[0], value
+
+
+def test_local_db_runs_the_auth_path(tmp_path, monkeypatch, capsys, local_db):
+    monkeypatch.chdir(tmp_path)
+    db = local_db()
+    db.add_user("admin", "admin@test.com", "admin123")
+    assert Mitigation_SRC.authenticate_user("admin", "admin123") == {
+        'id': 1, 'username': 'admin', 'email': 'admin@test.com'
+    }
+    for _ in range(3):
+        assert Mitigation_SRC.authenticate_user("admin", "wrong") is None
+    assert Mitigation_SRC.is_account_locked("admin")
+    assert Mitigation_SRC.get_lockout_info("admin")['failed_attempts'] == 3
+
+    assert Mitigation_SRC.authenticate_user("mallory' OR 1=1--", "x") is None
+
+    # Passwords are scanned strictly unless the password field profile is opted in to
+    db.add_user("quoted", "quoted@test.com", "it's#1--ok")
+    assert Mitigation_SRC.authenticate_user("quoted", "x';--") is None
+    assert Mitigation_SRC.get_lockout_info("quoted")['is_sql_injection_lockout']
+    db.add_user("relaxed", "relaxed@test.com", "it's#1--ok")
+    monkeypatch.setattr(Mitigation_SRC, "AUTH_FIELD_PROFILES", {'password': "password"})
+    assert Mitigation_SRC.authenticate_user("relaxed", "it's#1--ok")['username'] == "relaxed"
+    reason = db.fetchall("SELECT lockout_reason FROM user_security WHERE username = ?", ("mallory' OR 1=1--",))
+    assert reason[0][0].startswith("SQL injection attempt")
+
+
+def test_report_shape_and_compare(tmp_path):
+    report = bench_sqlock.run_benchmarks(calls=50, auth_calls=20, log_rows=[500], log_repeats=2)
+    json.dumps(report)
+    keys = {bench_sqlock.result_key(r) for r in report['results']}
+    assert "detect_sql_injection_patterns/malicious" in keys
+    assert "authenticate_user/valid_login" in keys
+    assert "analyze_logs_from_database/500" in keys
+    for result in report['results']:
+        if result['benchmark'] != 'analyze_logs_from_database':
+            assert result['p50_us'] <= result['p99_us']
+
+    assert bench_sqlock.compare_reports(report, report) == []
+    slower = json.loads(json.dumps(report))
+    for result in slower['results']:
+        if 'ops_per_sec' in result:
+            result['ops_per_sec'] /= 2
+    regressions = bench_sqlock.compare_reports(report, slower, tolerance=0.25)
+    assert {r['metric'] for r in regressions} == {'ops_per_sec'}
@@ -0,0 +1,119 @@
+"""
+SQLock Canonicalization Tests - shared quote / encoding canonical form
+Run with: python -m pytest tests/test_canonicalize.py
+Benchmark against the old chained-replace normalize_quotes: python tests/test_canonicalize.py
+"""
+
+import sys
+import os
+import json
+import timeit
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from Mitigation_SRC import (
+    Ruleset,
+    detect_sql_injection_fast,
+    detect_sql_injection_patterns,
+    explain_sql_injection,
+    normalize_quotes,
+)
+from sqlock.canonicalize import MAX_DECODE_ROUNDS, canonicalize
+
+CANONICAL_FORMS = {
+    "admin": "admin",
+    "' OR 1=1 --": "' OR 1=1 --",
+    "‘ OR ’1’=’1": "' OR '1'='1",
+    "„quoted‟": '"quoted"',
+    "%27%20OR%201=1": "' OR 1=1",
+    "%2527%20OR%201=1": "' OR 1=1",
+    "&#39; OR 1=1": "' OR 1=1",
+    "&apos;&#x27;": "''",
+    "ＯＲ １＝１": "OR 1=1",
+    "%EF%BC%87": "'",
+    "50%": "50%",
+    "a & b": "a & b",
+}
+
+
+def test_canonical_forms():
+    for value, expected in CANONICAL_FORMS.items():
+        assert canonicalize(value) == expected, value
+
+
+def test_non_strings_pass_through():
+    assert canonicalize(None) is None
+    assert canonicalize(42) == 42
+
+
+def test_ascii_input_is_not_copied():
+    value = "plain_username_123"
+    assert canonicalize(value) is value
+    assert normalize_quotes(value) is value
+
+
+def test_decoding_rounds_are_bounded():
+    nested = "'"
+    for _ in range(MAX_DECODE_ROUNDS + 2):
+        nested = nested.replace("%", "%25").replace("'", "%27")
+    decoded = canonicalize(nested)
+    assert "'" not in decoded and "%" in decoded
+    assert canonicalize(nested, max_rounds=MAX_DECODE_ROUNDS + 2) == "'"
+
+
+def test_normalize_quotes_keeps_its_mappings():
+    assert normalize_quotes("‘a’ “b”") == "'a' \"b\""
+    # Only the four smart quotes; broader folding lives in canonicalize()
+    assert normalize_quotes("„x‟") == "„x‟"
+
+
+def test_encoded_payloads_are_detected():
+    for payload in ["%2527%20OR%201=1", "%2527 or%20x=x", "' ＯＲ １＝１"]:
+        verdict = detect_sql_injection_patterns(payload)
+        assert verdict[0], payload
+        assert detect_sql_injection_fast(payload)[0], payload
+
+
+def test_decoding_only_adds_detections():
+    plain = Ruleset.default(decode_input=False)
+    for value in ["' OR 1=1", "admin", "%27", "pass&word", "100%", "%2527 or 1=1 --"]:
+        assert detect_sql_injection_patterns(value)[2] >= plain.detect(value)[2], value
+    assert plain.version != Ruleset.default().version
+
+
+def test_explain_reports_scanned_form():
+    report = explain_sql_injection("%2527 or%20x=x")
+    assert report['scanned'] == "' or x=x"
+    assert explain_sql_injection("admin")['scanned'] == "admin"
+
+
+def _chained_replace(value):
+    """normalize_quotes before the ASCII fast path and guarded replaces."""
+    if not isinstance(value, str):
+        return value
+    return value.replace("‘", "'").replace("’", "'").replace("“", '"').replace("”", '"')
+
+
+def run_benchmark():
+    """Print ns per call for the old and new normalizers as JSON lines."""
+    inputs = {
+        "ascii_short": "john_doe",
+        "ascii_1kb": "a" * 1024,
+        "smart_quotes": "‘ OR ’1’=’1 “x”",
+        "unicode_1kb": "é" * 1024,
+        "url_encoded": "%2527%20OR%201=1",
+    }
+    for name, value in inputs.items():
+        row = {'input': name}
+        for label, func in [("chained_replace", _chained_replace),
+                            ("normalize_quotes", normalize_quotes),
+                            ("canonicalize", canonicalize)]:
+            best = min(timeit.repeat(lambda: func(value), number=20000, repeat=5))
+            row[label] = round(best / 20000 * 1e9, 1)
+        print(json.dumps(row))
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,124 @@
+"""
+SQLock Daemon Tests - JSON-lines server mode of Mitigation_SRC (no database needed)
+Run with: python -m pytest tests/test_daemon.py
+"""
+
+import sys
+import os
+import json
+import socket
+import stat
+import threading
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import Mitigation_SRC
+
+
+@pytest.fixture
+def running_server(request):
+    server = Mitigation_SRC.make_mitigation_server(**request.param)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.begin_shutdown()
+    thread.join(5)
+    server.server_close()
+
+
+def _connect(server):
+    address = server.server_address
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX)
+        sock.settimeout(5)
+        sock.connect(address)
+    else:
+        sock = socket.create_connection(address, timeout=5)
+    return sock, sock.makefile("rwb")
+
+
+def _ask(stream, request):
+    stream.write((request if isinstance(request, str) else json.dumps(request)).encode() + b"\n")
+    stream.flush()
+    return json.loads(stream.readline())
+
+
+@pytest.mark.parametrize("running_server", [{"port": 0}], indirect=True)
+def test_requests_match_the_cli_logic(running_server):
+    sock, stream = _connect(running_server)
+    with sock:
+        for query in ["john_doe", "admin'--", "x UNION SELECT 1"]:
+            expected = Mitigation_SRC.handle_mitigation_request({"query": query})
+            assert _ask(stream, {"query": query, "id": query}) == dict(expected, id=query)
+        explained = _ask(stream, {"query": "admin'--", "explain": True})
+        assert explained["raw_score"] == 180 and explained["matches"]
+        assert _ask(stream, "not json")["success"] is False
+        assert _ask(stream, {"username": "no-query"}) == {"success": False, "error": "Query text is required."}
+
+        health = _ask(stream, {"op": "health"})
+        assert health["status"] == "ok"
+        assert health["requests"] == 5 and health["errors"] == 2
+        assert health["ruleset_version"] == Mitigation_SRC.DEFAULT_RULESET.version
+
+
+@pytest.mark.parametrize("running_server", [{"port": 0}], indirect=True)
+def test_concurrent_clients(running_server):
+    failures = []
+
+    def client(worker):
+        sock, stream = _connect(running_server)
+        with sock:
+            for i in range(50):
+                query = "admin'--" if (i + worker) % 2 else f"user{i}"
+                response = _ask(stream, {"query": query, "id": [worker, i]})
+                if response["id"] != [worker, i] or response["malicious"] != query.endswith("--"):
+                    failures.append(response)
+
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert failures == []
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available")
+def test_unix_socket_and_graceful_shutdown(tmp_path):
+    path = str(tmp_path / "sqlock.sock")
+    server = Mitigation_SRC.make_mitigation_server(socket_path=path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    sock, stream = _connect(server)
+    with sock:
+        assert _ask(stream, {"query": "admin'--"})["malicious"] is True
+        server.begin_shutdown()
+        # The idle connection is closed for reading and the serve loop stops
+        assert stream.readline() == b""
+    thread.join(5)
+    assert not thread.is_alive()
+    server.server_close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available")
+def test_unix_socket_is_private_and_only_replaces_sockets(tmp_path):
+    path = tmp_path / "sqlock.sock"
+    path.write_text("not a socket")
+    with pytest.raises(FileExistsError):
+        Mitigation_SRC.make_mitigation_server(socket_path=str(path))
+    assert path.read_text() == "not a socket"
+
+    path.unlink()
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(str(path))  # Left behind, as after a crash
+    server = Mitigation_SRC.make_mitigation_server(socket_path=str(path))  # Replaces the stale socket
+    try:
+        assert stat.S_ISSOCK(os.lstat(path).st_mode) and os.lstat(path).st_mode & 0o777 == 0o600
+    finally:
+        server.server_close()
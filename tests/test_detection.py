@@ -0,0 +1,193 @@
+"""
+SQLock Detection Tests - DB-free checks of the SQL injection detection core
+Run with: python -m pytest tests/test_detection.py
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import Mitigation_SRC
+from sqlock.lexer import tokenize
+from Mitigation_SRC import (
+    DEFAULT_RULESET,
+    Ruleset,
+    VerdictCache,
+    detect_many,
+    detect_sql_injection_fast,
+    detect_sql_injection_patterns,
+    explain_sql_injection,
+)
+
+# (input, is_malicious, primary_pattern, score) as produced by the original detector
+KNOWN_VERDICTS = [
+    ("john_doe", False, None, 0),
+    ("O'Reilly", False, None, 5),
+    ("admin'--", True, "Suspicious single quote usage", 100),
+    ("' OR '1'='1", True, "SQL injection pattern detected", 100),
+    ("admin' OR 1=1--", True, "SQL injection pattern detected", 100),
+    ("test UNION SELECT * FROM users", True, "UNION-based injection", 100),
+    ("user/*comment*/", False, "SQL Comment", 30),
+    ("admin%27--", True, "SQL Comment", 100),
+    ("SELECT * FROM employee_info WHERE employee_id = 100", False, None, 0),
+    ("SELECT * FROM employee_info WHERE first_name = 'admin' OR 1=1", True, "SQL injection pattern detected", 100),
+    ("DROP TABLE employee_info", True, "Destructive command", 100),
+    ("EXEC xp_cmdshell 'dir'", True, "Extended procedure (Dictionary Match)", 100),
+    ("‘ or ‘1’=’1", True, "SQL injection pattern detected", 100),
+]
+
+
+def test_known_verdicts():
+    for text, malicious, pattern, score in KNOWN_VERDICTS:
+        assert detect_sql_injection_patterns(text) == (malicious, pattern, score), text
+
+
+def test_invalid_input_is_safe():
+    for value in ("", None, 123, ["admin'--"]):
+        assert detect_sql_injection_patterns(value) == (False, None, 0)
+
+
+def test_default_ruleset_is_reused():
+    fresh = Ruleset.default()
+    for text, _, _, _ in KNOWN_VERDICTS:
+        assert fresh.detect(text) == DEFAULT_RULESET.detect(text)
+
+
+def test_overlapping_rules_are_all_scored():
+    # "union select" and "select ... from" overlap; both rules must still contribute
+    malicious, pattern, score = detect_sql_injection_patterns("x union select a from b")
+    assert malicious and pattern == "UNION-based injection" and score == 100
+    text = "x union select a from b"
+    assert Ruleset.default()._matching_rules(text, tokenize(text), False) == [0, 6]
+
+
+def test_detect_many_matches_single_calls():
+    inputs = [text for text, _, _, _ in KNOWN_VERDICTS] + ["admin'--", None, 42, ""]
+    malicious, patterns, scores = detect_many(inputs)
+    for i, value in enumerate(inputs):
+        assert (bool(malicious[i]), patterns[i], int(scores[i])) == detect_sql_injection_patterns(value)
+
+
+def test_detect_many_accepts_pandas_and_numpy():
+    pd = pytest.importorskip("pandas")
+    np = pytest.importorskip("numpy")
+    inputs = ["john_doe", "' OR '1'='1", None, "O'Reilly"]
+    expected = detect_many(inputs)
+    for batch in (pd.Series(inputs, index=[10, 11, 12, 13]), np.array(inputs, dtype=object)):
+        result = detect_many(batch)
+        assert result.malicious.tolist() == expected.malicious.tolist() == [False, True, False, False]
+        assert result.patterns.tolist() == expected.patterns.tolist()
+        assert result.scores.tolist() == [0, 100, 0, 5]
+
+
+def test_verdict_cache_counts_and_evicts():
+    cache = VerdictCache(capacity=2)
+    assert cache.detect("admin'--", DEFAULT_RULESET) == detect_sql_injection_patterns("admin'--")
+    cache.detect("admin'--", DEFAULT_RULESET)
+    cache.detect("john_doe", DEFAULT_RULESET)
+    cache.detect("O'Reilly", DEFAULT_RULESET)  # evicts admin'--
+    cache.detect("admin'--", DEFAULT_RULESET)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (1, 4, 2, 2)
+
+
+def test_verdict_cache_shares_entries_across_quote_styles():
+    cache = VerdictCache()
+    cache.detect("‘ or ‘1’=’1", DEFAULT_RULESET)
+    assert cache.detect("' or '1'='1", DEFAULT_RULESET) == (True, "SQL injection pattern detected", 100)
+    assert cache.stats()['hits'] == 1
+
+
+def test_verdict_cache_ttl_expires(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(Mitigation_SRC.time, "monotonic", lambda: clock[0])
+    cache = VerdictCache(ttl=5)
+    cache.detect("john_doe", DEFAULT_RULESET)
+    clock[0] += 10
+    cache.detect("john_doe", DEFAULT_RULESET)
+    assert cache.stats()['hits'] == 0 and cache.stats()['misses'] == 2
+
+
+def test_verdict_cache_invalidated_by_ruleset_change(monkeypatch):
+    cache = Mitigation_SRC.enable_verdict_cache()
+    try:
+        assert detect_sql_injection_patterns("user/*comment*/") == (False, "SQL Comment", 30)
+        strict = Ruleset(
+            Mitigation_SRC.SQLI_REGEX_RULES,
+            Mitigation_SRC.RAW_INPUT_REGEX_RULES,
+            Mitigation_SRC.BASIC_SQLI_DICTIONARY,
+            block_threshold=30,
+        )
+        monkeypatch.setattr(Mitigation_SRC, "DEFAULT_RULESET", strict)
+        assert detect_sql_injection_patterns("user/*comment*/") == (True, "SQL Comment", 30)
+        assert cache.stats()['invalidations'] == 1
+    finally:
+        Mitigation_SRC.disable_verdict_cache()
+
+
+def test_fast_verdict_matches_full_verdict():
+    samples = [text for text, _, _, _ in KNOWN_VERDICTS] + ["a;b", "x -- y; z", "update t offset 1", "x union all select 1"]
+    for threshold in (5, 30, 80, 100, 150):
+        ruleset = Ruleset.default(block_threshold=threshold)
+        for text in samples:
+            assert ruleset.detect_fast(text)[0] == ruleset.detect(text)[0], (threshold, text)
+
+
+def test_fast_verdict_stops_at_first_decisive_rule():
+    # Dictionary and quick-check hits decide the verdict before the input is tokenized
+    assert detect_sql_injection_fast("' OR '1'='1") == (True, "SQL injection pattern detected", 100)
+    assert detect_sql_injection_fast("john_doe") == (False, None, 0)
+
+
+def test_explain_lists_every_rule():
+    explanation = explain_sql_injection("O'Reilly; --")
+    assert (explanation['malicious'], explanation['pattern'], explanation['score']) == detect_sql_injection_patterns("O'Reilly; --")
+    assert explanation['matches'] == [
+        {'rule': "Single quote", 'weight': 5},
+        {'rule': "SQL Comment", 'weight': 30},
+        {'rule': "Statement stacking", 'weight': 30},
+        {'rule': "Multiple suspicious characters", 'weight': 20},
+    ]
+    assert explanation['raw_score'] == 85
+
+
+def test_detect_fields_default_profile_matches_detect():
+    fields = {'username': "admin'--", 'comment': "x UNION SELECT 1", 'empty': "", 'other': None}
+    verdicts = Mitigation_SRC.detect_fields(fields)
+    for name in ('username', 'comment'):
+        assert verdicts.fields[name] == detect_sql_injection_patterns(fields[name])
+    assert verdicts.fields['empty'] == verdicts.fields['other'] == (False, None, 0)
+    # Combined verdict: first malicious field in mapping order
+    assert (verdicts.malicious, verdicts.field) == (True, 'username')
+    assert verdicts.pattern == "Suspicious single quote usage"
+
+
+def test_detect_fields_password_profile():
+    relaxed = {'password': "password"}
+    verdicts = Mitigation_SRC.detect_fields({'username': "john_doe", 'password': "a';--b"}, relaxed)
+    assert verdicts.fields['password'] == (False, "Statement stacking", 30)
+    assert (verdicts.malicious, verdicts.field, verdicts.score) == (False, 'password', 30)
+    # Quotes and '#' are fine in a password, tautologies are not
+    assert Mitigation_SRC.detect_fields({'password': "p'ss#w--rd"}, relaxed).fields['password'] == (False, None, 0)
+    assert Mitigation_SRC.detect_fields({'password': "' OR 1=1"}, relaxed).malicious
+    # The profile is opt-in: a field named "password" is scanned strictly by default
+    assert Mitigation_SRC.detect_fields({'password': "a';--b"}).fields['password'] == \
+        detect_sql_injection_patterns("a';--b")
+    # Profiles can be chosen per field by name or given inline
+    assert Mitigation_SRC.detect_fields({'pw': "a';--b"}, {'pw': "password"}).score == 30
+    assert Mitigation_SRC.detect_fields({'q': "a;b"}, {'q': {'block_threshold': 30}}).malicious
+    with pytest.raises(ValueError):
+        Mitigation_SRC.detect_fields({'q': "x"}, {'q': "no-such-profile"})
+
+
+def test_detect_fields_shares_work_between_fields():
+    ruleset = Ruleset.default()
+    ruleset.detect_fields({'a': "john_doe", 'b': "john_doe", 'c': "x' or y", 'd': "x' or y"}, {'d': "password"})
+    # Duplicate values are screened once
+    assert ruleset.prefilter.stats()['checked'] == 2
@@ -0,0 +1,243 @@
+"""
+SQLock Event Sink Tests - sqlock/eventsink.py and the batched Logs writer in Mitigation_SRC (no database needed)
+Run with: python -m pytest tests/test_event_sink.py
+"""
+
+import sys
+import os
+import json
+import subprocess
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from sqlock.eventsink import EventSink
+
+
+class Recorder:
+    """write_batch that records each batch and can be held closed or made to fail."""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.failing = False
+
+    def __call__(self, events):
+        self.gate.wait()
+        if self.failing:
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(events))
+
+    @property
+    def events(self):
+        return [event for batch in self.batches for event in batch]
+
+
+def test_batches_by_size_and_by_time():
+    recorder = Recorder()
+    sink = EventSink(recorder, batch_size=10, flush_interval=0.2)
+    try:
+        for i in range(25):
+            sink.submit("allow", 0, f"event {i}")
+        deadline = time.monotonic() + 1
+        while len(recorder.batches) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [len(batch) for batch in recorder.batches] == [10, 10]  # Full batches go out at once
+        time.sleep(0.3)
+        assert [len(batch) for batch in recorder.batches] == [10, 10, 5]  # The rest after flush_interval
+        assert recorder.events == [("allow", 0, f"event {i}") for i in range(25)]
+        stats = sink.stats()
+        assert stats['queued'] == 25 and stats['flushed'] == 25 and stats['batches'] == 3
+        assert stats['dropped'] == 0 and stats['depth'] == 0
+    finally:
+        sink.close()
+
+
+def test_block_policy_waits_for_room():
+    recorder = Recorder()
+    recorder.gate.clear()
+    sink = EventSink(recorder, max_queue=2, batch_size=1, flush_interval=0.01)
+    sink.submit("allow", 0, "a")  # Taken by the flusher, which is now stuck writing it
+    time.sleep(0.05)
+    sink.submit("allow", 0, "b")
+    sink.submit("allow", 0, "c")
+    submitted = threading.Event()
+    blocked = threading.Thread(target=lambda: (sink.submit("block", 90, "d"), submitted.set()))
+    blocked.start()
+    assert not submitted.wait(0.1)
+    recorder.gate.set()
+    assert submitted.wait(1)
+    blocked.join()
+    sink.close()
+    assert [event[2] for event in recorder.events] == ["a", "b", "c", "d"]
+    assert sink.stats()['max_depth'] == 2
+
+
+def test_block_policy_gives_up_after_the_timeout():
+    recorder = Recorder()
+    recorder.gate.clear()
+    sink = EventSink(recorder, max_queue=1, batch_size=1, flush_interval=0.01, block_timeout=5)
+    sink.submit("allow", 0, "a")  # Taken by the flusher, which is now stuck writing it
+    time.sleep(0.05)
+    sink.submit("allow", 0, "b")
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        sink.submit("block", 90, "c", timeout=0.1)  # Overrides block_timeout
+    assert 0.1 <= time.monotonic() - start < 1
+    assert sink.stats()['timed_out'] == 1
+    recorder.gate.set()
+    sink.close()
+    assert [event[2] for event in recorder.events] == ["a", "b"]
+
+
+def test_drop_allow_policy_keeps_every_attack():
+    recorder = Recorder()
+    recorder.gate.clear()
+    sink = EventSink(recorder, max_queue=3, batch_size=100, flush_interval=60, policy="drop_allow")
+    for text in ["allow 1", "allow 2", "allow 3"]:
+        assert sink.submit("allow", 0, text)
+    assert not sink.submit("allow", 0, "allow 4")     # Full: new allow events are dropped
+    assert sink.submit("block", 95, "attack 1")       # ... and attacks evict the oldest allow event
+    assert sink.submit("block", 95, "attack 2")
+    recorder.gate.set()
+    sink.close()
+    assert [event[2] for event in recorder.events] == ["allow 3", "attack 1", "attack 2"]
+    stats = sink.stats()
+    assert stats['dropped'] == 3 and stats['queued'] == 5 and stats['flushed'] == 3
+
+
+def test_spill_policy_overflows_to_disk_and_retries_failures(tmp_path):
+    spill_path = str(tmp_path / "events.spill")
+    recorder = Recorder()
+    recorder.gate.clear()
+    errors = []
+    sink = EventSink(recorder, max_queue=2, batch_size=100, flush_interval=60, policy="spill",
+                     spill_path=spill_path, on_error=errors.append)
+    for i in range(5):
+        assert sink.submit("allow", 0, f"event {i}")
+    assert sink.stats()['spilled'] == 3
+    assert len(open(spill_path).readlines()) == 3
+
+    recorder.failing = True
+    recorder.gate.set()
+    assert sink.flush(timeout=1)
+    assert len(errors) >= 2 and sink.stats()['failed'] >= 5
+    assert len(open(spill_path).readlines()) == 5  # Nothing lost: failed writes went to the spill file
+
+    recorder.failing = False
+    sink.close()
+    assert sorted(event[2] for event in recorder.events) == [f"event {i}" for i in range(5)]
+    assert not os.path.exists(spill_path)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EventSink(Recorder(), policy="ignore")
+    with pytest.raises(ValueError):
+        EventSink(Recorder(), policy="spill")
+
+
+def test_pending_events_are_written_at_exit(tmp_path):
+    script = (
+        "import json, sys\n"
+        "from sqlock.eventsink import EventSink\n"
+        "def write(events):\n"
+        "    with open('written.jsonl', 'a') as out:\n"
+        "        for event in events:\n"
+        "            out.write(json.dumps(event) + '\\n')\n"
+        "sink = EventSink(write, batch_size=1000, flush_interval=60)\n"
+        "for i in range(50):\n"
+        "    sink.submit('allow', 0, str(i))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=parent_dir)
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env, check=True, timeout=30)
+    assert len(open(tmp_path / "written.jsonl").readlines()) == 50
+
+
+def test_spill_file_is_written_back_in_batches(tmp_path):
+    spill_path = str(tmp_path / "events.spill")
+    recorder = Recorder()
+    with open(spill_path + ".draining", "w") as draining:  # Left by an interrupted drain
+        draining.writelines(json.dumps(["allow", 0, f"old {i}"]) + "\n" for i in range(5))
+    with open(spill_path + ".draining.pos", "w") as progress:
+        progress.write(str(2 * len(json.dumps(["allow", 0, "old 0"]) + "\n")))  # Two already written
+    with open(spill_path, "w") as spill:
+        spill.writelines(json.dumps(["allow", 0, f"new {i}"]) + "\n" for i in range(25))
+    sink = EventSink(recorder, batch_size=10, flush_interval=60, policy="spill", spill_path=spill_path)
+    assert sink.flush(timeout=5)
+    assert [len(batch) for batch in recorder.batches] == [3, 10, 10, 5]
+    assert [event[2] for event in recorder.events] == [f"old {i}" for i in range(2, 5)] + [f"new {i}" for i in range(25)]
+    assert os.listdir(tmp_path) == []
+    sink.close()
+
+
+def test_login_events_are_batched(tmp_path, monkeypatch, local_db):
+    monkeypatch.chdir(tmp_path)
+    db = local_db()
+    db.add_user("alice", "alice@test.com", "secret")
+    Mitigation_SRC.enable_event_sink(batch_size=50, flush_interval=60)
+    try:
+        db.reset_counters()
+        assert Mitigation_SRC.authenticate_user("alice", "secret")['username'] == "alice"
+        assert db.queries == 1  # Only the lockout/credential read runs on the login path
+        for _ in range(9):
+            Mitigation_SRC.authenticate_user("alice", "secret")
+        Mitigation_SRC.log_security_event("block", 95, "Auth Username: ' OR 1=1--")
+        assert db.fetchall("SELECT COUNT(*) FROM Logs") == [(0,)]
+        assert Mitigation_SRC.event_sink_stats()['queued'] == 11
+    finally:
+        Mitigation_SRC.disable_event_sink()
+    assert Mitigation_SRC.event_sink_stats() is None
+    rows = db.fetchall("SELECT decision, suspicion_score, query_template FROM Logs ORDER BY id")
+    assert rows == [("allow", 0, "Auth Username: alice")] * 10 + [("block", 95, "Auth Username: ' OR 1=1--")]
+    assert db.queries == 10 + 1  # Ten logins plus one multi-row INSERT
+
+    # Back to one INSERT per event
+    db.reset_counters()
+    Mitigation_SRC.authenticate_user("alice", "secret")
+    assert db.queries == 2
+
+
+def test_failed_batches_are_reported(tmp_path, monkeypatch, local_db):
+    monkeypatch.chdir(tmp_path)
+    db = local_db()
+    Mitigation_SRC.enable_event_sink(flush_interval=60)
+    try:
+        db.execute("DROP TABLE Logs")
+        Mitigation_SRC.log_security_event("allow", 0, "lost")
+    finally:
+        Mitigation_SRC.disable_event_sink()
+    Mitigation_SRC.flush_activity_log()
+    assert "Database error logging events" in open("pseudo_log.txt").read()
+
+
+def test_full_queue_does_not_starve_the_flusher_of_connections(db):
+    settings = dict(Mitigation_SRC.DB_POOL_SETTINGS)
+    Mitigation_SRC.configure_db_pool(size=2, checkout_timeout=2)
+    Mitigation_SRC.enable_event_sink(max_queue=2, batch_size=2, flush_interval=0.01, policy="block")
+    try:
+        def logins():
+            for _ in range(10):
+                Mitigation_SRC.authenticate_user("alice", "wrong")
+
+        threads = [threading.Thread(target=logins) for _ in range(6)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.monotonic() - start < 10
+    finally:
+        Mitigation_SRC.disable_event_sink()
+        Mitigation_SRC.configure_db_pool(**settings)
+    # Logins waiting for queue room hold no connection, so every event is written
+    assert db.fetchall("SELECT COUNT(*) FROM Logs") == [(60,)]
@@ -0,0 +1,44 @@
+"""
+SQLock Lexer Tests - token stream used by the detector
+Run with: python -m pytest tests/test_lexer.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path for importing the sqlock helpers
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlock.lexer import COMMENT, IDENTIFIER, KEYWORD, NUMBER, OPERATOR, QUOTE, tokenize
+
+
+def _kinds_and_values(text):
+    return [(token.kind, token.value) for token in tokenize(text)]
+
+
+def test_classic_injection():
+    assert _kinds_and_values("admin' OR 1=1--") == [
+        (IDENTIFIER, "admin"),
+        (QUOTE, "'"),
+        (KEYWORD, "OR"),
+        (NUMBER, "1"),
+        (OPERATOR, "="),
+        (NUMBER, "1"),
+        (COMMENT, "--"),
+    ]
+
+
+def test_comment_markers_do_not_hide_text():
+    assert [token.value for token in tokenize("x -- '; drop table t")] == ["x", "--", "'", ";", "drop", "table", "t"]
+    assert [token.value for token in tokenize("*/*#")] == ["*", "/*", "#"]
+
+
+def test_positions_skip_whitespace():
+    tokens = tokenize("  select\n\tname ")
+    assert [(token.value, token.start, token.end) for token in tokens] == [("select", 2, 8), ("name", 10, 14)]
+
+
+def test_words_follow_regex_word_characters():
+    assert [token.value for token in tokenize("oré_1'or")] == ["oré_1", "'", "or"]
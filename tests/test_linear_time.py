@@ -0,0 +1,92 @@
+"""
+SQLock Linear-Time Tests - pathological input corpus for the detectors
+Run with: python -m pytest tests/test_linear_time.py
+Benchmark (1 KB to 1 MB): python tests/test_linear_time.py
+"""
+
+import sys
+import os
+import json
+import time
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, os.path.join(parent_dir, "sqlock", "tools"))
+
+from Mitigation_SRC import Ruleset, detect_sql_injection_patterns
+
+def _repeat(unit, prefix="x "):
+    return lambda size: prefix + unit * (size // len(unit))
+
+# Inputs crafted to make backtracking regexes retry from every position.
+# Each entry builds an input of roughly `size` characters.
+PATHOLOGICAL_INPUTS = {
+    "select_then_spaces": lambda size: "x select" + " " * size,
+    "update_then_spaces": lambda size: "x update" + " " * size,
+    "repeated_select": _repeat("select "),
+    "repeated_select_lines": _repeat("select\n"),
+    "repeated_update": _repeat("update "),
+    "repeated_union": _repeat("union "),
+    "repeated_or_word": _repeat("or a"),
+    "repeated_quote_or": _repeat("' o"),
+    "repeated_exec": _repeat("exec "),
+    "repeated_equals": _repeat("1="),
+    "repeated_comment_dash": _repeat("-"),
+    "quotes_only": _repeat("'", prefix="x"),
+    "plain_text": _repeat("a", prefix=""),
+}
+
+def _time_call(func, value, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _assert_linear(func, name, build):
+    small = _time_call(func, build(16 * 1024))
+    large = _time_call(func, build(256 * 1024))
+    # 16x more input: linear scanning stays near 16x, quadratic would be ~256x
+    assert large <= max(small, 0.001) * 64, f"{name}: {small:.4f}s -> {large:.4f}s"
+
+
+def test_detector_latency_grows_linearly():
+    for name, build in PATHOLOGICAL_INPUTS.items():
+        _assert_linear(detect_sql_injection_patterns, name, build)
+
+
+def test_log_analyzer_signatures_grow_linearly():
+    import SQLlog
+
+    patterns = [SQLlog._signature_to_regex(s) for s in SQLlog.SQLI_SIGNATURES] + SQLlog.ADDITIONAL_SQLI_PATTERNS
+    matcher = SQLlog.SignatureMatcher(patterns)
+    for name, build in PATHOLOGICAL_INPUTS.items():
+        _assert_linear(matcher.is_suspicious, name, build)
+
+
+def test_oversize_policies():
+    payload = "a" * 100 + "' OR '1'='1"
+    blocking = Ruleset.default(max_scan_length=64)
+    assert blocking.detect(payload) == (True, "Input exceeds maximum scan length", 100)
+    truncating = Ruleset.default(max_scan_length=64, oversize_policy="truncate")
+    assert truncating.detect(payload) == (False, None, 0)
+    assert truncating.detect("' OR '1'='1") == detect_sql_injection_patterns("' OR '1'='1")
+
+
+def run_benchmark():
+    """Print per-corpus latency from 1 KB to 1 MB as JSON lines."""
+    sizes = [1024 * 4 ** i for i in range(6)]  # 1 KB ... 1 MB
+    for name, build in PATHOLOGICAL_INPUTS.items():
+        timings = {size: _time_call(detect_sql_injection_patterns, build(size)) for size in sizes}
+        print(json.dumps({
+            'corpus': name,
+            'seconds': {f"{size // 1024}KB": round(t, 6) for size, t in timings.items()},
+            'us_per_kb': {f"{size // 1024}KB": round(t * 1e6 / (size / 1024), 2) for size, t in timings.items()},
+        }))
+
+if __name__ == "__main__":
+    run_benchmark()
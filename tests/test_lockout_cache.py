@@ -0,0 +1,137 @@
+"""
+SQLock Lockout Cache Tests - LockoutCache and the write-through lockout helpers (no database needed)
+Run with: python -m pytest tests/test_lockout_cache.py
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from Mitigation_SRC import LockoutCache
+
+
+def _db_state(db, username):
+    rows = db.fetchall("SELECT failed_attempts, lockout_until, lockout_reason FROM user_security WHERE username = ?",
+                       (username,))
+    return rows[0] if rows else None
+
+
+def test_repeated_checks_read_once(db):
+    cache = Mitigation_SRC.enable_lockout_cache()
+    db.reset_counters()
+    for _ in range(5):
+        assert Mitigation_SRC.is_account_locked("alice") is False
+        assert Mitigation_SRC.get_lockout_info("alice") == {'locked': False, 'time_remaining': 0, 'failed_attempts': 0}
+    assert db.queries == 1
+    assert cache.stats()['negative_hits'] == 9 and cache.stats()['misses'] == 1
+
+
+def test_helpers_write_through(db):
+    Mitigation_SRC.enable_lockout_cache()
+    Mitigation_SRC.is_account_locked("bob")  # Cached as "no record"
+    db.reset_counters()
+    for _ in range(3):
+        Mitigation_SRC.record_failed_login("bob")
+    writes = db.queries
+    info = Mitigation_SRC.get_lockout_info("bob")
+    assert info['locked'] and info['failed_attempts'] == 3 and 899 <= info['time_remaining'] <= 900
+    assert db.queries == writes  # Answered from the written-through state
+    assert Mitigation_SRC._read_lockout_state("bob") == _db_state(db, "bob")
+
+    Mitigation_SRC.reset_failed_attempts("bob")
+    assert Mitigation_SRC.is_account_locked("bob") is False
+    assert Mitigation_SRC._read_lockout_state("bob") == _db_state(db, "bob")
+
+    Mitigation_SRC.apply_immediate_sql_lockout("bob", "Tautology (OR 1=1)")
+    Mitigation_SRC.reset_failed_attempts("bob")  # Does not lift an SQL injection lockout
+    assert Mitigation_SRC.get_lockout_info("bob")['is_sql_injection_lockout']
+    assert Mitigation_SRC._read_lockout_state("bob") == _db_state(db, "bob")
+
+    Mitigation_SRC.apply_immediate_sql_lockout("mallory", "UNION-based injection")  # Not cached: next read fetches it
+    assert Mitigation_SRC.is_account_locked("mallory") is True
+
+
+def test_lockout_expiry_needs_no_database(db):
+    cache = Mitigation_SRC.enable_lockout_cache(ttl=60)
+    Mitigation_SRC.is_account_locked("alice")
+    cache.update("alice", failed_attempts=3, lockout_until=datetime.now() + timedelta(seconds=0.05))
+    db.reset_counters()
+    assert Mitigation_SRC.is_account_locked("alice") is True
+    time.sleep(0.1)
+    assert Mitigation_SRC.is_account_locked("alice") is False
+    assert db.queries == 0
+
+
+def test_locked_account_under_attack_is_rejected_from_memory(db):
+    Mitigation_SRC.enable_lockout_cache()
+    Mitigation_SRC.enable_event_sink(batch_size=1000, flush_interval=60)
+    try:
+        for _ in range(3):
+            assert Mitigation_SRC.authenticate_user("alice", "guess") is None
+        db.reset_counters()
+        for _ in range(100):
+            assert Mitigation_SRC.authenticate_user("alice", "secret") is None  # Locked, even with the right password
+        assert db.queries == 0
+    finally:
+        Mitigation_SRC.disable_event_sink()
+    assert db.fetchall("SELECT COUNT(*) FROM Logs") == [(103,)]
+    Mitigation_SRC.flush_activity_log()
+    assert open("pseudo_log.txt").read().count("Login attempt on locked account: alice") == 100
+
+
+def test_other_writers_are_seen_after_ttl(db):
+    Mitigation_SRC.enable_lockout_cache(ttl=0.05)
+    assert Mitigation_SRC.is_account_locked("alice") is False
+    # Another process locks the account directly in the database
+    db.execute("INSERT INTO user_security (username, failed_attempts, lockout_until) VALUES (?, ?, ?)",
+               ("alice", 5, datetime.now() + timedelta(hours=1)))
+    assert Mitigation_SRC.is_account_locked("alice") is False
+    time.sleep(0.1)
+    assert Mitigation_SRC.is_account_locked("alice") is True
+
+
+def test_login_results_match_uncached(tmp_path, monkeypatch, local_db):
+    monkeypatch.chdir(tmp_path)
+    traces = []
+    for cached in (False, True):
+        if cached:
+            Mitigation_SRC.enable_lockout_cache()
+        try:
+            db = local_db()
+            db.add_user("alice", "alice@test.com", "secret")
+            trace = []
+            for password in ["bad", "bad", "secret", "bad", "secret", "bad", "bad", "bad", "secret"]:
+                trace.append((Mitigation_SRC.authenticate_user("alice", password),
+                              Mitigation_SRC.get_lockout_info("alice")['failed_attempts'],
+                              Mitigation_SRC.is_account_locked("alice")))
+            traces.append(trace)
+        finally:
+            Mitigation_SRC.disable_lockout_cache()
+    assert traces[0] == traces[1]
+    assert traces[0][-1] == (None, 3, True)
+
+
+def test_store_after_a_write_is_skipped():
+    cache = LockoutCache()
+    version = cache.version()
+    cache.invalidate("alice")  # A helper wrote while the row was being read
+    cache.store("alice", (0, None, None), version)
+    assert cache.get("alice") is LockoutCache.MISS
+
+
+def test_capacity_and_negative_ttl():
+    cache = LockoutCache(capacity=2, ttl=60, negative_ttl=0)
+    cache.store("ghost", None, cache.version())
+    assert cache.get("ghost") is LockoutCache.MISS  # Negative entries expired at once
+    for name in ("a", "b", "c"):
+        cache.store(name, (1, None, None), cache.version())
+    assert cache.get("a") is LockoutCache.MISS and cache.get("c") == (1, None, None)
+    assert cache.stats()['evictions'] == 2
@@ -0,0 +1,119 @@
+"""
+SQLock Log Analyzer Tests - streaming sqlock/tools/SQLlog.py over a SQLite logs table (no MySQL needed)
+Run with: python -m pytest tests/test_log_analyzer.py
+"""
+
+import sys
+import os
+import csv
+import json
+import sqlite3
+import subprocess
+from unittest import mock
+
+import pytest
+
+# Add the analyzer's directory to path for importing SQLlog
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, "sqlock", "tools"))
+
+import SQLlog
+
+MESSAGES = ["login ok", "x' OR 1=1 --", "hello", None, "1 UNION SELECT pw", "select name from t", "bye"]
+
+
+@pytest.fixture
+def logs_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "logs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE logs (id INTEGER, level TEXT, message TEXT)")
+    conn.executemany("INSERT INTO logs VALUES (?, 'info', ?)", [(i, m) for i, m in enumerate(MESSAGES * 3)])
+    conn.commit()
+    conn.close()
+    monkeypatch.chdir(tmp_path)
+    # Small fetches so the test crosses several batch boundaries
+    monkeypatch.setattr(SQLlog, "FETCH_BATCH_ROWS", 4)
+    with mock.patch.object(SQLlog, "connect_db", lambda streaming=False: sqlite3.connect(path)):
+        yield path
+
+
+def test_streamed_incidents_match_the_matcher(logs_db):
+    incidents = SQLlog.analyze_logs_from_database()
+    is_suspicious = SQLlog.build_matcher(SQLlog.SQLI_SIGNATURES, SQLlog.ADDITIONAL_SQLI_PATTERNS)
+    expected = [str(m) for m in MESSAGES * 3 if is_suspicious(str(m))]
+    assert [i['query_template'] for i in incidents] == expected
+    assert len(expected) == 9
+    assert incidents[0]['level'] == 'info' and incidents[0]['source'] == 'database_logs'
+
+
+def test_run_from_db_writes_csv_and_reports(logs_db):
+    summary = SQLlog.run_from_db(save=False)
+    assert summary['incidents_found'] == 9 and summary['incidents_saved'] == 0
+    assert summary['rows_scanned'] == len(MESSAGES) * 3
+    assert summary['startup_ms'] >= 0 and summary['analysis_ms'] >= 0
+    if SQLlog.resource is not None:
+        assert summary['peak_rss_mb'] > 0
+    with open("sqli_incidents.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 9 and list(rows[0]) == SQLlog.INCIDENT_FIELDS
+
+
+def test_no_csv_without_incidents(logs_db):
+    conn = sqlite3.connect(logs_db)
+    conn.execute("DELETE FROM logs WHERE id > 0")
+    conn.commit()
+    conn.close()
+    assert SQLlog.run_from_db(save=False)['incidents_found'] == 0
+    assert not os.path.exists("sqli_incidents.csv")
+
+
+def test_incidents_are_saved_in_batches(monkeypatch):
+    connection = mock.MagicMock()
+    monkeypatch.setattr(SQLlog, "INSERT_BATCH_ROWS", 2)
+    incidents = [{'decision': 'block', 'suspicion_score': 90, 'query_template': str(i)} for i in range(5)]
+    assert SQLlog.save_incidents_to_db(incidents, connection) == 5
+    batches = [call.args[1] for call in connection.cursor.return_value.executemany.call_args_list]
+    assert [len(b) for b in batches] == [2, 2, 1]
+    connection.commit.assert_called_once()
+
+
+def test_incidents_are_saved_while_streaming(monkeypatch):
+    connection = mock.MagicMock()
+    monkeypatch.setattr(SQLlog, "INSERT_BATCH_ROWS", 2)
+    produced = []
+
+    def stream():
+        for i in range(5):
+            produced.append(i)
+            yield {'decision': 'block', 'suspicion_score': 90, 'query_template': str(i)}
+
+    seen_at_insert = []
+    connection.cursor.return_value.executemany.side_effect = lambda query, rows: seen_at_insert.append(len(produced))
+    assert SQLlog.save_incidents_to_db(stream(), connection) == 5
+    assert seen_at_insert == [2, 4, 5]  # Each batch is written before the next one is read
+
+
+def test_run_from_db_saves_without_collecting(logs_db, monkeypatch):
+    saved = []
+
+    def save(incidents):
+        assert not isinstance(incidents, list)
+        saved.extend(incidents)
+        return len(saved)
+
+    monkeypatch.setattr(SQLlog, "save_incidents_to_db", save)
+    summary = SQLlog.run_from_db()
+    assert summary['incidents_found'] == summary['incidents_saved'] == len(saved) == 9
+
+
+def test_cli_arguments(tmp_path):
+    script = os.path.join(parent_dir, "sqlock", "tools", "SQLlog.py")
+    env = dict(os.environ, SQLOCK_STORAGE=f"sqlite:{tmp_path / 'sqlock.db'}")
+    result = subprocess.run([sys.executable, script, "--from-db", "--rules", str(tmp_path / "missing.json")],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert "Error loading rule pack" in result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1])['incidents_found'] == 0
+    result = subprocess.run([sys.executable, script, "--from-db", "--bogus"],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 2 and "unrecognized arguments: --bogus" in result.stderr
@@ -0,0 +1,69 @@
+"""
+SQLock Matcher Tests - Aho-Corasick automaton and log-analyzer signature matching
+Run with: python -m pytest tests/test_matcher.py
+"""
+
+import sys
+import os
+import random
+import re
+
+# Add parent directory to path for importing the sqlock helpers
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, os.path.join(parent_dir, "sqlock", "tools"))
+
+from sqlock.matcher import AhoCorasick, _ahocorasick
+
+BACKENDS = ["python"] + (["pyahocorasick"] if _ahocorasick is not None else [])
+
+
+def _brute_force(needles, text):
+    return sorted(
+        (i, m.start(), m.start() + len(needle))
+        for i, needle in enumerate(needles)
+        for m in re.finditer(f"(?={re.escape(needle)})", text)
+    )
+
+
+def test_reports_every_overlapping_hit():
+    for backend in BACKENDS:
+        matcher = AhoCorasick(["' or 1=1", "' or 1=1--", "1=1", "or"], backend=backend)
+        hits = sorted(matcher.finditer("x' or 1=1--"))
+        assert hits == [(0, 1, 9), (1, 1, 11), (2, 6, 9), (3, 3, 5)]
+
+
+def test_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(500):
+        needles = ["".join(rng.choice("ab'") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = "".join(rng.choice("ab' ") for _ in range(rng.randint(0, 30)))
+        expected = _brute_force(needles, text)
+        for backend in BACKENDS:
+            matcher = AhoCorasick(needles, backend=backend)
+            assert sorted(matcher.finditer(text)) == expected
+            assert matcher.matched_indexes(text) == {i for i, _, _ in expected}
+
+
+def test_rejects_empty_needles():
+    try:
+        AhoCorasick(["union", ""])
+    except ValueError:
+        return
+    assert False, "empty needle should be rejected"
+
+
+def test_signature_matcher_agrees_with_combined_regex():
+    import SQLlog
+
+    patterns = [SQLlog._signature_to_regex(s) for s in SQLlog.SQLI_SIGNATURES] + SQLlog.ADDITIONAL_SQLI_PATTERNS
+    combined = re.compile("(?:" + "|".join(patterns) + ")", re.IGNORECASE)
+    matcher = SQLlog.SignatureMatcher(patterns)
+
+    samples = [
+        "john_doe", "Auth Username: admin", "x' OR 1=1 --", "UNION   SELECT pw",
+        "waitfor delay '0:0:5'", "ſelect name from users", "drop\ttable t", "selection from",
+    ]
+    for text in samples:
+        assert matcher.is_suspicious(text) == bool(combined.search(text)), text
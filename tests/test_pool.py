@@ -0,0 +1,125 @@
+"""
+SQLock Connection Pool Tests - sqlock/pool.py and the pooled Mitigation_SRC helpers (no database needed)
+Run with: python -m pytest tests/test_pool.py
+"""
+
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from sqlock.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.alive
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**settings):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    return ConnectionPool(connect, **settings), opened
+
+
+def test_connections_are_reused():
+    pool, opened = _pool(size=2)
+    for _ in range(5):
+        with pool.connection() as connection:
+            assert connection is opened[0]
+    stats = pool.stats()
+    assert stats['created'] == 1 and stats['reused'] == 4 and stats['checkouts'] == 5
+    assert stats['open'] == 1 and stats['idle'] == 1 and stats['in_use'] == 0
+
+
+def test_size_limit_waits_then_times_out():
+    pool, opened = _pool(size=1, checkout_timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    # A waiter gets the connection as soon as it is returned
+    threading.Timer(0.02, pool.release, args=(held,)).start()
+    pool.checkout_timeout = 5
+    assert pool.acquire() is held
+    stats = pool.stats()
+    assert stats['waits'] == 2 and stats['timeouts'] == 1 and stats['peak_in_use'] == 1
+    assert len(opened) == 1
+
+
+def test_health_check_and_lifetime():
+    pool, opened = _pool(size=2, check_idle_after=0)
+    with pool.connection():
+        pass
+    opened[0].alive = False
+    with pool.connection() as connection:
+        assert connection is opened[1]
+    assert opened[0].closed and pool.stats()['health_check_failures'] == 1
+
+    pool.max_lifetime = 0.01
+    time.sleep(0.02)
+    with pool.connection() as connection:
+        assert connection is opened[2]
+    assert opened[1].closed and pool.stats()['expired'] == 1
+
+
+def test_errors_discard_the_connection():
+    pool, opened = _pool()
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("lost connection")
+    assert opened[0].closed
+    assert pool.stats()['discarded'] == 1 and pool.stats()['open'] == 0
+
+
+def test_forked_child_starts_empty():
+    pool, opened = _pool()
+    with pool.connection():
+        pass
+    pool._pid = -1  # As if this process were a fork of the pool's creator
+    with pool.connection() as connection:
+        assert connection is opened[1]
+    assert not opened[0].closed  # The parent's socket is left alone
+
+
+def test_helpers_share_the_pool(tmp_path, monkeypatch, local_db):
+    monkeypatch.chdir(tmp_path)
+    db = local_db()
+    db.add_user("admin", "admin@test.com", "admin123")
+    for _ in range(10):
+        assert Mitigation_SRC.authenticate_user("admin", "admin123")['username'] == "admin"
+    assert Mitigation_SRC.get_lockout_info("admin")['failed_attempts'] == 0
+    assert db.connects == 1
+    stats = Mitigation_SRC.db_pool_stats()
+    assert stats['created'] == 1 and stats['reused'] == stats['checkouts'] - 1
+
+    settings = dict(Mitigation_SRC.DB_POOL_SETTINGS)
+    Mitigation_SRC.configure_db_pool(size=1, checkout_timeout=0.05)
+    try:
+        with Mitigation_SRC._db_connection():
+            # Pool exhausted: the helper reports a database error and fails safe
+            assert Mitigation_SRC.is_account_locked("admin") is False
+        Mitigation_SRC.flush_activity_log()
+        assert "Database error checking lockout status" in open("pseudo_log.txt").read()
+    finally:
+        Mitigation_SRC.configure_db_pool(**settings)
@@ -0,0 +1,86 @@
+"""
+SQLock Prefilter Tests - the benign-input screen must never change a verdict
+Run with: python -m pytest tests/test_prefilter.py
+"""
+
+import sys
+import os
+import random
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from Mitigation_SRC import Ruleset
+from bench_sqlock import load_corpus
+
+# Pieces that sit right at the edges of the prefilter conditions
+FRAGMENTS = [
+    "or", "OR", "Or1", "or_", "_or", "and", "anna", "union", "unions", "select", "from", "table",
+    "tablespoon", "exec", "execute(", "xp_", "sp_", "wasp_nest", "drop", "insert", "into", "update",
+    "'", '"', "`", ";", "-", "--", "#", "/", "/*", "*", "=", "1=1", "%", "%27", "&", "&#39;",
+    "1", "a", "b", " ", "  ", "\n", "\t", "_", "@", ".", "é", "’", "ＯＲ",
+]
+
+
+def _screen_corpus():
+    corpus = load_corpus("benign") + load_corpus("malicious")
+    rng = random.Random(2026)
+    for _ in range(20000):
+        corpus.append("".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 8))))
+    return corpus
+
+
+def test_prefilter_has_no_false_negatives():
+    screened = Ruleset.default()
+    unscreened = Ruleset.default(prefilter=False)
+    for text in _screen_corpus():
+        assert screened.detect(text) == unscreened.detect(text), text
+        assert screened.detect_fast(text)[0] == unscreened.detect_fast(text)[0], text
+    assert screened.prefilter.stats()['skipped'] > 0
+
+
+def test_batch_screen_never_skips_more_than_scalar_screen():
+    corpus = _screen_corpus()
+    prefilter = Ruleset.default().prefilter
+    batch = prefilter.needs_scan_many(corpus)
+    for text, needed in zip(corpus, batch):
+        if not needed:
+            assert not prefilter.needs_scan(text), text
+
+    screened = Ruleset.default().detect_many(corpus)
+    unscreened = Ruleset.default(prefilter=False).detect_many(corpus)
+    assert screened.scores.tolist() == unscreened.scores.tolist()
+    assert screened.patterns.tolist() == unscreened.patterns.tolist()
+
+
+def test_batch_screen_without_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    prefilter = Ruleset.default().prefilter
+    assert prefilter.needs_scan_many(["john_doe", "admin'--", "x UNION y"]) == [False, True, True]
+
+
+def test_conditions_follow_the_ruleset():
+    ruleset = Ruleset(
+        Mitigation_SRC.SQLI_REGEX_RULES + [(r"\bsleep\s*\(", 90, "Time-based injection", ("sleep",))],
+        Mitigation_SRC.RAW_INPUT_REGEX_RULES,
+        dict(Mitigation_SRC.BASIC_SQLI_DICTIONARY, benchmark="Benchmark call"),
+    )
+    assert {"sleep"} <= ruleset.prefilter.trigger_words
+    assert "benchmark" in ruleset.prefilter.trigger_substrings
+    assert ruleset.detect("sleep (5)") == (True, "Time-based injection", 90)
+    assert ruleset.detect("runbenchmarks") == (True, "Benchmark call (Dictionary Match)", 100)
+
+
+def test_counters_and_clean_verdict():
+    ruleset = Ruleset.default()
+    assert ruleset.detect("john_doe") == (False, None, 0)
+    assert ruleset.detect("admin'--")[0]
+    assert ruleset.prefilter.stats() == {'checked': 2, 'skipped': 1, 'skip_rate': 0.5}
+
+    # The skipped verdict is whatever an empty finding list scores, even at odd thresholds
+    permissive = Ruleset.default(block_threshold=0)
+    assert permissive.detect("john_doe") == Ruleset.default(block_threshold=0, prefilter=False).detect("john_doe")
@@ -0,0 +1,140 @@
+"""
+SQLock Rate Limit Tests - sqlock/ratelimit.py and the optional login rate limit (no database needed)
+Run with: python -m pytest tests/test_rate_limit.py
+"""
+
+import sys
+import os
+import threading
+import types
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from sqlock import ratelimit
+from sqlock.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def test_limit_and_transitions(clock):
+    limiter = RateLimiter(limit=3, window=10)
+    assert [limiter.hit("alice") for _ in range(5)] == [
+        (True, False), (True, False), (True, False), (False, True), (False, False)
+    ]
+    assert limiter.hit("bob") == (True, False)  # Keys are independent
+    clock.now += 20  # Two windows later the count has decayed completely
+    assert limiter.hit("alice") == (True, True)
+    assert limiter.stats()['allowed'] == 5 and limiter.stats()['rejected'] == 2
+
+
+def test_window_slides_instead_of_resetting(clock):
+    limiter = RateLimiter(limit=10, window=10)
+    clock.now = 1009.0  # Late in the window starting at 1000
+    assert all(limiter.hit("alice")[0] for _ in range(10))
+    clock.now = 1011.0  # A fixed window would allow 10 more right away
+    allowed = sum(limiter.hit("alice")[0] for _ in range(10))
+    assert allowed == 1  # 10 * 0.9 of the previous window still counts
+    clock.now = 1015.0
+    assert sum(limiter.hit("alice")[0] for _ in range(10)) == 4
+
+
+def test_idle_keys_are_evicted(clock):
+    limiter = RateLimiter(limit=5, window=10, shards=4, max_keys=32)
+    for i in range(100):
+        limiter.hit(f"user{i}")
+    assert len(limiter) <= 32 and limiter.stats()['evictions'] >= 68
+
+    limiter = RateLimiter(limit=5, window=10, shards=1, max_keys=32)
+    for i in range(20):
+        limiter.hit(f"user{i}")
+    clock.now += 25
+    limiter.hit("fresh")
+    assert len(limiter) == 1  # Keys idle for two windows are dropped when their shard is touched
+
+
+def test_concurrent_hits_never_exceed_the_limit():
+    limiter = RateLimiter(limit=100, window=60, shards=4)
+    results = []
+
+    def worker():
+        results.append(sum(limiter.hit("alice")[0] for _ in range(500)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(results) == 100
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        RateLimiter(limit=0, window=1)
+    with pytest.raises(ValueError):
+        RateLimiter(limit=1, window=1, shards=8, max_keys=4)
+
+
+def test_flood_is_rejected_before_the_database(db):
+    Mitigation_SRC.enable_login_rate_limit(per_username=2, per_address=None)
+    db.reset_counters()
+    for _ in range(2):
+        assert Mitigation_SRC.authenticate_user("alice", "guess") is None
+    attempts = db.queries
+    for _ in range(50):
+        assert Mitigation_SRC.authenticate_user("alice", "guess") is None
+    # One security event per rejected attempt, plus one write when alice became limited
+    assert db.queries == attempts + 50 + 1
+    assert db.fetchall("SELECT COUNT(*) FROM Logs") == [(52,)]
+
+    failed_attempts, lockout_until, reason = db.fetchall(
+        "SELECT failed_attempts, lockout_until, lockout_reason FROM user_security WHERE username = 'alice'")[0]
+    assert failed_attempts == 2 and reason == Mitigation_SRC.RATE_LIMIT_REASON
+    assert Mitigation_SRC.is_account_locked("alice")
+    assert Mitigation_SRC.login_rate_limit_stats()['username']['rejected'] == 50
+    Mitigation_SRC.flush_activity_log()
+    assert open("pseudo_log.txt").read().count("Login rate limit exceeded") == 1
+
+
+def test_sync_keeps_a_longer_lockout(db):
+    Mitigation_SRC.apply_immediate_sql_lockout("alice", "UNION-based injection")
+    Mitigation_SRC.enable_login_rate_limit(per_username=1, per_address=None)
+    for _ in range(3):
+        Mitigation_SRC.authenticate_user("alice", "guess")
+    assert Mitigation_SRC.get_lockout_info("alice")['is_sql_injection_lockout']
+
+
+def test_lockout_is_recorded_without_a_security_row(db):
+    Mitigation_SRC._sync_rate_limit_lockout("newcomer", 60)  # No user_security row yet
+    failed_attempts, lockout_until, reason = db.fetchall(
+        "SELECT failed_attempts, lockout_until, lockout_reason FROM user_security WHERE username = 'newcomer'")[0]
+    assert failed_attempts == 0 and reason == Mitigation_SRC.RATE_LIMIT_REASON
+    assert Mitigation_SRC.is_account_locked("newcomer")
+
+
+def test_address_limit_spans_usernames(db):
+    Mitigation_SRC.enable_login_rate_limit(per_username=100, per_address=3)
+    results = [Mitigation_SRC.authenticate_user(f"user{i}", "guess", client_address="203.0.113.7") for i in range(5)]
+    assert results == [None] * 5
+    assert db.fetchall("SELECT COUNT(*) FROM user_security") == [(3,)]  # Only 3 attempts got through
+    # Another address is unaffected
+    assert Mitigation_SRC.authenticate_user("alice", "secret", client_address="198.51.100.1")['username'] == "alice"
+
+
+def test_successful_login_resets_the_username_count(db):
+    Mitigation_SRC.enable_login_rate_limit(per_username=3, per_address=None)
+    for _ in range(10):
+        Mitigation_SRC.authenticate_user("alice", "wrong")
+        Mitigation_SRC.reset_failed_attempts("alice")  # Keep the progressive lockout out of the way
+        assert Mitigation_SRC.authenticate_user("alice", "secret")['username'] == "alice"
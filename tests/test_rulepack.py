@@ -0,0 +1,156 @@
+"""
+SQLock Rule Pack Tests - loading, validation and hot reload of rule pack files
+Run with: python -m pytest tests/test_rulepack.py
+"""
+
+import sys
+import os
+import json
+import threading
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, os.path.join(parent_dir, "sqlock", "tools"))
+
+import Mitigation_SRC
+from Mitigation_SRC import Ruleset, detect_sql_injection_patterns, export_rule_pack
+from sqlock.rulepack import RulePackError, RulePackWatcher, load_rule_pack
+
+DEFAULT_PACK = os.path.join(parent_dir, "sqlock", "rules", "default.json")
+
+
+def _write_pack(path, document):
+    path.write_text(json.dumps(document), encoding="utf-8")
+    # Make sure the watcher sees a new mtime even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def builtin_rules():
+    yield
+    Mitigation_SRC.use_builtin_rules()
+
+
+def test_shipped_pack_matches_builtin_rules():
+    import SQLlog
+
+    pack = load_rule_pack(DEFAULT_PACK)
+    assert Ruleset.from_rule_pack(pack).version == Ruleset.default().version
+    assert pack["log_analyzer"] == {
+        "signatures": SQLlog.SQLI_SIGNATURES,
+        "patterns": SQLlog.ADDITIONAL_SQLI_PATTERNS,
+    }
+
+
+def test_toml_pack(tmp_path):
+    path = tmp_path / "rules.toml"
+    path.write_text(
+        'format = 1\n'
+        'version = "t1"\n'
+        '[detector]\n'
+        'block_threshold = 30\n'
+        '[[detector.regex_rules]]\n'
+        'pattern = "--"\n'
+        'weight = 40\n'
+        'description = "Dash comment"\n'
+        'anchors = ["--"]\n'
+        '[detector.dictionary]\n'
+        '"xp_" = "Extended procedure"\n',
+        encoding="utf-8",
+    )
+    ruleset = Ruleset.from_rule_pack(load_rule_pack(path))
+    assert ruleset.rule_pack == "rules.toml@t1"
+    assert ruleset.detect("name--") == (True, "Dash comment", 40)
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda d: d.update(format=2), "format"),
+    (lambda d: d.pop("version"), "version"),
+    (lambda d: d["detector"]["regex_rules"][0].update(pattern="(unclosed"), "valid regex"),
+    (lambda d: d["detector"]["regex_rules"][0].update(weight="high"), "weight"),
+    (lambda d: d["detector"]["regex_rules"][0].update(anchors=[]), "anchors"),
+    (lambda d: d["detector"].update(dictionary=["1=1"]), "dictionary"),
+    (lambda d: d.update(log_analyzer={"patterns": ["[a-"]}), r"log_analyzer\.patterns\[0\]"),
+])
+def test_invalid_packs_are_rejected(tmp_path, change, message):
+    document = export_rule_pack()
+    change(document)
+    path = tmp_path / "bad.json"
+    _write_pack(path, document)
+    with pytest.raises(RulePackError, match=message):
+        load_rule_pack(path)
+
+
+def test_hot_reload_on_mtime_change(tmp_path, builtin_rules):
+    path = tmp_path / "rules.json"
+    document = export_rule_pack(version="1")
+    _write_pack(path, document)
+    watcher = Mitigation_SRC.use_rule_pack(path, poll_interval=0, reload_signal=False)
+    assert detect_sql_injection_patterns("user/*comment*/") == (False, "SQL Comment", 30)
+
+    document["version"] = "2"
+    document["detector"]["block_threshold"] = 30
+    _write_pack(path, document)
+    assert detect_sql_injection_patterns("user/*comment*/") == (True, "SQL Comment", 30)
+    assert watcher.reloads == 1
+    assert Mitigation_SRC.DEFAULT_RULESET.rule_pack == "sqlock-default@2"
+
+
+def test_broken_reload_keeps_current_rules(tmp_path, builtin_rules, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The failed reload is written to pseudo_log.txt
+    path = tmp_path / "rules.json"
+    document = export_rule_pack(version="1")
+    document["detector"]["block_threshold"] = 30
+    _write_pack(path, document)
+    watcher = Mitigation_SRC.use_rule_pack(path, poll_interval=0, reload_signal=False)
+
+    path.write_text("{ not json", encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+    assert detect_sql_injection_patterns("user/*comment*/") == (True, "SQL Comment", 30)
+    assert watcher.failures == 1 and watcher.reloads == 0
+
+
+def test_forced_reload_and_in_flight_detections(tmp_path):
+    path = tmp_path / "rules.json"
+    _write_pack(path, export_rule_pack(version="1"))
+    watcher = RulePackWatcher(path, Ruleset.from_rule_pack, poll_interval=3600)
+    old = watcher.current()
+
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow_detection(ruleset):
+        started.set()
+        release.wait(5)
+        results.append(ruleset.detect("user/*comment*/"))
+
+    worker = threading.Thread(target=slow_detection, args=(watcher.current(),))
+    worker.start()
+    started.wait(5)
+
+    document = export_rule_pack(version="2")
+    document["detector"]["block_threshold"] = 30
+    _write_pack(path, document)
+    assert watcher.current() is old  # Not polled again yet
+    watcher.request_reload()
+    assert watcher.current() is not old
+
+    release.set()
+    worker.join()
+    # The detection that started before the swap finished on the old rules
+    assert results == [(False, "SQL Comment", 30)]
+    assert watcher.current().detect("user/*comment*/") == (True, "SQL Comment", 30)
+
+
+def test_log_analyzer_signatures_from_pack(tmp_path):
+    import SQLlog
+
+    path = tmp_path / "rules.json"
+    _write_pack(path, {"format": 1, "version": "1", "log_analyzer": {"signatures": ["benchmark("], "patterns": []}})
+    assert SQLlog.load_signatures(str(path)) == (["benchmark("], [])
+    assert SQLlog.load_signatures() == (SQLlog.SQLI_SIGNATURES, SQLlog.ADDITIONAL_SQLI_PATTERNS)
@@ -0,0 +1,239 @@
+"""
+SQLock Shared Lockout Tests - sqlock/sharedlockout.py and the shared lockout table (no MySQL needed)
+Run with: python -m pytest tests/test_shared_lockout.py
+"""
+
+import sys
+import os
+import json
+import multiprocessing
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from sqlock import sharedlockout
+from sqlock.sharedlockout import SharedLockoutTable
+from sqlock.storage import SQLiteStorage
+
+fork = pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+
+
+@pytest.fixture
+def table(tmp_path):
+    table = SharedLockoutTable(str(tmp_path / "lockouts"), slots=64, ttl=60)
+    yield table
+    table.close()
+
+
+def _fill(path, first, count):
+    table = SharedLockoutTable(path, slots=64, ttl=60)
+    for i in range(first, first + count):
+        table.store(f"user{i}", (i, None, f"reason {i}"), table.version(f"user{i}"))
+
+
+def _flip(path, seconds):
+    table = SharedLockoutTable(path, slots=64, ttl=60)
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for state in ((1, None, "x"), (60, None, "x" * 60)):
+            table.update("alice", failed_attempts=state[0], lockout_reason=state[2])
+
+
+def test_entries_round_trip(table):
+    until = datetime.now() + timedelta(minutes=15, microseconds=123457)
+    assert table.get("alice") is SharedLockoutTable.MISS
+    table.store("alice", (3, until, "Too many failed attempts"), table.version("alice"))
+    table.store("bob", None, table.version("bob"))
+    assert table.get("alice") == (3, until, "Too many failed attempts")
+    assert table.get("bob") is None and table.is_locked("alice") and not table.is_locked("bob")
+
+    table.update("bob", failed_attempts=1)  # A negative entry becomes the freshly inserted row
+    assert table.get("bob") == (1, None, None)
+    table.reset("alice")
+    assert table.get("alice") == (0, None, "Too many failed attempts")
+    table.update("alice", lockout_until=until, lockout_reason="SQL injection attempt: " + "x" * 80)
+    table.reset("alice")  # SQL injection lockouts are kept
+    assert table.get("alice")[1] == until and len(table.get("alice")[2].encode()) == sharedlockout.REASON_BYTES
+    table.invalidate("alice")
+    assert table.get("alice") is SharedLockoutTable.MISS
+
+
+def test_stale_reads_are_not_stored(table):
+    version = table.version("alice")
+    table.update("alice", failed_attempts=2)  # A helper wrote while the row was being read
+    table.store("alice", (0, None, None), version)
+    assert table.get("alice") is SharedLockoutTable.MISS
+
+
+def test_entries_expire(tmp_path):
+    table = SharedLockoutTable(str(tmp_path / "lockouts"), slots=8, ttl=0.05, negative_ttl=60)
+    table.store("alice", (1, None, None), table.version("alice"))
+    table.store("bob", None, table.version("bob"))
+    time.sleep(0.1)
+    assert table.get("alice") is SharedLockoutTable.MISS and table.get("bob") is None
+    assert table.stats()['size'] == 1
+
+
+def test_full_bucket_reuses_the_oldest_slot(tmp_path):
+    table = SharedLockoutTable(str(tmp_path / "lockouts"), slots=8, bucket_size=8, ttl=60)
+    for i in range(20):
+        table.store(f"user{i}", (i, None, None), table.version(f"user{i}"))
+    assert table.stats()['size'] == 8 and table.stats()['evictions'] == 12
+    assert [table.get(f"user{i}") for i in range(12, 20)] == [(i, None, None) for i in range(12, 20)]
+    assert table.get("user0") is SharedLockoutTable.MISS
+
+
+def test_layout_is_checked(table):
+    with pytest.raises(ValueError):
+        SharedLockoutTable(table.path, slots=128)
+    with pytest.raises(ValueError):
+        SharedLockoutTable(table.path + "2", slots=10, bucket_size=8)
+    assert SharedLockoutTable(table.path, slots=64).stats()['capacity'] == 64
+
+
+def test_interrupted_write_reads_as_empty(table):
+    table.store("alice", (1, None, None), table.version("alice"))
+    bucket = table._bucket(sharedlockout._key_hash("alice"))
+    offset = next(table._slot_offset(bucket, i) for i in range(table.bucket_size)
+                  if table._read_slot(table._slot_offset(bucket, i))[1])
+    sharedlockout._SEQ.pack_into(table._map, offset, 7)  # A writer died halfway through
+    assert table.get("alice") is SharedLockoutTable.MISS
+    table.store("alice", (2, None, None), table.version("alice"))
+    assert table.get("alice") == (2, None, None)
+
+
+def test_only_a_private_file_is_opened(tmp_path, monkeypatch):
+    target = tmp_path / "elsewhere"
+    target.write_bytes(b"")
+    os.chmod(target, 0o600)
+    os.symlink(target, tmp_path / "planted")
+    with pytest.raises(OSError):
+        SharedLockoutTable(str(tmp_path / "planted"), slots=64)
+    os.chmod(target, 0o644)  # Readable by other local users
+    with pytest.raises(PermissionError):
+        SharedLockoutTable(str(target), slots=64)
+
+    private = tmp_path / "private"
+    monkeypatch.setattr(sharedlockout, "default_path", lambda: str(private / "lockouts"))
+    SharedLockoutTable(slots=64).close()
+    assert os.stat(private).st_mode & 0o777 == 0o700
+    os.chmod(private, 0o755)
+    with pytest.raises(PermissionError):
+        SharedLockoutTable(slots=64)
+
+
+@fork
+def test_concurrent_processes_share_the_table(table):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_fill, args=(table.path, i * 10, 10)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    torn = 0
+    while any(worker.is_alive() for worker in workers):
+        for i in range(40):
+            state = table.get(f"user{i}")
+            torn += state is not SharedLockoutTable.MISS and state != (i, None, f"reason {i}")
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    assert torn == 0
+    # Every bucket keeps as many of its users as it has slots
+    per_bucket = {}
+    for i in range(40):
+        bucket = table._bucket(sharedlockout._key_hash(f"user{i}"))
+        per_bucket[bucket] = per_bucket.get(bucket, 0) + 1
+    found = sum(table.get(f"user{i}") is not SharedLockoutTable.MISS for i in range(40))
+    assert found == table.stats()['size'] == sum(min(count, table.bucket_size) for count in per_bucket.values())
+
+
+@fork
+def test_reads_never_mix_two_writes(table):
+    table.store("alice", (1, None, "x"), table.version("alice"))
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=_flip, args=(table.path, 1.0)) for _ in range(2)]
+    for writer in writers:
+        writer.start()
+    reads = torn = 0
+    while any(writer.is_alive() for writer in writers):
+        for _ in range(1000):
+            state = table.get("alice")
+            reads += 1
+            torn += state not in ((1, None, "x"), (60, None, "x" * 60)) and state is not SharedLockoutTable.MISS
+    for writer in writers:
+        writer.join()
+        assert writer.exitcode == 0
+    assert reads > 10000 and torn == 0
+
+
+def test_helpers_write_through(db, tmp_path):
+    Mitigation_SRC.enable_shared_lockout_table(str(tmp_path / "lockouts"), slots=64)
+    Mitigation_SRC.is_account_locked("bob")  # Stored as "no record"
+    for _ in range(3):
+        Mitigation_SRC.record_failed_login("bob")
+    db.reset_counters()
+    info = Mitigation_SRC.get_lockout_info("bob")
+    assert info['locked'] and info['failed_attempts'] == 3 and db.queries == 0
+
+    Mitigation_SRC.apply_immediate_sql_lockout("bob", "Tautology (OR 1=1)")
+    Mitigation_SRC.reset_failed_attempts("bob")
+    assert Mitigation_SRC.get_lockout_info("bob")['is_sql_injection_lockout']
+    assert Mitigation_SRC._read_lockout_state("bob") == db.fetchall(
+        "SELECT failed_attempts, lockout_until, lockout_reason FROM user_security WHERE username = 'bob'")[0]
+
+    for _ in range(3):
+        Mitigation_SRC.authenticate_user("alice", "wrong")
+    db.reset_counters()
+    assert Mitigation_SRC.authenticate_user("alice", "secret") is None  # Rejected from the table
+    assert Mitigation_SRC.is_account_locked("alice") and db.queries == 1  # Only the security event
+
+
+def test_replaced_tables_are_closed(db, tmp_path):
+    path = str(tmp_path / "lockouts")
+    first = Mitigation_SRC.enable_shared_lockout_table(path, slots=64)
+    second = Mitigation_SRC.enable_shared_lockout_table(path, slots=64)
+    assert first._map.closed and not second._map.closed
+    Mitigation_SRC.is_account_locked("bob")
+    Mitigation_SRC.record_failed_login("bob")
+    assert second.get("bob") == (1, None, None)
+    Mitigation_SRC.disable_lockout_cache()
+    assert second._map.closed
+    second.close()  # Closing again is harmless
+
+
+def test_lockout_by_another_worker_is_seen_at_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    database = str(tmp_path / "sqlock.db")
+    SQLiteStorage(database).create_schema(with_test_users=True)
+    previous = Mitigation_SRC.get_storage()
+    Mitigation_SRC.use_storage(f"sqlite:{database}")
+    table = Mitigation_SRC.enable_shared_lockout_table(str(tmp_path / "lockouts"), slots=64, ttl=600)
+    try:
+        assert Mitigation_SRC.is_account_locked("admin") is False  # Now known in the table, for 10 minutes
+
+        code = (
+            "import json, Mitigation_SRC\n"
+            f"Mitigation_SRC.enable_shared_lockout_table({table.path!r}, slots=64, ttl=600)\n"
+            "Mitigation_SRC.apply_immediate_sql_lockout('admin', 'UNION-based injection')\n"
+            "print(json.dumps(Mitigation_SRC.get_lockout_info('admin')['is_sql_injection_lockout']))\n"
+        )
+        env = dict(os.environ, PYTHONPATH=parent_dir, SQLOCK_STORAGE=f"sqlite:{database}")
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True,
+                                timeout=60)
+        assert json.loads(result.stdout) is True, result.stderr
+
+        hits = table.stats()['hits']
+        assert Mitigation_SRC.is_account_locked("admin") is True
+        assert table.stats()['hits'] == hits + 1  # Answered by the shared table, not user_security
+    finally:
+        Mitigation_SRC.disable_lockout_cache()
+        Mitigation_SRC.use_storage(previous)
+        table.close()
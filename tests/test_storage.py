@@ -0,0 +1,168 @@
+"""
+SQLock Storage Tests - the shared schema and the embedded SQLite backend (no MySQL needed)
+Run with: python -m pytest tests/test_storage.py
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add parent directory to path for importing Mitigation_SRC
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+import Mitigation_SRC
+from sqlock import db, schema, storage
+from sqlock.storage import MySQLStorage, SQLiteStorage, open_storage
+
+
+@pytest.fixture
+def embedded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    previous = Mitigation_SRC.get_storage()
+    backend = Mitigation_SRC.use_storage("sqlite", create_schema=True)
+    yield backend
+    Mitigation_SRC.use_storage(previous)
+    backend.close()
+
+
+def test_schema_renders_for_both_dialects():
+    mysql = "\n".join(schema.create_table_statements("mysql"))
+    sqlite = "\n".join(schema.create_table_statements("sqlite"))
+    for table, _, _ in schema.TABLES:
+        assert f"CREATE TABLE IF NOT EXISTS {table} (" in mysql and f"CREATE TABLE IF NOT EXISTS {table} (" in sqlite
+    assert "id INT AUTO_INCREMENT PRIMARY KEY" in mysql and "INDEX idx_lockout_until (lockout_until)" in mysql
+    assert "AUTO_INCREMENT" not in sqlite and "ON user_security (lockout_until)" in sqlite
+    with pytest.raises(ValueError):
+        schema.create_table_statements("postgres")
+
+
+def test_statements_are_written_per_dialect():
+    mysql, sqlite = MySQLStorage.STATEMENTS, SQLiteStorage.STATEMENTS
+    assert mysql.keys() == sqlite.keys()
+    assert mysql['sql_lockout'].strip().endswith(
+        "ON DUPLICATE KEY UPDATE\n    lockout_until = VALUES(lockout_until),\n"
+        "    lockout_reason = VALUES(lockout_reason),\n    last_failed_attempt = VALUES(last_failed_attempt)"
+    )
+    assert sqlite['sql_lockout'].strip().endswith(
+        "ON CONFLICT(username) DO UPDATE SET\n    lockout_until = excluded.lockout_until,\n"
+        "    lockout_reason = excluded.lockout_reason,\n    last_failed_attempt = excluded.last_failed_attempt"
+    )
+    for statements, placeholder, other in ((mysql, "%s", "?"), (sqlite, "?", "%s")):
+        assert placeholder in statements['count_failure'] and other not in statements['count_failure']
+        # Literals are never rewritten
+        assert "NOT LIKE '%SQL injection%'" in statements['reset_failed_attempts']
+
+
+def test_storage_urls(monkeypatch):
+    monkeypatch.setenv("SQLOCK_DB_HOST", "db.internal")
+    monkeypatch.setenv("SQLOCK_DB_PORT", "3307")
+    backend = open_storage("mysql", storage.mysql_config(user="app"))
+    assert backend.config == {'host': 'db.internal', 'port': 3307, 'database': 'sqlockdb', 'user': 'app',
+                              'password': 'password'}
+    assert open_storage("sqlite").path == ":memory:"
+    assert open_storage("sqlite:/var/lib/sqlock.db").path == "/var/lib/sqlock.db"
+    with pytest.raises(ValueError):
+        open_storage("postgres://localhost")
+
+
+def test_helpers_run_on_the_embedded_backend(embedded):
+    cursor = embedded.connect().cursor()
+    assert embedded.add_users(cursor) == [username for username, _, _ in schema.TEST_USERS]
+    assert embedded.add_users(cursor) == []  # Already there
+    assert embedded.count_users(cursor) == 4
+
+    assert Mitigation_SRC.authenticate_user("admin", "admin123")['email'] == "admin@test.com"
+    for _ in range(3):
+        assert Mitigation_SRC.authenticate_user("john_doe", "wrong") is None
+    info = Mitigation_SRC.get_lockout_info("john_doe")
+    assert info['locked'] and info['failed_attempts'] == 3
+
+    Mitigation_SRC.apply_immediate_sql_lockout("test_user", "Tautology (OR 1=1)")
+    assert Mitigation_SRC.get_lockout_info("test_user")['is_sql_injection_lockout']
+    Mitigation_SRC.record_failed_login("ghost")
+    assert Mitigation_SRC.get_lockout_info("ghost")['failed_attempts'] == 1
+    assert Mitigation_SRC.find_user_by_id(1) == (1, "admin", "admin@test.com")
+
+    cursor.execute("SELECT decision, query_template FROM Logs ORDER BY id")
+    assert cursor.fetchall()[:2] == [("allow", "Auth Username: admin"), ("allow", "Auth Username: john_doe")]
+    cursor.execute("SELECT ts_utc FROM Logs")
+    assert isinstance(cursor.fetchone()[0], datetime)
+
+
+def test_datetimes_are_converted_per_connection():
+    adapters, converters = dict(sqlite3.adapters), dict(sqlite3.converters)
+    backend = SQLiteStorage()
+    backend.create_schema()
+    cursor = backend.connect().cursor()
+    until = datetime.now() + timedelta(minutes=15)
+    backend.sql_lockout(cursor, "alice", until, "SQL injection attempt: x", datetime.now())
+    assert backend.lockout_state(cursor, "alice") == (0, until, "SQL injection attempt: x")
+    cursor.execute("SELECT lockout_until, typeof(lockout_until) FROM user_security")
+    assert cursor.fetchone() == (until, "text")
+    # Nothing is registered for the other SQLite users of the process
+    assert dict(sqlite3.adapters) == adapters and dict(sqlite3.converters) == converters
+    backend.close()
+
+
+def test_errors_resolve_to_the_active_backend(embedded):
+    assert db.Error is storage.Error
+    with pytest.raises(db.IntegrityError):
+        cursor = embedded.connect().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", ("dup", "x"))
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", ("dup", "x"))
+
+    # Helpers report backend errors the usual way
+    embedded.connect().cursor().execute("DROP TABLE user_security")
+    assert Mitigation_SRC.is_account_locked("admin") is False
+    Mitigation_SRC.flush_activity_log()
+    assert "Database error checking lockout status" in open("pseudo_log.txt").read()
+
+
+def test_file_database_is_shared_between_processes(tmp_path):
+    path = tmp_path / "sqlock.db"
+    env = dict(os.environ, PYTHONPATH=parent_dir, SQLOCK_STORAGE=f"sqlite:{path}")
+    setup = subprocess.run([sys.executable, os.path.join(current_dir, "setup_test_db.py")], cwd=tmp_path, env=env,
+                           capture_output=True, text=True, timeout=60)
+    assert "Database setup successful!" in setup.stdout, setup.stdout + setup.stderr
+
+    code = (
+        "import json, sys, Mitigation_SRC\n"
+        "user = Mitigation_SRC.authenticate_user('VinayNair', 'password')\n"
+        "Mitigation_SRC.apply_immediate_sql_lockout('admin', 'UNION-based injection')\n"
+        "print(json.dumps({'user': user, 'mysql_loaded': 'mysql.connector' in sys.modules}))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True,
+                            timeout=60)
+    assert json.loads(result.stdout) == {
+        'user': {'id': 3, 'username': 'VinayNair', 'email': 'vinay@test.com'}, 'mysql_loaded': False
+    }, result.stderr
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("SELECT COUNT(*) FROM users").fetchone() == (4,)
+    until, reason = connection.execute("SELECT lockout_until, lockout_reason FROM user_security").fetchone()
+    assert reason == "SQL injection attempt: UNION-based injection"
+    assert datetime.fromisoformat(until) > datetime.now() + timedelta(hours=23)
+
+
+def test_log_analyzer_reads_the_embedded_database(tmp_path):
+    path = tmp_path / "sqlock.db"
+    backend = SQLiteStorage(str(path))
+    backend.create_schema()
+    cursor = backend.connect().cursor()
+    backend.insert_events(cursor, [("allow", 0, "alice viewed the product page"),
+                                   ("block", 95, "' UNION SELECT password FROM users--")])
+    env = dict(os.environ, PYTHONPATH=parent_dir, SQLOCK_STORAGE=f"sqlite:{path}")
+    result = subprocess.run([sys.executable, os.path.join(parent_dir, "sqlock", "tools", "SQLlog.py"), "--from-db"],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    assert summary['rows_scanned'] == 2 and summary['incidents_found'] == 1 and summary['incidents_saved'] == 1
+    cursor.execute("SELECT query_template FROM Security_Event")
+    assert cursor.fetchall() == [("' UNION SELECT password FROM users--",)]